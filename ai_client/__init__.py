@@ -1,14 +1,63 @@
 # Export abstract base classes for typing and extension
-from .stream.interface import StreamerClass
+from .stream.interface import StreamerClass, AsyncStreamerClass
 from .viewer.interface import StreamViewerClass
+from .context.interface import ContextPolicyClass
 
 # Export concrete implementations
-from .stream.impl import Streamer
+from .stream.cancel import CancelToken
+from .stream.config import StreamerConfig
+from .stream.impl import Streamer, AsyncStreamer
+from .stream.cache import CachingStreamer
+from .stream.resilient import ResilientStreamer
+from .stream.hedge import HedgedStreamer
+from .stream.singleflight import SingleFlightStreamer
+from .stream.mock import MockStreamer, AsyncMockStreamer
+from .stream.recording import RecordingStreamer, ReplayStreamer
 from .viewer.impl import StreamViewer
+from .context.impl import (
+    ContextWindow,
+    SlidingWindowPolicy,
+    KeepSystemLastNPolicy,
+    SummarizeOldTurnsPolicy,
+)
+
+# Export stream helpers
+from .stream.broadcast import StreamBroadcast, BroadcastRegistry
+from .stream.coalesce import coalesce_events, coalesce_events_async
+from .stream.metrics import MetricsRegistry, default_registry, instrument
+from .stream.wire import encode_event, decode_event, pack_event, unpack_event
 
 __all__ = [
     "StreamerClass",
+    "AsyncStreamerClass",
     "StreamViewerClass",
+    "ContextPolicyClass",
+    "CancelToken",
+    "StreamerConfig",
     "Streamer",
+    "AsyncStreamer",
+    "CachingStreamer",
+    "ResilientStreamer",
+    "HedgedStreamer",
+    "SingleFlightStreamer",
+    "MockStreamer",
+    "AsyncMockStreamer",
+    "RecordingStreamer",
+    "ReplayStreamer",
     "StreamViewer",
-]
\ No newline at end of file
+    "ContextWindow",
+    "SlidingWindowPolicy",
+    "KeepSystemLastNPolicy",
+    "SummarizeOldTurnsPolicy",
+    "StreamBroadcast",
+    "BroadcastRegistry",
+    "coalesce_events",
+    "coalesce_events_async",
+    "MetricsRegistry",
+    "default_registry",
+    "instrument",
+    "encode_event",
+    "decode_event",
+    "pack_event",
+    "unpack_event",
+]
@@ -0,0 +1,19 @@
+from .interface import ContextPolicyClass
+from .impl import (
+    ContextWindow,
+    SlidingWindowPolicy,
+    KeepSystemLastNPolicy,
+    SummarizeOldTurnsPolicy,
+    estimate_tokens,
+    extractive_summary,
+)
+
+__all__ = [
+    "ContextPolicyClass",
+    "ContextWindow",
+    "SlidingWindowPolicy",
+    "KeepSystemLastNPolicy",
+    "SummarizeOldTurnsPolicy",
+    "estimate_tokens",
+    "extractive_summary",
+]
@@ -0,0 +1,195 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+from schemas import Message
+from .interface import ContextPolicyClass
+
+
+# Rough per-message overhead of the chat format (role markers, separators).
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap tokenizer-free estimate: about four characters per token.
+
+    Good enough for budgeting; pass a real tokenizer's length function to
+    `ContextWindow` when exact counts matter.
+    """
+    return (len(text) + 3) // 4
+
+
+def _split_system(messages: List[Message]) -> Tuple[List[Message], List[Message]]:
+    """Split leading system messages (pinned) from the rest of the history."""
+    i = 0
+    while i < len(messages) and messages[i].role == "system":
+        i += 1
+    return messages[:i], messages[i:]
+
+
+def _fit_tail(
+    messages: List[Message], budget: int, count: Callable[[Message], int]
+) -> List[Message]:
+    """Return the longest suffix of `messages` within `budget` (at least one)."""
+    used = 0
+    start = len(messages)
+    while start > 0:
+        n = count(messages[start - 1])
+        if used + n > budget and start < len(messages):
+            break
+        used += n
+        start -= 1
+    return messages[start:]
+
+
+class SlidingWindowPolicy(ContextPolicyClass):
+    """Keep leading system messages plus as many recent turns as fit."""
+
+    def apply(
+        self, messages: List[Message], budget: int, count: Callable[[Message], int]
+    ) -> List[Message]:
+        pinned, rest = _split_system(messages)
+        remaining = budget - sum(count(m) for m in pinned)
+        return pinned + _fit_tail(rest, remaining, count)
+
+
+class KeepSystemLastNPolicy(ContextPolicyClass):
+    """Keep leading system messages plus at most the last `n` messages.
+
+    The last-`n` cut applies on every turn, within budget or not. If those
+    messages still exceed the budget, the oldest of them are dropped as in
+    `SlidingWindowPolicy`.
+    """
+
+    def __init__(self, n: int = 20):
+        self.n = n
+
+    def limit(self, messages: List[Message]) -> List[Message]:
+        pinned, rest = _split_system(messages)
+        return pinned + (rest[-self.n:] if self.n > 0 else rest[-1:])
+
+    def apply(
+        self, messages: List[Message], budget: int, count: Callable[[Message], int]
+    ) -> List[Message]:
+        pinned, rest = _split_system(self.limit(messages))
+        remaining = budget - sum(count(m) for m in pinned)
+        return pinned + _fit_tail(rest, remaining, count)
+
+
+def extractive_summary(messages: List[Message], max_chars_per_message: int = 200) -> str:
+    """Default summarizer: the opening of each old turn, one line per message.
+
+    Costs no model call. Swap in a model-backed summarizer for better
+    quality at the price of an extra request per summarization.
+    """
+    lines = []
+    for m in messages:
+        text = " ".join(m.text.split())
+        if len(text) > max_chars_per_message:
+            text = text[:max_chars_per_message].rstrip() + "..."
+        lines.append(f"{m.role}: {text}")
+    return "\n".join(lines)
+
+
+class SummarizeOldTurnsPolicy(ContextPolicyClass):
+    """Replace older turns with a single summary message.
+
+    Leading system messages and the last `keep_last` messages are kept
+    verbatim; everything in between is condensed by `summarizer` into one
+    system message of at most `summary_share` of the budget (oldest lines
+    are dropped first). Summaries are cached by the id of the last
+    summarized message, so a growing conversation only re-summarizes when
+    the cut point moves. Falls back to a sliding window if the result still
+    does not fit.
+    """
+
+    SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+    def __init__(
+        self,
+        keep_last: int = 6,
+        summarizer: Optional[Callable[[List[Message]], str]] = None,
+        summary_share: float = 0.25,
+        cache_size: int = 256,
+    ):
+        self.keep_last = keep_last
+        self.summarizer = summarizer or extractive_summary
+        self.summary_share = summary_share
+        self.cache_size = cache_size
+        self._cache: Dict[Tuple[str, int], Message] = {}
+
+    def _summary_for(
+        self, old: List[Message], budget: int, count: Callable[[Message], int]
+    ) -> Message:
+        limit = int(budget * self.summary_share)
+        key = (old[-1].id, limit)
+        cached = self._cache.get(key)
+        if cached is None:
+            lines = self.summarizer(old).splitlines()
+            cached = Message(role="system", text=self.SUMMARY_PREFIX + "\n".join(lines))
+            while len(lines) > 1 and count(cached) > limit:
+                lines = lines[len(lines) // 4 or 1:]
+                cached = Message(role="system", text=self.SUMMARY_PREFIX + "\n".join(lines))
+            if len(self._cache) >= self.cache_size:
+                # Drop the oldest entry (dicts keep insertion order).
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = cached
+        return cached
+
+    def apply(
+        self, messages: List[Message], budget: int, count: Callable[[Message], int]
+    ) -> List[Message]:
+        pinned, rest = _split_system(messages)
+        keep = max(self.keep_last, 1)
+        old, recent = rest[:-keep], rest[-keep:]
+
+        if old:
+            pinned = pinned + [self._summary_for(old, budget, count)]
+
+        remaining = budget - sum(count(m) for m in pinned)
+        return pinned + _fit_tail(recent, remaining, count)
+
+
+class ContextWindow:
+    """Token budget for the prompt sent to the model.
+
+    Token counts are computed once per message and cached on
+    `Message.tokens`, so keeping a running total of a long history costs an
+    addition per message rather than re-tokenizing it on every turn. The
+    policy's `limit` is applied first; when the history still exceeds
+    `max_prompt_tokens`, the policy decides what to drop or condense.
+    """
+
+    def __init__(
+        self,
+        max_prompt_tokens: int = 32 * 1024,
+        policy: Optional[ContextPolicyClass] = None,
+        token_counter: Callable[[str], int] = estimate_tokens,
+    ):
+        """Create a context window.
+
+        Args:
+            max_prompt_tokens: Prompt token budget (excluding the reply).
+            policy: Reduction policy; defaults to `SlidingWindowPolicy`.
+            token_counter: Function returning the token count of a string.
+                Counts are cached on messages, so use one counter per
+                process.
+        """
+        self.max_prompt_tokens = max_prompt_tokens
+        self.policy = policy or SlidingWindowPolicy()
+        self.token_counter = token_counter
+
+    def count(self, message: Message) -> int:
+        """Return the token count of a message, computing and caching it once."""
+        if message.tokens is None:
+            message.tokens = self.token_counter(message.text) + MESSAGE_OVERHEAD_TOKENS
+        return message.tokens
+
+    def total(self, messages: List[Message]) -> int:
+        """Return the total token count of `messages`."""
+        return sum(self.count(m) for m in messages)
+
+    def fit(self, messages: List[Message]) -> List[Message]:
+        """Return `messages` cut by the policy's limit and reduced to the budget."""
+        messages = self.policy.limit(messages)
+        if self.total(messages) <= self.max_prompt_tokens:
+            return list(messages)
+        return self.policy.apply(messages, self.max_prompt_tokens, self.count)
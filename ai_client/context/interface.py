@@ -0,0 +1,43 @@
+from abc import ABC, abstractmethod
+from typing import Callable, List
+from schemas import Message
+
+
+class ContextPolicyClass(ABC):
+    """Abstract base for history-reduction policies.
+
+    A policy is asked to shrink a conversation that exceeds the prompt token
+    budget. It receives a token counter (which reads the per-message cache)
+    so policies never re-tokenize the history themselves.
+    """
+
+    def limit(self, messages: List[Message]) -> List[Message]:
+        """Cut the history regardless of the budget, before it is checked.
+
+        The default keeps every message; override for policies with a
+        fixed bound, such as a maximum number of turns.
+
+        Args:
+            messages: Full conversation, oldest first.
+
+        Returns:
+            List[Message]: the messages to budget.
+        """
+        return messages
+
+    @abstractmethod
+    def apply(
+        self, messages: List[Message], budget: int, count: Callable[[Message], int]
+    ) -> List[Message]:
+        """Return a reduced message list whose token total fits `budget`.
+
+        Args:
+            messages: Full conversation, oldest first.
+            budget: Maximum prompt tokens allowed.
+            count: Returns the (cached) token count of a message.
+
+        Returns:
+            List[Message]: the messages to send. Implementations should keep
+            the most recent message even if it alone exceeds the budget.
+        """
+        raise NotImplementedError
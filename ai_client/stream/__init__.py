@@ -1,4 +1,45 @@
-from .interface import StreamerClass
-from .impl import Streamer
+from .interface import StreamerClass, AsyncStreamerClass
+from .cancel import CancelToken
+from .config import StreamerConfig
+from .impl import Streamer, AsyncStreamer
+from .coalesce import coalesce_events, coalesce_events_async
+from .cache import CachingStreamer, request_key
+from .resilient import ResilientStreamer
+from .hedge import HedgedStreamer
+from .singleflight import SingleFlightStreamer
+from .broadcast import StreamBroadcast, BroadcastRegistry
+from .mock import MockStreamer, AsyncMockStreamer
+from .recording import RecordingStreamer, ReplayStreamer, read_recording
+from .metrics import MetricsRegistry, default_registry, instrument, instrument_async
+from .wire import encode_event, decode_event, pack_event, unpack_event
 
-__all__ = ["StreamerClass", "Streamer"]
+__all__ = [
+    "StreamerClass",
+    "AsyncStreamerClass",
+    "CancelToken",
+    "StreamerConfig",
+    "Streamer",
+    "AsyncStreamer",
+    "CachingStreamer",
+    "ResilientStreamer",
+    "HedgedStreamer",
+    "SingleFlightStreamer",
+    "request_key",
+    "StreamBroadcast",
+    "BroadcastRegistry",
+    "MockStreamer",
+    "AsyncMockStreamer",
+    "RecordingStreamer",
+    "ReplayStreamer",
+    "read_recording",
+    "MetricsRegistry",
+    "default_registry",
+    "instrument",
+    "instrument_async",
+    "encode_event",
+    "decode_event",
+    "pack_event",
+    "unpack_event",
+    "coalesce_events",
+    "coalesce_events_async",
+]
@@ -0,0 +1,259 @@
+"""Run a stream in the background and fan it out to resumable subscribers.
+
+A `StreamBroadcast` pulls a StreamEvent iterator to the end on its own
+thread, independently of who is listening, and keeps the most recent
+events in a bounded ring buffer. Events are keyed by the highest
+`StreamChunk.index` they carry, so a consumer that lost its connection can
+resubscribe with the last index it received and get exactly the events
+it missed, then continue live, without a second upstream request.
+"""
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from schemas import StreamEvent
+from .cancel import CancelToken
+
+
+def event_index(event: StreamEvent, previous: int) -> int:
+    """Return the resume key of `event`: its highest chunk index.
+
+    Events without indexed chunks (e.g. the final event) share the key of
+    the event before them, -1 at the start of a stream.
+    """
+    key = previous
+    for c in event.chunks:
+        if c.index is not None and c.index > key:
+            key = c.index
+    return key
+
+
+def _spawn_thread(target: Callable[[], None]) -> Any:
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+class StreamBroadcast:
+    """One in-flight stream, buffered for several and returning subscribers.
+
+    The producer runs until the stream ends or `cancel` fires. When the
+    last subscriber leaves before the end, the stream is cancelled after
+    `idle_timeout` seconds unless someone resubscribes; this is the grace
+    period a reconnecting client has to resume.
+    """
+
+    def __init__(
+        self,
+        events: Iterable[StreamEvent],
+        cancel: Optional[CancelToken] = None,
+        buffer_size: int = 1024,
+        idle_timeout: Optional[float] = 30.0,
+        spawn: Optional[Callable[[Callable[[], None]], Any]] = None,
+        stream_id: Optional[str] = None,
+    ):
+        """Start pulling `events` in the background.
+
+        Args:
+            events: The stream, typically `streamer.stream_response(...)`
+                created with the same `cancel` token.
+            cancel: Token that aborts the stream; created if not given.
+            buffer_size: Number of most recent events kept for resuming.
+            idle_timeout: Seconds without subscribers before the stream is
+                cancelled. None never cancels for lack of subscribers.
+            spawn: Starts the producer, e.g. Flask-SocketIO's
+                `start_background_task` so eventlet/gevent modes get a green
+                thread. Defaults to a daemon thread.
+            stream_id: Identifier clients resume by; a random one by default.
+        """
+        self.stream_id = stream_id or uuid.uuid4().hex
+        self.cancel_token = cancel or CancelToken()
+        self.idle_timeout = idle_timeout
+        self.finished_at: Optional[float] = None
+        # Caller-owned data travelling with the stream, e.g. what to send
+        # subscribers once it completes.
+        self.metadata: Dict[str, Any] = {}
+
+        self._buffer: Deque[Tuple[int, StreamEvent]] = deque(maxlen=buffer_size)
+        # Absolute position of the next event, and the key of the newest
+        # event that fell out of the buffer.
+        self._count = 0
+        self._dropped_key: Optional[int] = None
+        self._cond = threading.Condition()
+        self._subscribers = 0
+        self._idle_timer: Optional[threading.Timer] = None
+
+        (spawn or _spawn_thread)(lambda: self._produce(events))
+
+    @property
+    def done(self) -> bool:
+        """True once the final event has been buffered."""
+        return self.finished_at is not None
+
+    @property
+    def replayable(self) -> bool:
+        """True while every event of the stream is still buffered."""
+        return self._dropped_key is None
+
+    def cancel(self) -> None:
+        """Abort the stream; subscribers receive its `cancelled` final event."""
+        self.cancel_token.cancel()
+
+    def _produce(self, events: Iterable[StreamEvent]) -> None:
+        key = -1
+        final = False
+        try:
+            for event in events:
+                key = event_index(event, key)
+                self._append(key, event)
+                if event.is_final:
+                    final = True
+                    break
+        except Exception as e:
+            self._append(key, StreamEvent(chunks=[], is_final=True, error=str(e)))
+            final = True
+        finally:
+            if not final:
+                # The stream ended without a final event; close it for
+                # subscribers so they do not wait forever.
+                self._append(key, StreamEvent(chunks=[], is_final=True))
+            with self._cond:
+                self.finished_at = time.time()
+                self._cond.notify_all()
+
+    def _append(self, key: int, event: StreamEvent) -> None:
+        with self._cond:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._dropped_key = self._buffer[0][0]
+            self._buffer.append((key, event))
+            self._count += 1
+            self._cond.notify_all()
+
+    def _start_position(self, after_index: Optional[int]) -> Optional[int]:
+        """Absolute position to replay from, or None if events were lost."""
+        if self._dropped_key is not None and (after_index is None or self._dropped_key > after_index):
+            return None
+        position = self._count - len(self._buffer)
+        if after_index is None:
+            return position
+        for key, event in self._buffer:
+            if key > after_index or (key == after_index and not event.chunks):
+                break
+            position += 1
+        return position
+
+    def subscribe(
+        self, after_index: Optional[int] = None, heartbeat: Optional[float] = None
+    ) -> Iterator[Optional[Tuple[int, StreamEvent]]]:
+        """Yield `(index, event)` pairs from the buffer, then live, to the end.
+
+        Args:
+            after_index: Last chunk index the subscriber already has; None
+                starts from the beginning of the stream. Events without
+                chunks at exactly that index are delivered again, since the
+                subscriber cannot tell them apart by index.
+            heartbeat: If set, yield None after this many idle seconds so
+                the caller can keep its connection alive (and notice a
+                disconnected client).
+
+        If the requested events are no longer buffered, a single final
+        error event is yielded instead; the caller should fall back to the
+        stored conversation.
+        """
+        with self._cond:
+            position = self._start_position(after_index)
+            self._subscribers += 1
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+        last_key = after_index if after_index is not None else -1
+        try:
+            if position is None:
+                yield last_key, StreamEvent(
+                    chunks=[], is_final=True, error="Stream can no longer be resumed."
+                )
+                return
+            while True:
+                with self._cond:
+                    while position >= self._count and not self.done:
+                        if not self._cond.wait(heartbeat):
+                            break
+                    missed = position < self._count - len(self._buffer)
+                    # Newest entries are at the right end, where deque
+                    # indexing is cheap.
+                    pending: List[Tuple[int, StreamEvent]] = [] if missed else [
+                        self._buffer[i] for i in range(position - self._count, 0)
+                    ]
+                    finished = self.done
+                if missed:
+                    # This subscriber fell more than `buffer_size` events behind.
+                    yield last_key, StreamEvent(
+                        chunks=[], is_final=True, error="Subscriber fell too far behind the stream."
+                    )
+                    return
+                if not pending:
+                    if finished:
+                        return
+                    yield None
+                    continue
+                position += len(pending)
+                for item in pending:
+                    last_key = item[0]
+                    yield item
+                    if item[1].is_final:
+                        return
+        finally:
+            self._leave()
+
+    def _leave(self) -> None:
+        with self._cond:
+            self._subscribers -= 1
+            if self._subscribers or self.done or self.idle_timeout is None:
+                return
+            self._idle_timer = threading.Timer(self.idle_timeout, self._cancel_if_idle)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    def _cancel_if_idle(self) -> None:
+        with self._cond:
+            idle = not self._subscribers and not self.done
+        if idle:
+            self.cancel()
+
+
+class BroadcastRegistry:
+    """Thread-safe lookup of broadcasts by stream id.
+
+    Finished broadcasts stay resumable for `retain_seconds`, so a client
+    that reconnects just after the end still gets the tail of its stream.
+    """
+
+    def __init__(self, retain_seconds: float = 60.0):
+        self.retain_seconds = retain_seconds
+        self._broadcasts: Dict[str, StreamBroadcast] = {}
+        self._lock = threading.Lock()
+
+    def add(self, broadcast: StreamBroadcast) -> StreamBroadcast:
+        """Register `broadcast` under its stream id and return it."""
+        with self._lock:
+            self._prune()
+            self._broadcasts[broadcast.stream_id] = broadcast
+        return broadcast
+
+    def get(self, stream_id: str) -> Optional[StreamBroadcast]:
+        """Return the broadcast for `stream_id`, or None if unknown or expired."""
+        with self._lock:
+            self._prune()
+            return self._broadcasts.get(stream_id)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retain_seconds
+        expired = [
+            sid
+            for sid, b in self._broadcasts.items()
+            if b.finished_at is not None and b.finished_at < cutoff
+        ]
+        for sid in expired:
+            del self._broadcasts[sid]
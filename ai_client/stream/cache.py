@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from schemas import StreamEvent, Message
+from .cancel import CancelToken
+from .interface import StreamerClass
+from .impl import _to_api_messages
+from .recording import (
+    RECORDING_SUFFIX,
+    read_recording,
+    record_events,
+    replay_entries,
+    write_header,
+)
+
+
+def request_key(messages: List[Message], params: Optional[Dict[str, Any]] = None) -> str:
+    """Return a stable hash of a request.
+
+    Only what the API sees is hashed: the normalized `role`/`content` message
+    list plus the model parameters. Store-side metadata such as message ids
+    and revisions does not affect the key.
+    """
+    payload = {"messages": _to_api_messages(messages), "params": params or {}}
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class CachingStreamer(StreamerClass):
+    """Caching decorator around any `StreamerClass`.
+
+    Completed streams are stored on disk as recordings (see
+    `ai_client.stream.recording`) under a key derived from the request. A
+    repeated request replays the stored events without touching the
+    network, either instantly or at the original pace scaled by
+    `replay_speed`. Streams that end in an error, or that the consumer
+    abandons or cancels, are not cached.
+
+    Entries expire after `ttl_seconds`; when more than `max_entries` are
+    stored, the least recently used ones are evicted.
+    """
+
+    def __init__(
+        self,
+        inner: StreamerClass,
+        cache_dir: str = ".stream_cache",
+        params: Optional[Dict[str, Any]] = None,
+        max_entries: int = 512,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        replay_speed: Optional[float] = None,
+    ):
+        """Wrap `inner` with an on-disk response cache.
+
+        Args:
+            inner: Streamer that serves cache misses.
+            cache_dir: Directory holding cached streams.
+            params: Model parameters included in the cache key. Defaults to
+                `inner.request_params()` when the inner streamer has it.
+            max_entries: Maximum number of cached streams (LRU eviction).
+            ttl_seconds: Age after which an entry is ignored and removed;
+                None keeps entries until evicted.
+            replay_speed: None replays hits instantly; 1.0 reproduces the
+                original timing, 2.0 replays twice as fast, and so on.
+        """
+        self.inner = inner
+        self.cache_dir = cache_dir
+        if params is None and hasattr(inner, "request_params"):
+            params = inner.request_params()
+        self.params = params or {}
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.replay_speed = replay_speed
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def request_params(self) -> Dict[str, Any]:
+        """Return the model parameters of the wrapped streamer."""
+        return dict(self.params)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + RECORDING_SUFFIX)
+
+    def stream_response(
+        self, messages: List[Message], cancel: Optional[CancelToken] = None
+    ) -> Iterator[StreamEvent]:
+        """Yield cached events for a known request, else stream and record."""
+        path = self._path(request_key(messages, self.params))
+
+        entries = self._load(path)
+        if entries is not None:
+            # Touch the entry so eviction treats it as recently used.
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            yield from replay_entries(entries, self.replay_speed, cancel)
+            return
+
+        yield from self._record(messages, path, cancel)
+
+    def _load(self, path: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the stored `{"t", "event"}` entries, or None on a miss."""
+        try:
+            header, entries = read_recording(path)
+        except (OSError, ValueError):
+            return None
+        if (
+            self.ttl_seconds is not None
+            and time.time() - header.get("created", 0) > self.ttl_seconds
+        ):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entries
+
+    def _record(
+        self, messages: List[Message], path: str, cancel: Optional[CancelToken]
+    ) -> Iterator[StreamEvent]:
+        """Stream from the inner streamer, committing the entry on success.
+
+        The entry is committed when a successful final event has been
+        written, before that event is yielded: consumers usually stop
+        iterating at the final event and never resume the generator.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        committed = False
+        fh = os.fdopen(fd, "w", encoding="utf-8")
+        try:
+            write_header(fh)
+            for ev in record_events(self.inner.stream_response(messages, cancel), fh):
+                if ev.is_final:
+                    fh.close()
+                    if not ev.error and not ev.cancelled:
+                        os.replace(tmp_path, path)
+                        committed = True
+                        self._evict()
+                yield ev
+        finally:
+            fh.close()
+            if not committed:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def _evict(self) -> None:
+        """Remove least recently used entries beyond `max_entries`."""
+        try:
+            names = [n for n in os.listdir(self.cache_dir) if n.endswith(RECORDING_SUFFIX)]
+        except OSError:
+            return
+        if len(names) <= self.max_entries:
+            return
+
+        def mtime(name: str) -> float:
+            try:
+                return os.path.getmtime(os.path.join(self.cache_dir, name))
+            except OSError:
+                return 0.0
+
+        names.sort(key=mtime)
+        for name in names[: len(names) - self.max_entries]:
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
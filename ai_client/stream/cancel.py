@@ -0,0 +1,70 @@
+import threading
+from typing import Callable, List, Optional
+
+
+class CancelToken:
+    """Thread-safe cancellation signal for an in-flight stream.
+
+    The consumer of a stream (e.g. a Socket.IO handler) creates a token and
+    passes it to `stream_response`; any thread may then call `cancel()`.
+    Streamers register callbacks with `on_cancel` to close the upstream
+    HTTP response as soon as cancellation is requested, instead of reading
+    the reply to the end.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        """True once `cancel()` has been called."""
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Request cancellation and run registered callbacks (once)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for cb in callbacks:
+            try:
+                cb()
+            except Exception:
+                # A failing close must not prevent the other callbacks.
+                pass
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Register `callback` to run on cancellation.
+
+        Runs it immediately if the token is already cancelled. Returns a
+        function that unregisters the callback, to be called once the
+        resource it closes is released.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                registered = True
+            else:
+                registered = False
+        if not registered:
+            callback()
+            return lambda: None
+
+        def unregister() -> None:
+            with self._lock:
+                try:
+                    self._callbacks.remove(callback)
+                except ValueError:
+                    pass
+
+        return unregister
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until cancelled or `timeout` elapses; return `cancelled`.
+
+        Useful as an interruptible sleep in paced streams.
+        """
+        return self._event.wait(timeout)
@@ -0,0 +1,222 @@
+import asyncio
+import queue
+import threading
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, List, Optional
+
+from schemas import StreamEvent, StreamChunk, construct
+from .broadcast import _spawn_thread
+
+
+class _Coalescer:
+    """Batching state shared by `coalesce_events` and its async twin.
+
+    Adjacent non-final events are merged into one StreamEvent carrying all
+    of their chunks. A batch is released once it has been open for
+    `window_ms` or holds `max_bytes` of text/thinking, and the first chunk
+    of each kind (thinking, text) is always released immediately so
+    time-to-first-token is unaffected. Callers wait for the next event at
+    most `time_left()` and `flush()` when it elapses, so a pause upstream
+    does not hold back a batch.
+    """
+
+    def __init__(self, window_ms: float, max_bytes: int):
+        self.window = window_ms / 1000.0
+        self.max_bytes = max_bytes
+
+        self.pending: List[StreamChunk] = []
+        self.pending_bytes = 0
+        self.batch_start = 0.0
+
+        self.seen_thinking = False
+        self.seen_text = False
+
+    def push(self, event: StreamEvent) -> List[StreamEvent]:
+        """Add an event and return whatever is ready to be emitted."""
+        # Final, error and empty events are never merged; release the
+        # pending batch first so ordering is preserved.
+        if event.is_final or event.error or not event.chunks:
+            out = self.flush()
+            out.append(event)
+            return out
+
+        out: List[StreamEvent] = []
+        now = time.monotonic()
+
+        # A batch that outlived its window (the caller was slow to flush)
+        # is released before starting a new one.
+        if self.pending and now - self.batch_start >= self.window:
+            out.extend(self.flush())
+
+        if not self.pending:
+            self.batch_start = now
+
+        urgent = False
+        for c in event.chunks:
+            if c.thinking:
+                self.pending_bytes += len(c.thinking.encode("utf-8"))
+                if not self.seen_thinking:
+                    self.seen_thinking = True
+                    urgent = True
+            if c.text:
+                self.pending_bytes += len(c.text.encode("utf-8"))
+                if not self.seen_text:
+                    self.seen_text = True
+                    urgent = True
+        self.pending.extend(event.chunks)
+
+        if urgent or self.pending_bytes >= self.max_bytes:
+            out.extend(self.flush())
+        return out
+
+    def time_left(self) -> Optional[float]:
+        """Seconds until the pending batch is due, or None if there is none."""
+        if not self.pending:
+            return None
+        return max(0.0, self.batch_start + self.window - time.monotonic())
+
+    def flush(self) -> List[StreamEvent]:
+        """Release the pending batch, if any, as a single event."""
+        if not self.pending:
+            return []
+        ev = construct(
+            StreamEvent, chunks=self.pending, event_id=None, is_final=False, error=None
+        )
+        self.pending = []
+        self.pending_bytes = 0
+        return [ev]
+
+
+class _Raised:
+    """An exception raised by the upstream iterator, passed to the consumer."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+# Marks the end of the upstream iterator in the queue.
+_END = object()
+
+
+def _pump(events: Iterable[StreamEvent], out: "queue.Queue[Any]", stop: threading.Event) -> None:
+    """Read `events` into `out` until they end or `stop` is set."""
+    iterator = iter(events)
+    try:
+        for event in iterator:
+            out.put(event)
+            if stop.is_set():
+                break
+    except Exception as e:
+        out.put(_Raised(e))
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+        out.put(_END)
+
+
+def coalesce_events(
+    events: Iterable[StreamEvent],
+    window_ms: float = 30.0,
+    max_bytes: int = 4096,
+    spawn: Optional[Callable[[Callable[[], None]], Any]] = None,
+    max_queued: int = 64,
+) -> Iterator[StreamEvent]:
+    """Merge adjacent streaming events into fewer, larger events.
+
+    Sits between `Streamer.stream_response` and an emitter so a thinking
+    model's thousands of single-token deltas become a few frames per
+    `window_ms`. Chunks are kept intact (including their `index`), only
+    regrouped. A non-positive `window_ms` disables batching.
+
+    `events` is read on a background thread, so a batch is released when
+    its window closes even while the upstream pauses (e.g. a thinking
+    model between phases). The reader stays at most `max_queued` events
+    ahead of the consumer, so a slow consumer holds back the upstream
+    rather than buffering it in memory. If the consumer stops early, the
+    upstream iterator is closed after its next event; cancel it through
+    its `CancelToken` to stop it sooner.
+
+    Args:
+        events: Iterable of StreamEvent objects.
+        window_ms: Maximum age of a batch before it is released.
+        max_bytes: Release a batch once its text/thinking reaches this
+            many UTF-8 bytes.
+        spawn: Starts the reader, e.g. Flask-SocketIO's
+            `start_background_task`. Defaults to a daemon thread.
+        max_queued: Events the reader may read ahead of the consumer.
+    """
+    if window_ms <= 0:
+        yield from events
+        return
+
+    coalescer = _Coalescer(window_ms, max_bytes)
+    # The reader puts at most two more items once `stop` is set (the event
+    # it was blocked on and _END), so draining once in `finally` always
+    # lets it finish.
+    pipe: "queue.Queue[Any]" = queue.Queue(maxsize=max(2, max_queued))
+    stop = threading.Event()
+    (spawn or _spawn_thread)(lambda: _pump(events, pipe, stop))
+    try:
+        while True:
+            try:
+                item = pipe.get(timeout=coalescer.time_left())
+            except queue.Empty:
+                yield from coalescer.flush()
+                continue
+            if item is _END:
+                break
+            if isinstance(item, _Raised):
+                raise item.error
+            yield from coalescer.push(item)
+        yield from coalescer.flush()
+    finally:
+        stop.set()
+        _drain(pipe)
+
+
+def _drain(pipe: "queue.Queue[Any]") -> None:
+    """Empty `pipe` so a reader blocked on a full queue can finish."""
+    while True:
+        try:
+            pipe.get_nowait()
+        except queue.Empty:
+            return
+
+
+async def coalesce_events_async(
+    events: AsyncIterable[StreamEvent], window_ms: float = 30.0, max_bytes: int = 4096
+) -> AsyncIterator[StreamEvent]:
+    """Async counterpart of `coalesce_events` for `AsyncStreamer` output."""
+    if window_ms <= 0:
+        async for event in events:
+            yield event
+        return
+
+    coalescer = _Coalescer(window_ms, max_bytes)
+    iterator = events.__aiter__()
+    pending: Optional["asyncio.Future[StreamEvent]"] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            # Wait on the task rather than with `wait_for`, which would
+            # cancel the upstream read when the window closes.
+            done, _ = await asyncio.wait({pending}, timeout=coalescer.time_left())
+            if not done:
+                for out in coalescer.flush():
+                    yield out
+                continue
+            try:
+                event = pending.result()
+            except StopAsyncIteration:
+                pending = None
+                break
+            pending = None
+            for out in coalescer.push(event):
+                yield out
+        for out in coalescer.flush():
+            yield out
+    finally:
+        if pending is not None:
+            pending.cancel()
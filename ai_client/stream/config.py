@@ -0,0 +1,69 @@
+from typing import Any, Dict, Optional
+from pydantic import BaseModel, Field
+
+
+class StreamerConfig(BaseModel):
+    """Connection and model settings a `Streamer` is built from.
+
+    Each streamer owns one HTTP connection pool sized by these limits, so
+    TLS connections are reused across requests and several differently
+    tuned streamers (e.g. a primary and a fallback endpoint) can coexist in
+    one process.
+    """
+
+    base_url: str = Field("https://api.moonshot.ai/v1", description="API base URL")
+    api_key: Optional[str] = Field(
+        None,
+        description="API key. If None, MOONSHOT_API_KEY is read from the environment.",
+    )
+    model: str = Field("kimi-k2-thinking", description="Model name")
+    max_tokens: int = Field(1024 * 32, description="Maximum tokens in the reply")
+    temperature: float = Field(1.0, description="Sampling temperature")
+
+    max_connections: int = Field(
+        100, description="Maximum open connections in the pool (size to expected concurrency)"
+    )
+    max_keepalive_connections: int = Field(
+        20, description="Idle connections kept alive for reuse"
+    )
+    keepalive_expiry: float = Field(
+        30.0, description="Seconds an idle keep-alive connection is retained"
+    )
+    connect_timeout: float = Field(10.0, description="Seconds to establish a connection")
+    read_timeout: float = Field(
+        120.0,
+        description=(
+            "Seconds to wait for each read. Thinking models can pause between "
+            "deltas, so keep this generous."
+        ),
+    )
+    write_timeout: float = Field(30.0, description="Seconds to send the request body")
+    pool_timeout: float = Field(10.0, description="Seconds to wait for a free pooled connection")
+    http2: bool = Field(
+        False, description="Use HTTP/2 (requires the `h2` package, e.g. `pip install httpx[http2]`)"
+    )
+    request_deadline: Optional[float] = Field(
+        None,
+        description=(
+            "Wall-clock limit in seconds for a whole streamed request, from "
+            "connecting to the last chunk. The stream is closed and an error event "
+            "yielded when it is exceeded. SDK retries are disabled when it is set."
+        ),
+    )
+    max_retries: int = Field(2, description="Retries performed by the SDK before streaming starts")
+    include_delta: bool = Field(
+        False,
+        description=(
+            "Attach the raw SDK delta to each StreamChunk. Off by default: it is "
+            "rarely needed and copying it on every token costs allocations and "
+            "frame size."
+        ),
+    )
+
+    def request_params(self) -> Dict[str, Any]:
+        """Return the model parameters sent with every request."""
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+        }
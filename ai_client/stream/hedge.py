@@ -0,0 +1,225 @@
+"""Hedged requests: race a duplicate against a slow first token.
+
+Most upstream requests produce their first delta quickly, but a few sit
+for many seconds (a cold replica, a queue in front of the model), and
+those dominate tail latency. `HedgedStreamer` starts the request as usual
+and, if nothing has arrived after a delay, fires a duplicate, optionally
+to another endpoint or model. Whichever stream produces a token (text or
+thinking) first is delivered; the other is cancelled. Role-only and empty
+deltas do not count: a backend that sends one at once and then stalls
+would otherwise win every race.
+"""
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from schemas import StreamEvent, Message
+from .cancel import CancelToken
+from .interface import StreamerClass
+from .impl import _error_event
+from .metrics import LATENCY_BUCKETS, Histogram, MetricsRegistry, default_registry, instrument
+
+
+def _decides_race(event: StreamEvent) -> bool:
+    """True for the first event worth racing on: a token, an error or the end."""
+    if event.is_final or event.error:
+        return True
+    return any(c.text or c.thinking for c in event.chunks)
+
+
+class _Attempt:
+    """One of the racing requests and the thread fetching its first token."""
+
+    def __init__(self, streamer: StreamerClass, messages: List[Message], hedge: bool):
+        self.hedge = hedge
+        self.cancel = CancelToken()
+        self.events = iter(streamer.stream_response(messages, self.cancel))
+        self.lock = threading.Lock()
+        # `ready`: the first token was fetched and the iterator handed over;
+        # `abandoned`: the race was lost and the iterator must be closed.
+        self.ready = False
+        self.abandoned = False
+
+    def start(self, results: "queue.Queue[Tuple[_Attempt, List[StreamEvent]]]") -> None:
+        threading.Thread(target=self._fetch_first, args=(results,), daemon=True).start()
+
+    def _fetch_first(self, results: "queue.Queue[Tuple[_Attempt, List[StreamEvent]]]") -> None:
+        # Events up to and including the one that decides the race.
+        head: List[StreamEvent] = []
+        try:
+            while not head or not _decides_race(head[-1]):
+                head.append(next(self.events))
+        except StopIteration:
+            head.append(StreamEvent(chunks=[], event_id=None, is_final=True, error=None))
+        except Exception as e:
+            head.append(_error_event(e))
+        with self.lock:
+            if not self.abandoned:
+                self.ready = True
+                results.put((self, head))
+                return
+        self._close()
+
+    def abandon(self) -> None:
+        """Cancel the request and release it once no thread is reading it."""
+        self.cancel.cancel()
+        with self.lock:
+            self.abandoned = True
+            owned = self.ready
+        if owned:
+            self._close()
+
+    def _close(self) -> None:
+        close = getattr(self.events, "close", None)
+        if close is not None:
+            close()
+
+
+class HedgedStreamer(StreamerClass):
+    """Decorator that hedges slow requests with a duplicate.
+
+    The hedge delay is either fixed or learned: by default it is the
+    `quantile` of recently observed times to first token, so roughly that
+    share of requests never hedges and the extra upstream load stays
+    bounded. At most one duplicate is sent per stream.
+
+    Two counters in the metrics registry report the cost and the benefit:
+    `chat_stream_hedges_total` (duplicates sent) and
+    `chat_stream_hedge_wins_total` (duplicates that produced a token first).
+    """
+
+    def __init__(
+        self,
+        primary: StreamerClass,
+        hedge: Optional[StreamerClass] = None,
+        hedge_delay: Optional[float] = None,
+        quantile: float = 0.95,
+        initial_delay: float = 2.0,
+        min_delay: float = 0.1,
+        min_samples: int = 20,
+        metrics: Optional[MetricsRegistry] = default_registry,
+    ):
+        """Wrap `primary`, hedging slow requests to `hedge`.
+
+        Args:
+            primary: Streamer every request starts on.
+            hedge: Streamer the duplicate goes to, e.g. a `Streamer` for a
+                secondary endpoint or a faster model. Defaults to `primary`.
+            hedge_delay: Fixed seconds without a token before hedging.
+                None learns the delay from observed times to first token.
+            quantile: Quantile of the observed times used as the learned
+                delay.
+            initial_delay: Delay used until `min_samples` streams have been
+                observed.
+            min_delay: Lower bound of the learned delay.
+            min_samples: Observations needed before the learned delay is
+                used.
+            metrics: Registry for the hedge counters.
+        """
+        self.primary = primary
+        self.hedge = hedge if hedge is not None else primary
+        self.hedge_delay = hedge_delay
+        self.quantile = quantile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.metrics = metrics
+        # Kept per instance: the delay should follow this upstream only.
+        self._first_event = Histogram(
+            "chat_stream_first_event_seconds", "Time to the first token.", LATENCY_BUCKETS
+        )
+        if metrics is not None:
+            self._hedges = metrics.counter(
+                "chat_stream_hedges_total", "Duplicate requests sent for slow streams."
+            )
+            self._wins = metrics.counter(
+                "chat_stream_hedge_wins_total", "Duplicate requests that produced a token first."
+            )
+
+    def request_params(self) -> Dict[str, Any]:
+        """Return the primary streamer's model parameters."""
+        if hasattr(self.primary, "request_params"):
+            return self.primary.request_params()
+        return {}
+
+    def current_delay(self) -> float:
+        """Seconds to wait for a first token before sending the duplicate."""
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        if self._first_event.count < self.min_samples:
+            return self.initial_delay
+        return max(self.min_delay, self._first_event.quantile(self.quantile) or 0.0)
+
+    def stream_response(
+        self, messages: List[Message], cancel: Optional[CancelToken] = None
+    ) -> Iterator[StreamEvent]:
+        """Yield the stream that produces a token first.
+
+        The final event's `StreamMetrics` are measured from the original
+        request, so they include the hedge delay when the duplicate won.
+        """
+        return instrument(self._stream(messages, cancel), None)
+
+    def _stream(
+        self, messages: List[Message], cancel: Optional[CancelToken]
+    ) -> Iterator[StreamEvent]:
+        """Uninstrumented body of `stream_response`."""
+        start = time.monotonic()
+        results: "queue.Queue[Tuple[_Attempt, List[StreamEvent]]]" = queue.Queue()
+        attempts = [_Attempt(self.primary, messages, hedge=False)]
+        attempts[0].start(results)
+
+        def cancel_all() -> None:
+            for attempt in attempts:
+                attempt.cancel.cancel()
+
+        unregister = cancel.on_cancel(cancel_all) if cancel is not None else None
+        winner: Optional[_Attempt] = None
+        try:
+            delay: Optional[float] = self.current_delay()
+            racing = 1
+            while True:
+                try:
+                    attempt, head = results.get(timeout=delay)
+                except queue.Empty:
+                    hedge = _Attempt(self.hedge, messages, hedge=True)
+                    attempts.append(hedge)
+                    if cancel is not None and cancel.cancelled:
+                        hedge.cancel.cancel()
+                    hedge.start(results)
+                    if self.metrics is not None:
+                        self._hedges.inc()
+                    delay = None
+                    racing += 1
+                    continue
+                racing -= 1
+                first = head[-1]
+                if first.error and not first.cancelled and racing:
+                    # Failed outright while the other request may still
+                    # succeed; let that one answer.
+                    attempt.abandon()
+                    continue
+                winner = attempt
+                break
+
+            for attempt in attempts:
+                if attempt is not winner:
+                    attempt.abandon()
+            if winner.hedge and self.metrics is not None:
+                self._wins.inc()
+            if not first.error:
+                self._first_event.observe(time.monotonic() - start)
+
+            yield from head
+            if not first.is_final:
+                yield from winner.events
+        finally:
+            if unregister is not None:
+                unregister()
+            for attempt in attempts:
+                if attempt is winner:
+                    # Closed here if the consumer stopped before reading on.
+                    attempt._close()
+                else:
+                    attempt.abandon()
@@ -1,134 +1,569 @@
+import asyncio
 import os
-from typing import List, Iterator
-from dotenv import find_dotenv, load_dotenv
-import openai
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Iterator, Optional
 
-from schemas import StreamEvent, StreamChunk, Message
-from .interface import StreamerClass
+from schemas import StreamEvent, StreamChunk, Message, construct
+from .cancel import CancelToken
+from .config import StreamerConfig
+from .interface import StreamerClass, AsyncStreamerClass
+from .metrics import MetricsRegistry, default_registry, instrument, instrument_async
 
+# The OpenAI SDK, httpx and python-dotenv are imported on first use rather
+# than at import time: importing `ai_client` should not pay for the SDK
+# import, a .env directory walk or client construction.
+if TYPE_CHECKING:
+    import httpx
+    import openai
 
-_env_path = find_dotenv()
-if _env_path:
-    load_dotenv(_env_path)
 
-# Read Moonshot API key from environment
-_MOONSHOT_API_KEY = os.getenv("MOONSHOT_API_KEY")
+_env_lock = threading.Lock()
+_env_loaded = False
 
-# Create an OpenAI client configured for Moonshot (keeps the public API stable)
-_client = openai.Client(
-    base_url="https://api.moonshot.ai/v1",
-    api_key=_MOONSHOT_API_KEY,
-)
+
+def _load_env() -> None:
+    """Load the nearest .env file into the environment, once per process."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if _env_loaded:
+            return
+        from dotenv import find_dotenv, load_dotenv
+
+        env_path = find_dotenv()
+        if env_path:
+            load_dotenv(env_path)
+        _env_loaded = True
+
+
+def _to_api_messages(messages: List[Message]) -> List[Dict[str, Any]]:
+    """Convert `Message` objects to the API message format.
+
+    Supports both `Message` instances and plain dicts for convenience.
+    """
+    api_messages = []
+    for m in messages:
+        try:
+            # pydantic model: has 'role' and 'text'
+            r = getattr(m, "role")
+            t = getattr(m, "text")
+            api_message = {"role": r, "content": t}
+            if getattr(m, "partial", False):
+                api_message["partial"] = True
+            api_messages.append(api_message)
+        except Exception:
+            # Fallback for plain dicts passed in mistakenly
+            if isinstance(m, dict):
+                # prefer 'content' if present, otherwise 'text'
+                content = m.get("content", m.get("text"))
+                api_messages.append({"role": m.get("role"), "content": content})
+            else:
+                # Skip unknown entries
+                continue
+    return api_messages
+
+
+# HTTP statuses worth repeating a request for: timeouts, conflicts, rate
+# limits and server-side failures.
+RETRYABLE_STATUS = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Return whether `error` is a transient failure worth retrying.
+
+    Connection errors and timeouts (from the SDK, httpx or the standard
+    library) and HTTP statuses in `RETRYABLE_STATUS` or >= 500 are
+    transient; authentication, validation and other client errors are not.
+    The SDK and httpx are only consulted if already imported.
+    """
+    openai = sys.modules.get("openai")
+    if openai is not None:
+        if isinstance(error, openai.APIConnectionError):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    httpx = sys.modules.get("httpx")
+    if httpx is not None and isinstance(error, httpx.TransportError):
+        return True
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+def _error_event(error: BaseException) -> StreamEvent:
+    """Final error event for an exception raised while streaming."""
+    return StreamEvent(
+        chunks=[],
+        event_id=None,
+        is_final=True,
+        error=str(error),
+        retryable=is_retryable(error),
+    )
+
+
+def _resolve_api_key(config: StreamerConfig) -> Optional[str]:
+    """Return the configured API key, falling back to MOONSHOT_API_KEY."""
+    if config.api_key:
+        return config.api_key
+    _load_env()
+    return os.getenv("MOONSHOT_API_KEY")
+
+
+def _http_kwargs(config: StreamerConfig) -> Dict[str, Any]:
+    """httpx client settings (pool limits, timeouts, HTTP/2) from a config."""
+    import httpx
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+        "timeout": httpx.Timeout(
+            connect=config.connect_timeout,
+            read=config.read_timeout,
+            write=config.write_timeout,
+            pool=config.pool_timeout,
+        ),
+        "http2": config.http2,
+        "follow_redirects": True,
+    }
+
+
+def _build_client(config: StreamerConfig, api_key: str) -> "openai.Client":
+    """Construct a pooled sync OpenAI client for `config`."""
+    import httpx
+    import openai
+
+    return openai.Client(
+        base_url=config.base_url,
+        api_key=api_key,
+        max_retries=config.max_retries,
+        http_client=httpx.Client(**_http_kwargs(config)),
+    )
+
+
+def _build_async_client(config: StreamerConfig, api_key: str) -> "openai.AsyncClient":
+    """Construct a pooled async OpenAI client for `config`."""
+    import httpx
+    import openai
+
+    return openai.AsyncClient(
+        base_url=config.base_url,
+        api_key=api_key,
+        max_retries=config.max_retries,
+        http_client=httpx.AsyncClient(**_http_kwargs(config)),
+    )
+
+
+def _within_deadline(client: Any, config: StreamerConfig, deadline: Optional[float]) -> Any:
+    """Return `client` with its timeouts capped by the time left until `deadline`.
+
+    Without this, opening the stream (connect, time to first byte) is only
+    bounded by the configured timeouts. SDK retries are disabled too: each
+    would get the whole remaining budget again.
+    """
+    if deadline is None:
+        return client
+    import httpx
+
+    remaining = max(0.0, deadline - time.monotonic())
+    timeout = httpx.Timeout(
+        connect=min(config.connect_timeout, remaining),
+        read=min(config.read_timeout, remaining),
+        write=min(config.write_timeout, remaining),
+        pool=min(config.pool_timeout, remaining),
+    )
+    return client.with_options(timeout=timeout, max_retries=0)
+
+
+def _past(deadline: Optional[float]) -> bool:
+    """True once the monotonic `deadline` (if any) has passed."""
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def _create_kwargs(config: StreamerConfig, api_messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Chat Completions request parameters shared by the sync and async paths."""
+    return dict(config.request_params(), messages=api_messages, stream=True)
+
+
+def _event_from_chunk(
+    chunk: Any, index: int, role: str, include_delta: bool = False
+) -> Optional[StreamEvent]:
+    """Build a StreamEvent from one upstream chunk, or None if it has no choices.
+
+    Runs once per token, so the models are built without validation and the
+    raw SDK delta is only captured when `include_delta` is set.
+    """
+    # Each chunk may contain one or more deltas; the client library
+    # shapes these objects differently, so we defensively probe fields.
+    if not chunk.choices:
+        return None
+
+    choice = chunk.choices[0]
+    delta_obj = getattr(choice, "delta", None)
+
+    thinking_text = None
+    text = None
+    raw_delta = None
+
+    if delta_obj is not None:
+        # Try common attributes used in streaming payloads.
+        thinking_text = getattr(delta_obj, "reasoning_content", None)
+        text = getattr(delta_obj, "content", None)
+        # Best-effort raw delta capture (may be an object)
+        if include_delta:
+            try:
+                raw_delta = dict(delta_obj.__dict__)
+            except Exception:
+                raw_delta = None
+
+    sc = construct(
+        StreamChunk, text=text, index=index, delta=raw_delta, role=role, thinking=thinking_text
+    )
+    return construct(StreamEvent, chunks=[sc], event_id=None, is_final=False, error=None)
+
+
+def _missing_key_event() -> StreamEvent:
+    """Final error event used when no API key is configured."""
+    return StreamEvent(
+        chunks=[],
+        event_id=None,
+        is_final=True,
+        error="Moonshot API key is not configured. Set MOONSHOT_API_KEY in your environment.",
+    )
+
+
+def _cancelled_event() -> StreamEvent:
+    """Final event used when the consumer cancelled the stream."""
+    return StreamEvent(chunks=[], event_id=None, is_final=True, error=None, cancelled=True)
+
+
+def _deadline_event(config: StreamerConfig) -> StreamEvent:
+    """Final error event used when `request_deadline` is exceeded."""
+    return StreamEvent(
+        chunks=[],
+        event_id=None,
+        is_final=True,
+        error=f"Request deadline of {config.request_deadline}s exceeded.",
+    )
 
 
 class Streamer(StreamerClass):
     """Moonshot AI streaming implementation.
 
-    Stateless streamer that calls the Moonshot API and yields StreamEvent objects
-    as they arrive.
+    Calls the Moonshot API and yields StreamEvent objects as they arrive.
+    Each instance is built from a `StreamerConfig` and owns a pooled HTTP
+    client, so connections are reused across requests; share one instance
+    per endpoint rather than creating one per request. The client (and the
+    SDK import) is created on the first `stream_response` call, so
+    constructing a streamer is cheap.
     """
-    
-    @staticmethod
-    def stream_response(messages: List[Message]) -> Iterator[StreamEvent]:
+
+    def __init__(
+        self,
+        config: Optional[StreamerConfig] = None,
+        metrics: Optional[MetricsRegistry] = default_registry,
+    ):
+        """Create a streamer; its connection pool is built on first use.
+
+        Args:
+            config: Connection and model settings. Defaults to
+                `StreamerConfig()` (Moonshot, `kimi-k2-thinking`).
+            metrics: Registry that every stream's timings are recorded in.
+                None still attaches metrics to final events but records
+                nothing globally.
+        """
+        self.config = config or StreamerConfig()
+        self.metrics = metrics
+        self._client: Optional["openai.Client"] = None
+        self._client_lock = threading.Lock()
+
+    def _get_client(self) -> Optional["openai.Client"]:
+        """Return the pooled client, creating it on first call.
+
+        Returns None when no API key is configured; without a key there is
+        nothing to connect to and stream_response reports the problem.
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    api_key = _resolve_api_key(self.config)
+                    if not api_key:
+                        return None
+                    self._client = _build_client(self.config, api_key)
+        return self._client
+
+    def request_params(self) -> Dict[str, Any]:
+        """Return the model parameters (model, max_tokens, ...) sent upstream.
+
+        Wrappers such as `CachingStreamer` include these in request keys so
+        a parameter change never serves a stale response.
+        """
+        return self.config.request_params()
+
+    def stream_response(
+        self, messages: List[Message], cancel: Optional[CancelToken] = None
+    ) -> Iterator[StreamEvent]:
         """Call the Chat Completions API and yield StreamEvent objects
         representing the streaming output as they arrive.
 
         Accepts a list of `Message` objects (conversation history). These are
         converted to the underlying API format (dicts with `role` and
         `content`) before sending.
+
+        Cancelling `cancel` (from any thread) closes the upstream HTTP
+        response right away; the stream then ends with a `cancelled` final
+        event, at the latest when the pending read returns. The response is
+        also closed if the consumer stops iterating early.
+
+        The final event carries `StreamMetrics` (time to first thinking and
+        visible token, inter-token gaps, throughput, duration).
         """
+        return instrument(self._stream(messages, cancel), self.metrics)
+
+    def _stream(
+        self, messages: List[Message], cancel: Optional[CancelToken]
+    ) -> Iterator[StreamEvent]:
+        """Uninstrumented body of `stream_response`."""
         # Streaming responses here are the assistant's output, so default to
         # 'assistant' for chunk role metadata unless the API provides one.
         role = "assistant"
 
-        # Convert provided `Message` objects to the API message format. Support
-        # both `Message` instances and plain dicts for convenience.
-        api_messages = []
-        for m in messages:
-            try:
-                # pydantic model: has 'role' and 'text'
-                r = getattr(m, "role")
-                t = getattr(m, "text")
-                api_messages.append({"role": r, "content": t})
-            except Exception:
-                # Fallback for plain dicts passed in mistakenly
-                if isinstance(m, dict):
-                    # prefer 'content' if present, otherwise 'text'
-                    content = m.get("content", m.get("text"))
-                    api_messages.append({"role": m.get("role"), "content": content})
-                else:
-                    # Skip unknown entries
-                    continue
-
-        # If no API key is configured, do not call the remote API.
-        # Yield a clear error event so the UI can surface it, instead of
-        # falling back to a generic placeholder assistant message.
-        if not _MOONSHOT_API_KEY:
-            yield StreamEvent(
-                chunks=[],
-                event_id=None,
-                is_final=True,
-                error="Moonshot API key is not configured. Set MOONSHOT_API_KEY in your environment.",
-            )
+        api_messages = _to_api_messages(messages)
+
+        if cancel is not None and cancel.cancelled:
+            yield _cancelled_event()
             return
 
+        # Opening the stream is bounded by capped client timeouts; once it
+        # is open, a timer closes the response at the deadline, so a stalled
+        # upstream cannot outlive it by waiting for its next chunk.
+        deadline = None
+        expired = CancelToken()
+        timer = None
+        if self.config.request_deadline is not None:
+            deadline = time.monotonic() + self.config.request_deadline
+            timer = threading.Timer(self.config.request_deadline, expired.cancel)
+            timer.daemon = True
+            timer.start()
+
+        stream = None
+        unregister = None
+        unregister_deadline = None
         try:
-            stream = _client.chat.completions.create(
-                model="kimi-k2-thinking",
-                messages=api_messages,
-                max_tokens=1024 * 32,
-                stream=True,
-                temperature=1.0,
+            # Built on first use, so a bad configuration (e.g. a malformed
+            # base_url) surfaces here and is reported as an error event.
+            client = self._get_client()
+            # If no API key is configured, do not call the remote API.
+            # Yield a clear error event so the UI can surface it, instead of
+            # falling back to a generic placeholder assistant message.
+            if client is None:
+                yield _missing_key_event()
+                return
+
+            stream = _within_deadline(client, self.config, deadline).chat.completions.create(
+                **_create_kwargs(self.config, api_messages)
             )
+            if cancel is not None:
+                unregister = cancel.on_cancel(stream.close)
+            unregister_deadline = expired.on_cancel(stream.close)
 
             index = 0
-            yielded_any = False
             for chunk in stream:
-                # Each chunk may contain one or more deltas; the client library
-                # shapes these objects differently, so we defensively probe fields.
-                if chunk.choices:
-                    choice = chunk.choices[0]
-                    delta_obj = getattr(choice, "delta", None)
-
-                    thinking_text = None
-                    text = None
-                    raw_delta = None
-
-                    if delta_obj is not None:
-                        # Try common attributes used in streaming payloads.
-                        thinking_text = getattr(delta_obj, "reasoning_content", None)
-                        text = getattr(delta_obj, "content", None)
-                        # Best-effort raw delta capture (may be an object)
-                        try:
-                            raw_delta = delta_obj.__dict__
-                        except Exception:
-                            raw_delta = None
-
-                    sc = StreamChunk(
-                        text=text, index=index, delta=raw_delta, role=role, thinking=thinking_text
-                    )
-                    ev = StreamEvent(chunks=[sc], event_id=None, is_final=False, error=None)
+                if cancel is not None and cancel.cancelled:
+                    yield _cancelled_event()
+                    return
+
+                if expired.cancelled:
+                    yield _deadline_event(self.config)
+                    return
+
+                ev = _event_from_chunk(chunk, index, role, self.config.include_delta)
+                if ev is not None:
                     yield ev
-                    yielded_any = True
                     index += 1
 
-            # Signal end of stream: yield an empty final event so viewers
-            # can display a final marker.
-            if yielded_any:
-                yield StreamEvent(chunks=[], event_id=None, is_final=True, error=None)
+            if cancel is not None and cancel.cancelled:
+                yield _cancelled_event()
+                return
+
+            if expired.cancelled:
+                yield _deadline_event(self.config)
                 return
 
-            # No events produced; yield a final empty event to indicate completion
+            # Signal end of stream: yield an empty final event so viewers
+            # can display a final marker.
             yield StreamEvent(chunks=[], event_id=None, is_final=True, error=None)
             return
 
         except Exception as e:
+            # Closing the response from another thread surfaces here as a
+            # read error; report it as the cancellation it is.
+            if cancel is not None and cancel.cancelled:
+                yield _cancelled_event()
+                return
+
+            # A capped timeout while opening the stream also ends here.
+            if expired.cancelled or _past(deadline):
+                yield _deadline_event(self.config)
+                return
+
             # On error, yield a final event carrying the error message so
             # callers can display it, rather than emitting placeholder text.
-            yield StreamEvent(
-                chunks=[],
-                event_id=None,
-                is_final=True,
-                error=str(e),
+            yield _error_event(e)
+            return
+
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if unregister is not None:
+                unregister()
+            if unregister_deadline is not None:
+                unregister_deadline()
+            if stream is not None:
+                stream.close()
+
+
+class AsyncStreamer(AsyncStreamerClass):
+    """Asyncio-native Moonshot AI streaming implementation.
+
+    Mirrors `Streamer` but drives `openai.AsyncClient`, so each in-flight
+    completion costs a coroutine rather than a blocked thread. Built from
+    the same `StreamerConfig`; the client is likewise created lazily.
+    """
+
+    def __init__(
+        self,
+        config: Optional[StreamerConfig] = None,
+        metrics: Optional[MetricsRegistry] = default_registry,
+    ):
+        """Create an async streamer; its connection pool is built on first use.
+
+        Args:
+            config: Connection and model settings. Defaults to
+                `StreamerConfig()`.
+            metrics: Registry that every stream's timings are recorded in.
+        """
+        self.config = config or StreamerConfig()
+        self.metrics = metrics
+        self._client: Optional["openai.AsyncClient"] = None
+
+    def _get_client(self) -> Optional["openai.AsyncClient"]:
+        """Return the pooled async client, creating it on first call.
+
+        No lock is needed: construction does not await, so it cannot
+        interleave with other coroutines on the event loop.
+        """
+        if self._client is None:
+            api_key = _resolve_api_key(self.config)
+            if not api_key:
+                return None
+            self._client = _build_async_client(self.config, api_key)
+        return self._client
+
+    def request_params(self) -> Dict[str, Any]:
+        """Return the model parameters sent upstream."""
+        return self.config.request_params()
+
+    def stream_response(
+        self, messages: List[Message], cancel: Optional[CancelToken] = None
+    ) -> AsyncIterator[StreamEvent]:
+        """Call the Chat Completions API and asynchronously yield StreamEvent
+        objects as they arrive.
+
+        Event shapes, ordering, error handling, cancellation and metrics
+        match `Streamer.stream_response`; `cancel` may be triggered from
+        any thread.
+        """
+        return instrument_async(self._stream(messages, cancel), self.metrics)
+
+    async def _stream(
+        self, messages: List[Message], cancel: Optional[CancelToken]
+    ) -> AsyncIterator[StreamEvent]:
+        """Uninstrumented body of `stream_response`."""
+        role = "assistant"
+
+        api_messages = _to_api_messages(messages)
+
+        if cancel is not None and cancel.cancelled:
+            yield _cancelled_event()
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = None
+        expired = CancelToken()
+        timer = None
+        if self.config.request_deadline is not None:
+            deadline = time.monotonic() + self.config.request_deadline
+            timer = loop.call_later(self.config.request_deadline, expired.cancel)
+
+        stream = None
+        unregister = None
+        unregister_deadline = None
+        try:
+            client = self._get_client()
+            if client is None:
+                yield _missing_key_event()
+                return
+
+            stream = await _within_deadline(client, self.config, deadline).chat.completions.create(
+                **_create_kwargs(self.config, api_messages)
             )
+            if cancel is not None:
+                # The token may fire on another thread; hop onto our loop to
+                # close the response.
+                unregister = cancel.on_cancel(
+                    lambda: asyncio.run_coroutine_threadsafe(stream.close(), loop)
+                )
+            # The deadline timer fires on our loop.
+            unregister_deadline = expired.on_cancel(lambda: loop.create_task(stream.close()))
+
+            index = 0
+            async for chunk in stream:
+                if cancel is not None and cancel.cancelled:
+                    yield _cancelled_event()
+                    return
+
+                if expired.cancelled:
+                    yield _deadline_event(self.config)
+                    return
+
+                ev = _event_from_chunk(chunk, index, role, self.config.include_delta)
+                if ev is not None:
+                    yield ev
+                    index += 1
+
+            if cancel is not None and cancel.cancelled:
+                yield _cancelled_event()
+                return
+
+            if expired.cancelled:
+                yield _deadline_event(self.config)
+                return
+
+            yield StreamEvent(chunks=[], event_id=None, is_final=True, error=None)
             return
+
+        except Exception as e:
+            if cancel is not None and cancel.cancelled:
+                yield _cancelled_event()
+                return
+
+            if expired.cancelled or _past(deadline):
+                yield _deadline_event(self.config)
+                return
+
+            yield _error_event(e)
+            return
+
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if unregister is not None:
+                unregister()
+            if unregister_deadline is not None:
+                unregister_deadline()
+            if stream is not None:
+                await stream.close()
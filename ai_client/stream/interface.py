@@ -1,23 +1,53 @@
 from abc import ABC, abstractmethod
-from typing import Iterator, List
+from typing import AsyncIterator, Iterator, List, Optional
 from schemas import StreamEvent, Message
+from .cancel import CancelToken
 
 
 class StreamerClass(ABC):
     """Abstract base for streaming AI clients.
 
-    Implementations provide stateless streaming methods that yield
-    StreamEvent objects as tokens/events arrive. This allows viewers to
-    consume streaming output incrementally.
+    Implementations provide streaming methods that yield StreamEvent
+    objects as tokens/events arrive. This allows viewers to consume
+    streaming output incrementally. Instances hold only configuration and
+    connection pools, never per-conversation state, so one instance can
+    serve many concurrent requests.
     """
 
-    @staticmethod
     @abstractmethod
-    def stream_response(messages: List[Message]) -> Iterator[StreamEvent]:
+    def stream_response(
+        self, messages: List[Message], cancel: Optional[CancelToken] = None
+    ) -> Iterator[StreamEvent]:
         """Yield StreamEvent objects for the given conversation messages.
 
         Implementations should yield events as they are received from the
         underlying API. On error, an implementation may yield a final
         error event and then return.
+
+        If `cancel` is given and gets cancelled, implementations should
+        abort the upstream request promptly and finish with a final event
+        flagged `cancelled`.
+        """
+        raise NotImplementedError
+
+
+class AsyncStreamerClass(ABC):
+    """Abstract base for asyncio-native streaming AI clients.
+
+    The async counterpart of `StreamerClass`: implementations return an
+    async iterator of StreamEvent objects so many streams can be in flight
+    on one event loop without a thread per stream.
+    """
+
+    @abstractmethod
+    def stream_response(
+        self, messages: List[Message], cancel: Optional[CancelToken] = None
+    ) -> AsyncIterator[StreamEvent]:
+        """Asynchronously yield StreamEvent objects for the given messages.
+
+        Follows the same event contract as `StreamerClass.stream_response`:
+        events are yielded as they arrive, errors are reported through a
+        final error event and cancellation through a final `cancelled`
+        event.
         """
         raise NotImplementedError
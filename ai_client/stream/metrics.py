@@ -0,0 +1,321 @@
+"""Per-stream latency instrumentation and a Prometheus-style registry.
+
+`instrument` wraps any StreamEvent iterator, timestamps every event and
+attaches a `StreamMetrics` summary to the final event. The same numbers
+are folded into a `MetricsRegistry`, whose `render_prometheus` output can
+be served from a `/metrics` endpoint and queried with
+`histogram_quantile` (e.g. p95 time-to-first-token).
+"""
+import bisect
+import threading
+import time
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from schemas import StreamEvent, StreamMetrics
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+GAP_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+RATE_BUCKETS = (1.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0)
+
+
+def _bucket_label(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in labels)
+    return "{" + inner + "}"
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with fixed bucket bounds."""
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.bounds: List[float] = sorted(buckets) + [float("inf")]
+        self._counts = [0] * len(self.bounds)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    def observe_many(self, values: Iterable[float]) -> None:
+        """Record several observations under one lock acquisition."""
+        values = list(values)
+        idx = [bisect.bisect_left(self.bounds, v) for v in values]
+        with self._lock:
+            for i in idx:
+                self._counts[i] += 1
+            for v in values:
+                self._sum += v
+            self._count += len(idx)
+
+    @property
+    def count(self) -> int:
+        """Number of observations so far."""
+        return self._count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by linear interpolation within buckets."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        lower = 0.0
+        for bound, n in zip(self.bounds, counts):
+            if seen + n >= rank and n:
+                if bound == float("inf"):
+                    return lower
+                return lower + (bound - lower) * (rank - seen) / n
+            seen += n
+            if bound != float("inf"):
+                lower = bound
+        return lower
+
+    def render(self) -> List[str]:
+        """Return Prometheus text exposition lines."""
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+            total = self._count
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, n in zip(self.bounds, counts):
+            cumulative += n
+            lines.append(f'{self.name}_bucket{{le="{_bucket_label(bound)}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {total_sum}")
+        lines.append(f"{self.name}_count {total}")
+        return lines
+
+
+class Counter:
+    """Thread-safe monotonically increasing counter with optional labels."""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Add `amount` to the series identified by `labels`."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Return the current value of one series (0 if never incremented)."""
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0.0)
+
+    def render(self) -> List[str]:
+        """Return Prometheus text exposition lines."""
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        if not items:
+            lines.append(f"{self.name} 0")
+        for labels, v in items:
+            lines.append(f"{self.name}{_format_labels(labels)} {v:g}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named histograms and counters, rendered in Prometheus text format.
+
+    The stream metrics recorded by `instrument` are registered up front;
+    other components (e.g. the web UI) may add their own with `counter` and
+    `histogram`, which return the existing metric when the name is known.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+        self.ttft_thinking = self.histogram(
+            "chat_stream_ttft_thinking_seconds",
+            "Time from request start to the first thinking token.",
+            LATENCY_BUCKETS,
+        )
+        self.ttft_visible = self.histogram(
+            "chat_stream_ttft_visible_seconds",
+            "Time from request start to the first visible text token.",
+            LATENCY_BUCKETS,
+        )
+        self.gap = self.histogram(
+            "chat_stream_inter_token_gap_seconds",
+            "Gap between consecutive streamed tokens.",
+            GAP_BUCKETS,
+        )
+        self.duration = self.histogram(
+            "chat_stream_duration_seconds",
+            "Total duration of a stream.",
+            LATENCY_BUCKETS,
+        )
+        self.tokens_per_second = self.histogram(
+            "chat_stream_tokens_per_second",
+            "Streaming throughput from the first token to the end of a stream.",
+            RATE_BUCKETS,
+        )
+        self.streams = self.counter(
+            "chat_streams_total", "Completed streams by outcome (ok, error, cancelled)."
+        )
+        self.tokens = self.counter("chat_stream_tokens_total", "Streamed tokens.")
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float]) -> Histogram:
+        """Return the histogram called `name`, creating it if needed."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = Histogram(name, help, buckets)
+                self._metrics[name] = metric
+        return metric  # type: ignore[return-value]
+
+    def counter(self, name: str, help: str) -> Counter:
+        """Return the counter called `name`, creating it if needed."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = Counter(name, help)
+                self._metrics[name] = metric
+        return metric  # type: ignore[return-value]
+
+    def record(self, m: StreamMetrics, outcome: str, gaps: List[float]) -> None:
+        """Fold one stream's measurements into the registry."""
+        if m.ttft_thinking is not None:
+            self.ttft_thinking.observe(m.ttft_thinking)
+        if m.ttft_visible is not None:
+            self.ttft_visible.observe(m.ttft_visible)
+        if gaps:
+            self.gap.observe_many(gaps)
+        self.duration.observe(m.duration)
+        if m.tokens_per_second is not None:
+            self.tokens_per_second.observe(m.tokens_per_second)
+        self.streams.inc(outcome=outcome)
+        self.tokens.inc(m.tokens)
+
+    def render_prometheus(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())  # type: ignore[attr-defined]
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by default by streamers and the web UI.
+default_registry = MetricsRegistry()
+
+
+class _StreamTimer:
+    """Timestamps the events of one stream; shared by the sync/async wrappers."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.start = time.monotonic()
+        self.first_thinking: Optional[float] = None
+        self.first_visible: Optional[float] = None
+        self.first_token: Optional[float] = None
+        self.last_token: Optional[float] = None
+        self.tokens = 0
+        self.gaps: List[float] = []
+
+    def observe(self, event: StreamEvent) -> None:
+        # Only chunks carrying text or thinking are tokens; role-only and
+        # empty deltas would inflate the count and make TTFT look early.
+        tokens = 0
+        now = time.monotonic() - self.start
+        for c in event.chunks:
+            if c.thinking and self.first_thinking is None:
+                self.first_thinking = now
+            if c.text and self.first_visible is None:
+                self.first_visible = now
+            if c.text or c.thinking:
+                tokens += 1
+        if not tokens:
+            return
+        if self.first_token is None:
+            self.first_token = now
+        elif self.last_token is not None:
+            self.gaps.append(now - self.last_token)
+        self.last_token = now
+        self.tokens += tokens
+
+    def finish(self, event: StreamEvent, registry: Optional[MetricsRegistry]) -> None:
+        """Attach a summary to the final event and record it in `registry`."""
+        duration = time.monotonic() - self.start
+
+        rate = None
+        if self.first_token is not None and duration > self.first_token:
+            rate = self.tokens / (duration - self.first_token)
+
+        gaps = sorted(self.gaps)
+        hist: Dict[str, int] = {}
+        for g in gaps:
+            i = bisect.bisect_left(GAP_BUCKETS, g)
+            label = _bucket_label(GAP_BUCKETS[i]) if i < len(GAP_BUCKETS) else "+Inf"
+            hist[label] = hist.get(label, 0) + 1
+
+        def pct(q: float) -> Optional[float]:
+            return gaps[min(len(gaps) - 1, int(q * len(gaps)))] if gaps else None
+
+        m = StreamMetrics(
+            started_at=self.started_at,
+            duration=duration,
+            ttft_thinking=self.first_thinking,
+            ttft_visible=self.first_visible,
+            tokens=self.tokens,
+            tokens_per_second=rate,
+            gap_p50=pct(0.5),
+            gap_p95=pct(0.95),
+            gap_max=gaps[-1] if gaps else None,
+            gap_histogram=hist,
+        )
+        event.metrics = m
+
+        if registry is not None:
+            outcome = "cancelled" if event.cancelled else ("error" if event.error else "ok")
+            registry.record(m, outcome, self.gaps)
+
+
+def instrument(
+    events: Iterable[StreamEvent], registry: Optional[MetricsRegistry] = None
+) -> Iterator[StreamEvent]:
+    """Time a stream, attaching `StreamMetrics` to its final event.
+
+    The clock starts when iteration starts, i.e. when the wrapped generator
+    issues its request. Pass `registry=None` to only annotate the event.
+    """
+    timer = _StreamTimer()
+    for event in events:
+        timer.observe(event)
+        if event.is_final:
+            timer.finish(event, registry)
+        yield event
+
+
+async def instrument_async(
+    events: AsyncIterable[StreamEvent], registry: Optional[MetricsRegistry] = None
+) -> AsyncIterator[StreamEvent]:
+    """Async counterpart of `instrument`."""
+    timer = _StreamTimer()
+    async for event in events:
+        timer.observe(event)
+        if event.is_final:
+            timer.finish(event, registry)
+        yield event
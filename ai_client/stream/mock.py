@@ -0,0 +1,185 @@
+"""Deterministic, network-free streamers for tests, benchmarks and load tests."""
+import asyncio
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from schemas import StreamEvent, StreamChunk, Message, construct
+from .cancel import CancelToken
+from .interface import StreamerClass, AsyncStreamerClass
+from .impl import _cancelled_event
+from .metrics import MetricsRegistry, default_registry, instrument, instrument_async
+
+_VOCABULARY = (
+    "the of and to in is that it for on with as was at by this be from or "
+    "an are not have but stream token model reply latency request window "
+    "context message buffer chunk socket event client server thinking answer"
+).split()
+
+
+def _mock_chunks(
+    seed: int, thinking_tokens: int, text_tokens: int, chunk_size: int
+) -> List[Tuple[str, str]]:
+    """Return `(kind, text)` pairs, `kind` being "thinking" or "text".
+
+    Each pair holds up to `chunk_size` tokens; a token is one word plus a
+    trailing space, which is about one real tokenizer token.
+    """
+    rng = random.Random(seed)
+    chunks: List[Tuple[str, str]] = []
+    for kind, count in (("thinking", thinking_tokens), ("text", text_tokens)):
+        words = [rng.choice(_VOCABULARY) + " " for _ in range(count)]
+        for i in range(0, count, chunk_size):
+            chunks.append((kind, "".join(words[i : i + chunk_size])))
+    return chunks
+
+
+def _mock_event(kind: str, text: str, index: int) -> StreamEvent:
+    """Build a chunk event the way `Streamer` does for a real delta."""
+    sc = construct(
+        StreamChunk,
+        text=text if kind == "text" else None,
+        index=index,
+        delta=None,
+        role="assistant",
+        thinking=text if kind == "thinking" else None,
+    )
+    return construct(StreamEvent, chunks=[sc], event_id=None, is_final=False, error=None)
+
+
+class MockStreamer(StreamerClass):
+    """Streamer that emits synthetic thinking and text without a network.
+
+    Every stream is identical for a given configuration: the words come
+    from a seeded generator, and the pacing is fixed. The output ignores
+    the request messages, so it stands in for the model when load-testing
+    `FlaskWebUI` or benchmarking consumers such as `StreamViewer` in CI.
+    """
+
+    def __init__(
+        self,
+        thinking_tokens: int = 64,
+        text_tokens: int = 256,
+        chunk_size: int = 1,
+        token_delay: float = 0.01,
+        first_token_delay: Optional[float] = None,
+        seed: int = 0,
+        metrics: Optional[MetricsRegistry] = default_registry,
+    ):
+        """Configure the synthetic stream.
+
+        Args:
+            thinking_tokens: Number of thinking tokens before the answer.
+            text_tokens: Number of visible answer tokens.
+            chunk_size: Tokens per emitted event.
+            token_delay: Seconds per token; an event of `chunk_size` tokens
+                arrives `chunk_size * token_delay` after the previous one.
+                0 streams as fast as the consumer reads.
+            first_token_delay: Seconds before the first event, simulating
+                time to first token. Defaults to `token_delay`.
+            seed: Seed for the generated words.
+            metrics: Registry that every stream's timings are recorded in.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.thinking_tokens = thinking_tokens
+        self.text_tokens = text_tokens
+        self.chunk_size = chunk_size
+        self.token_delay = token_delay
+        self.first_token_delay = token_delay if first_token_delay is None else first_token_delay
+        self.seed = seed
+        self.metrics = metrics
+        # Generated once: the cost of a mock stream should be its pacing,
+        # not word generation.
+        self._chunks = _mock_chunks(seed, thinking_tokens, text_tokens, chunk_size)
+
+    def request_params(self) -> Dict[str, Any]:
+        """Return the mock configuration, used like model parameters in request keys."""
+        return {
+            "model": "mock",
+            "thinking_tokens": self.thinking_tokens,
+            "text_tokens": self.text_tokens,
+            "chunk_size": self.chunk_size,
+            "seed": self.seed,
+        }
+
+    def _schedule(self) -> Iterator[Tuple[float, Tuple[str, str]]]:
+        """Yield `(offset, chunk)` pairs, offsets in seconds from the request."""
+        offset = self.first_token_delay
+        step = self.chunk_size * self.token_delay
+        for chunk in self._chunks:
+            yield offset, chunk
+            offset += step
+
+    def stream_response(
+        self, messages: List[Message], cancel: Optional[CancelToken] = None
+    ) -> Iterator[StreamEvent]:
+        """Yield the synthetic stream, paced by `token_delay`.
+
+        Pacing follows an absolute schedule, so a slow consumer does not
+        stretch the nominal throughput. Cancelling `cancel` interrupts the
+        wait and ends the stream with a `cancelled` final event.
+        """
+        return instrument(self._stream(cancel), self.metrics)
+
+    def _stream(self, cancel: Optional[CancelToken]) -> Iterator[StreamEvent]:
+        """Uninstrumented body of `stream_response`."""
+        start = time.monotonic()
+        for index, (offset, (kind, text)) in enumerate(self._schedule()):
+            delay = start + offset - time.monotonic()
+            if delay > 0:
+                if cancel is not None:
+                    cancel.wait(delay)
+                else:
+                    time.sleep(delay)
+            if cancel is not None and cancel.cancelled:
+                yield _cancelled_event()
+                return
+            yield _mock_event(kind, text, index)
+        yield StreamEvent(chunks=[], event_id=None, is_final=True, error=None)
+
+
+class AsyncMockStreamer(AsyncStreamerClass):
+    """Asyncio counterpart of `MockStreamer`, with the same output."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        """Accepts the same arguments as `MockStreamer`."""
+        self._sync = MockStreamer(*args, **kwargs)
+        self.metrics = self._sync.metrics
+
+    def request_params(self) -> Dict[str, Any]:
+        """Return the mock configuration."""
+        return self._sync.request_params()
+
+    def stream_response(
+        self, messages: List[Message], cancel: Optional[CancelToken] = None
+    ) -> AsyncIterator[StreamEvent]:
+        """Asynchronously yield the synthetic stream."""
+        return instrument_async(self._stream(cancel), self.metrics)
+
+    async def _stream(self, cancel: Optional[CancelToken]) -> AsyncIterator[StreamEvent]:
+        """Uninstrumented body of `stream_response`."""
+        # The token may fire on another thread; mirror it into an event on
+        # our loop so waits end as soon as it does.
+        cancelled = asyncio.Event()
+        unregister = None
+        if cancel is not None:
+            loop = asyncio.get_running_loop()
+            unregister = cancel.on_cancel(lambda: loop.call_soon_threadsafe(cancelled.set))
+        try:
+            start = time.monotonic()
+            for index, (offset, (kind, text)) in enumerate(self._sync._schedule()):
+                delay = start + offset - time.monotonic()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(cancelled.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                if cancel is not None and cancel.cancelled:
+                    yield _cancelled_event()
+                    return
+                yield _mock_event(kind, text, index)
+            yield StreamEvent(chunks=[], event_id=None, is_final=True, error=None)
+        finally:
+            if unregister is not None:
+                unregister()
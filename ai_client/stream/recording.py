@@ -0,0 +1,179 @@
+"""Record StreamEvent sequences to JSON lines and play them back.
+
+A recording is one stream per file: a header line (`{"created": ...}` plus
+optional metadata) followed by one `{"t": offset, "event": {...}}` line
+per event, where `t` is the event's offset in seconds from the start of
+the stream. `CachingStreamer` stores its entries in the same format, so a
+cache directory doubles as a set of recordings.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from schemas import StreamEvent, Message
+from .cancel import CancelToken
+from .interface import StreamerClass
+from .metrics import MetricsRegistry, default_registry, instrument
+
+RECORDING_SUFFIX = ".jsonl"
+
+
+def write_header(fh: IO[str], **meta: Any) -> None:
+    """Write the header line of a recording."""
+    fh.write(json.dumps(dict(meta, created=time.time()), ensure_ascii=False) + "\n")
+
+
+def record_events(events: Iterable[StreamEvent], fh: IO[str]) -> Iterator[StreamEvent]:
+    """Yield `events` unchanged while appending each one to `fh`.
+
+    The caller writes the header first and decides afterwards whether the
+    recording is worth keeping.
+    """
+    start = time.monotonic()
+    for ev in events:
+        entry = {"t": round(time.monotonic() - start, 4), "event": ev.dict()}
+        fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        yield ev
+
+
+def read_recording(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Return the header and the `{"t", "event"}` entries of a recording.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If it is not a valid recording.
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        header = json.loads(fh.readline())
+        entries = [json.loads(line) for line in fh if line.strip()]
+    if not isinstance(header, dict):
+        raise ValueError(f"{path} has no recording header")
+    return header, entries
+
+
+def replay_entries(
+    entries: List[Dict[str, Any]],
+    speed: Optional[float] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Iterator[StreamEvent]:
+    """Yield the events of recorded entries.
+
+    Args:
+        entries: `{"t", "event"}` entries as returned by `read_recording`.
+        speed: None yields events back to back; 1.0 reproduces the recorded
+            timing, 2.0 plays twice as fast, and so on.
+        cancel: Stops playback with a `cancelled` final event; also cuts
+            pacing sleeps short.
+    """
+    start = time.monotonic()
+    for entry in entries:
+        if speed:
+            delay = entry["t"] / speed - (time.monotonic() - start)
+            if delay > 0:
+                if cancel is not None:
+                    cancel.wait(delay)
+                else:
+                    time.sleep(delay)
+        if cancel is not None and cancel.cancelled:
+            yield StreamEvent(chunks=[], is_final=True, cancelled=True)
+            return
+        yield StreamEvent.parse_obj(entry["event"])
+
+
+class RecordingStreamer(StreamerClass):
+    """Decorator that saves every stream of `inner` as a recording.
+
+    Each call to `stream_response` writes one file to `directory`, named by
+    its start time and a sequence number, so real traffic can be captured
+    once and replayed with `ReplayStreamer`. Streams that end in an error
+    or are cancelled are kept too: they are part of realistic traffic.
+    """
+
+    def __init__(self, inner: StreamerClass, directory: str = "recordings"):
+        """Wrap `inner`, writing recordings under `directory`.
+
+        Args:
+            inner: Streamer whose output is recorded.
+            directory: Directory for the recording files; created if needed.
+        """
+        self.inner = inner
+        self.directory = directory
+        self._seq = itertools.count()
+        os.makedirs(directory, exist_ok=True)
+
+    def request_params(self) -> Dict[str, Any]:
+        """Return the model parameters of the wrapped streamer."""
+        if hasattr(self.inner, "request_params"):
+            return self.inner.request_params()
+        return {}
+
+    def stream_response(
+        self, messages: List[Message], cancel: Optional[CancelToken] = None
+    ) -> Iterator[StreamEvent]:
+        """Stream from the inner streamer, recording every event."""
+        name = "%s-%06d%s" % (time.strftime("%Y%m%d-%H%M%S"), next(self._seq), RECORDING_SUFFIX)
+        with open(os.path.join(self.directory, name), "w", encoding="utf-8") as fh:
+            write_header(fh, params=self.request_params(), messages=len(messages))
+            yield from record_events(self.inner.stream_response(messages, cancel), fh)
+
+
+class ReplayStreamer(StreamerClass):
+    """Network-free streamer that plays back recorded streams.
+
+    `path` is a single recording or a directory of them. Requests are
+    served round-robin over the recordings regardless of the messages
+    sent, which makes replays a reproducible stand-in for real traffic in
+    load tests and benchmarks. Recordings are read once, up front.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        speed: Optional[float] = 1.0,
+        metrics: Optional[MetricsRegistry] = default_registry,
+    ):
+        """Load the recordings at `path`.
+
+        Args:
+            path: A recording file or a directory of `.jsonl` recordings.
+            speed: Playback speed; 1.0 is real time, None is as fast as
+                possible.
+            metrics: Registry the replayed streams are recorded in. Metrics
+                stored with the recording are dropped and re-measured.
+
+        Raises:
+            ValueError: If `path` holds no recordings.
+        """
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.join(path, n) for n in os.listdir(path) if n.endswith(RECORDING_SUFFIX)
+            )
+        else:
+            files = [path]
+        self.recordings: List[List[Dict[str, Any]]] = []
+        for f in files:
+            _, entries = read_recording(f)
+            for entry in entries:
+                entry["event"].pop("metrics", None)
+            self.recordings.append(entries)
+        if not self.recordings:
+            raise ValueError(f"No recordings found at {path}")
+        self.speed = speed
+        self.metrics = metrics
+        self._next = itertools.cycle(range(len(self.recordings)))
+        self._lock = threading.Lock()
+
+    def request_params(self) -> Dict[str, Any]:
+        """Return placeholder model parameters for request keys."""
+        return {"model": "replay"}
+
+    def stream_response(
+        self, messages: List[Message], cancel: Optional[CancelToken] = None
+    ) -> Iterator[StreamEvent]:
+        """Play back the next recording."""
+        with self._lock:
+            entries = self.recordings[next(self._next)]
+        return instrument(replay_entries(entries, self.speed, cancel), self.metrics)
@@ -0,0 +1,180 @@
+"""Retries, continuation and failover for streams from flaky upstreams.
+
+`Streamer` reports any failure as a final error event, so a connection
+reset after thousands of tokens costs the whole reply. `ResilientStreamer`
+wraps one or more streamers and, on a transient failure (see
+`ai_client.stream.impl.is_retryable`):
+
+- before the first token, repeats the request after a jittered
+  exponential backoff;
+- mid-stream, re-requests with the text streamed so far as a partial
+  assistant message, so the model continues the reply where it broke off
+  and the consumer sees one uninterrupted stream;
+- once a streamer has used up its attempts, fails over to the next one,
+  e.g. a secondary endpoint or a smaller model.
+"""
+import random
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from schemas import StreamEvent, Message
+from .cancel import CancelToken
+from .interface import StreamerClass
+from .impl import _cancelled_event, _error_event
+from .metrics import MetricsRegistry, default_registry, instrument
+
+
+class ResilientStreamer(StreamerClass):
+    """Retrying, continuing and failing-over decorator around streamers.
+
+    Chunk indices are renumbered across attempts so they stay contiguous
+    for resuming consumers. Thinking streamed before a failure is kept;
+    a continued request thinks afresh and its thinking follows the old.
+    Errors that are not transient (bad request, authentication, deadline)
+    and cancellation end the stream at once, as they would unwrapped.
+
+    Each attempt is recorded in the metrics registry by the wrapped
+    streamer; the final event's `StreamMetrics` cover the whole stream,
+    retries included.
+    """
+
+    def __init__(
+        self,
+        primary: StreamerClass,
+        fallbacks: Sequence[StreamerClass] = (),
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        continue_partial: bool = True,
+        metrics: Optional[MetricsRegistry] = default_registry,
+    ):
+        """Wrap `primary`, failing over to `fallbacks` in order.
+
+        Args:
+            primary: Streamer tried first, typically `Streamer()`.
+            fallbacks: Streamers tried once the previous one has failed
+                `max_attempts` times in a row, e.g. a `Streamer` built from
+                a `StreamerConfig` with another `base_url` or `model`.
+            max_attempts: Requests made to a streamer before failing over
+                to the next one. A failure after new tokens arrived starts
+                the count again, so a long reply survives several resets.
+            backoff_base: Backoff cap in seconds after the first failure;
+                it doubles with every further failure. The actual wait is
+                drawn uniformly below the cap ("full jitter") so clients
+                failing together do not retry in lockstep.
+            backoff_max: Upper bound of the backoff cap.
+            continue_partial: Continue a reply interrupted after visible
+                text has arrived. When False, such a failure is reported,
+                since restarting would repeat text the consumer already has.
+            metrics: Registry for the retry and failover counters.
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.streamers: List[StreamerClass] = [primary, *fallbacks]
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.continue_partial = continue_partial
+        self.metrics = metrics
+        if metrics is not None:
+            self._retries = metrics.counter(
+                "chat_stream_retries_total",
+                "Upstream requests repeated after a transient failure, by phase "
+                "(before_first_token, mid_stream).",
+            )
+            self._failovers = metrics.counter(
+                "chat_stream_failovers_total", "Switches to a fallback streamer."
+            )
+
+    def request_params(self) -> Dict[str, Any]:
+        """Return the primary streamer's model parameters."""
+        primary = self.streamers[0]
+        return primary.request_params() if hasattr(primary, "request_params") else {}
+
+    def _backoff(self, failures: int) -> float:
+        """Seconds to wait after `failures` consecutive failures."""
+        cap = min(self.backoff_max, self.backoff_base * 2 ** (failures - 1))
+        return random.uniform(0, cap)
+
+    def stream_response(
+        self, messages: List[Message], cancel: Optional[CancelToken] = None
+    ) -> Iterator[StreamEvent]:
+        """Yield one stream, hiding transient failures where possible.
+
+        If every attempt fails, the last final error event is yielded.
+        """
+        # The wrapped streamers record each attempt; here the final event
+        # is only annotated with end-to-end timings.
+        return instrument(self._stream(messages, cancel), None)
+
+    def _stream(
+        self, messages: List[Message], cancel: Optional[CancelToken]
+    ) -> Iterator[StreamEvent]:
+        """Uninstrumented body of `stream_response`."""
+        text: List[str] = []
+        index = 0
+        current = 0
+        failures = 0
+        while True:
+            request = messages
+            if text:
+                request = list(messages) + [
+                    Message(role="assistant", text="".join(text), partial=True)
+                ]
+
+            failure: Optional[StreamEvent] = None
+            progressed = False
+            try:
+                for ev in self.streamers[current].stream_response(request, cancel):
+                    if ev.is_final:
+                        if ev.error and not ev.cancelled:
+                            failure = ev
+                            break
+                        yield ev
+                        return
+                    # Renumber copies: the upstream's events may be shared
+                    # (SingleFlightStreamer) or replayed (CachingStreamer).
+                    chunks = []
+                    for c in ev.chunks:
+                        chunks.append(c.copy(update={"index": index}))
+                        index += 1
+                        if c.text:
+                            text.append(c.text)
+                    progressed = True
+                    yield ev.copy(update={"chunks": chunks})
+            except Exception as e:
+                # Streamers normally report errors as events, but a custom
+                # one may raise.
+                failure = _error_event(e)
+            if failure is None:
+                # The stream ended without a final event.
+                yield StreamEvent(chunks=[], event_id=None, is_final=True, error=None)
+                return
+
+            if cancel is not None and cancel.cancelled:
+                yield _cancelled_event()
+                return
+            if not failure.retryable or (text and not self.continue_partial):
+                yield failure
+                return
+
+            failures = 1 if progressed else failures + 1
+            if failures >= self.max_attempts:
+                if current + 1 >= len(self.streamers):
+                    yield failure
+                    return
+                current += 1
+                failures = 0
+                if self.metrics is not None:
+                    self._failovers.inc()
+                continue
+
+            if self.metrics is not None:
+                self._retries.inc(phase="mid_stream" if index else "before_first_token")
+            delay = self._backoff(failures)
+            if cancel is not None:
+                if cancel.wait(delay):
+                    yield _cancelled_event()
+                    return
+            else:
+                time.sleep(delay)
@@ -0,0 +1,115 @@
+"""Share one upstream request between identical concurrent streams.
+
+When several clients (or a double-clicked submit) ask for the same
+completion at the same time, `SingleFlightStreamer` sends one upstream
+request. Later identical requests join it as extra subscribers of a
+`StreamBroadcast`: they first get the events already produced, then the
+live ones.
+"""
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from schemas import StreamEvent, Message
+from .broadcast import StreamBroadcast
+from .cache import request_key
+from .cancel import CancelToken
+from .impl import _cancelled_event
+from .interface import StreamerClass
+from .metrics import MetricsRegistry, default_registry
+
+
+class SingleFlightStreamer(StreamerClass):
+    """Decorator that deduplicates identical in-flight requests.
+
+    Requests are identical when their `request_key` matches: the same
+    normalized role/content messages and model parameters. Only running
+    streams are shared; a request arriving after the stream finished, or
+    after its beginning fell out of the replay buffer, goes upstream anew.
+
+    Cancelling a subscriber detaches only that subscriber; the upstream
+    request is cancelled once no subscriber is left. Subscribers receive
+    the same event objects, so they must not modify them.
+    """
+
+    # Seconds between checks of a subscriber's cancel token while it waits
+    # for the next event.
+    CANCEL_POLL_INTERVAL = 0.1
+
+    def __init__(
+        self,
+        inner: StreamerClass,
+        params: Optional[Dict[str, Any]] = None,
+        buffer_size: int = 4096,
+        spawn: Optional[Callable[[Callable[[], None]], Any]] = None,
+        metrics: Optional[MetricsRegistry] = default_registry,
+    ):
+        """Wrap `inner` with request deduplication.
+
+        Args:
+            inner: Streamer that performs the shared requests.
+            params: Model parameters included in the request key. Defaults
+                to `inner.request_params()` when the inner streamer has it.
+            buffer_size: Events kept for replaying to late joiners; a
+                longer stream is no longer joined.
+            spawn: Starts the thread pulling a shared stream (see
+                `StreamBroadcast`). Defaults to a daemon thread.
+            metrics: Registry for the join counter.
+        """
+        self.inner = inner
+        if params is None and hasattr(inner, "request_params"):
+            params = inner.request_params()
+        self.params = params or {}
+        self.buffer_size = buffer_size
+        self.spawn = spawn
+        self.metrics = metrics
+        self._inflight: Dict[str, StreamBroadcast] = {}
+        self._lock = threading.Lock()
+        if metrics is not None:
+            self._joins = metrics.counter(
+                "chat_stream_single_flight_joins_total",
+                "Streams served by joining an identical in-flight request.",
+            )
+
+    def request_params(self) -> Dict[str, Any]:
+        """Return the model parameters of the wrapped streamer."""
+        return dict(self.params)
+
+    def _broadcast(self, messages: List[Message]) -> StreamBroadcast:
+        """Return the in-flight broadcast for `messages`, starting one if needed."""
+        key = request_key(messages, self.params)
+        with self._lock:
+            for k in [k for k, b in self._inflight.items() if b.done]:
+                del self._inflight[k]
+            broadcast = self._inflight.get(key)
+            if (
+                broadcast is not None
+                and broadcast.replayable
+                and not broadcast.cancel_token.cancelled
+            ):
+                if self.metrics is not None:
+                    self._joins.inc()
+                return broadcast
+            cancel = CancelToken()
+            broadcast = StreamBroadcast(
+                self.inner.stream_response(messages, cancel),
+                cancel=cancel,
+                buffer_size=self.buffer_size,
+                # Abort upstream as soon as the last subscriber leaves.
+                idle_timeout=0,
+                spawn=self.spawn,
+            )
+            self._inflight[key] = broadcast
+            return broadcast
+
+    def stream_response(
+        self, messages: List[Message], cancel: Optional[CancelToken] = None
+    ) -> Iterator[StreamEvent]:
+        """Yield the stream for `messages`, shared with identical requests."""
+        broadcast = self._broadcast(messages)
+        heartbeat = self.CANCEL_POLL_INTERVAL if cancel is not None else None
+        for item in broadcast.subscribe(heartbeat=heartbeat):
+            if cancel is not None and cancel.cancelled:
+                yield _cancelled_event()
+                return
+            if item is not None:
+                yield item[1]
@@ -0,0 +1,140 @@
+"""Compact wire encodings for StreamEvent.
+
+`StreamEvent.dict()` spells out every field of every chunk, including the
+`None`s, which makes each per-token frame several times larger than the
+token itself. Two denser encodings are provided:
+
+- short-key JSON (`encode_event` / `decode_event`), for Socket.IO and SSE::
+
+      {"c": [{"i": 3, "t": "Hi"}, {"i": 4, "k": "hmm"}], "f": 1, "e": "..."}
+
+  with `i` index, `t` text, `k` thinking, `r` role (only when not
+  "assistant"), `d` raw delta (only on request), `f` final flag, `x`
+  cancelled flag, `e` error, `y` retryable flag, `id` event id and `m`
+  stream metrics (final event only). Absent keys mean None/False.
+
+- positional arrays packed with msgpack (`pack_event` / `unpack_event`),
+  for binary transports::
+
+      [event_id, is_final, error, [[index, text, thinking, role, delta], ...],
+       cancelled, metrics, retryable]
+
+msgpack is optional and only imported when the msgpack helpers are used
+(`pip install msgpack`).
+"""
+from typing import Any, Dict, List
+
+from schemas import StreamEvent, StreamChunk, StreamMetrics, construct
+
+
+_DEFAULT_ROLE = "assistant"
+
+
+def encode_event(event: StreamEvent, include_delta: bool = False) -> Dict[str, Any]:
+    """Encode an event as a short-key dict, omitting empty fields."""
+    chunks: List[Dict[str, Any]] = []
+    for c in event.chunks:
+        out: Dict[str, Any] = {}
+        if c.index is not None:
+            out["i"] = c.index
+        if c.text:
+            out["t"] = c.text
+        if c.thinking:
+            out["k"] = c.thinking
+        if c.role is not None and c.role != _DEFAULT_ROLE:
+            out["r"] = c.role
+        if include_delta and c.delta is not None:
+            out["d"] = c.delta
+        chunks.append(out)
+
+    encoded: Dict[str, Any] = {"c": chunks}
+    if event.is_final:
+        encoded["f"] = 1
+    if event.cancelled:
+        encoded["x"] = 1
+    if event.error:
+        encoded["e"] = event.error
+    if event.retryable:
+        encoded["y"] = 1
+    if event.event_id is not None:
+        encoded["id"] = event.event_id
+    if event.metrics is not None:
+        encoded["m"] = event.metrics.dict()
+    return encoded
+
+
+def decode_event(data: Dict[str, Any]) -> StreamEvent:
+    """Rebuild a StreamEvent from `encode_event` output."""
+    chunks = [
+        construct(
+            StreamChunk,
+            index=c.get("i"),
+            text=c.get("t"),
+            thinking=c.get("k"),
+            role=c.get("r", _DEFAULT_ROLE),
+            delta=c.get("d"),
+        )
+        for c in data.get("c", [])
+    ]
+    return construct(
+        StreamEvent,
+        chunks=chunks,
+        event_id=data.get("id"),
+        is_final=bool(data.get("f")),
+        error=data.get("e"),
+        cancelled=bool(data.get("x")),
+        metrics=StreamMetrics.parse_obj(data["m"]) if data.get("m") else None,
+        retryable=bool(data.get("y")),
+    )
+
+
+def event_to_array(event: StreamEvent, include_delta: bool = False) -> List[Any]:
+    """Encode an event in the positional array form."""
+    return [
+        event.event_id,
+        event.is_final,
+        event.error,
+        [
+            [c.index, c.text, c.thinking, c.role, c.delta if include_delta else None]
+            for c in event.chunks
+        ],
+        event.cancelled,
+        event.metrics.dict() if event.metrics is not None else None,
+        event.retryable,
+    ]
+
+
+def event_from_array(data: List[Any]) -> StreamEvent:
+    """Rebuild a StreamEvent from `event_to_array` output."""
+    event_id, is_final, error, raw_chunks = data[:4]
+    cancelled = bool(data[4]) if len(data) > 4 else False
+    metrics = StreamMetrics.parse_obj(data[5]) if len(data) > 5 and data[5] else None
+    retryable = bool(data[6]) if len(data) > 6 else False
+    chunks = [
+        construct(StreamChunk, index=i, text=t, thinking=k, role=r, delta=d)
+        for i, t, k, r, d in raw_chunks
+    ]
+    return construct(
+        StreamEvent,
+        chunks=chunks,
+        event_id=event_id,
+        is_final=bool(is_final),
+        error=error,
+        cancelled=cancelled,
+        metrics=metrics,
+        retryable=retryable,
+    )
+
+
+def pack_event(event: StreamEvent, include_delta: bool = False) -> bytes:
+    """Serialize an event as a msgpack array (requires `msgpack`)."""
+    import msgpack
+
+    return msgpack.packb(event_to_array(event, include_delta), use_bin_type=True)
+
+
+def unpack_event(data: bytes) -> StreamEvent:
+    """Deserialize a `pack_event` payload (requires `msgpack`)."""
+    import msgpack
+
+    return event_from_array(msgpack.unpackb(data, raw=False))
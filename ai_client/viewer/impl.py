@@ -1,25 +1,173 @@
-from typing import Iterable, Dict, Tuple
+import sys
+import threading
+import time
+from typing import AsyncIterable, Iterable, Dict, List, Optional, TextIO, Tuple
 
 from schemas import StreamEvent
 from .interface import StreamViewerClass
 
+# Default seconds between flushes of rendered output (about 20 frames/s).
+FRAME_INTERVAL = 0.05
+
+
+class _BufferedWriter:
+    """Coalesces many small writes into few `write`/`flush` calls.
+
+    Pending output is written once it contains a newline or once
+    `frame_interval` has passed since the last flush, and always on
+    `close`. A timer enforces the interval, so fragments do not wait for
+    the next write while the stream pauses. A `frame_interval` of 0 writes
+    and flushes every fragment immediately.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, frame_interval: float = FRAME_INTERVAL):
+        # Resolved at construction, not import, so redirected stdout works.
+        self.stream = stream if stream is not None else sys.stdout
+        self.frame_interval = frame_interval
+        self._pending: List[str] = []
+        self._last_flush = time.monotonic()
+        # The timer flushes from its own thread.
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def write(self, text: str) -> None:
+        with self._lock:
+            self._pending.append(text)
+            wait = self._last_flush + self.frame_interval - time.monotonic()
+            if "\n" in text or wait <= 0:
+                self._flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending:
+            self.stream.write("".join(self._pending))
+            self._pending = []
+            self.stream.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """Write whatever is pending (the stream itself stays open)."""
+        self.flush()
+
+
+class _EventConsumer:
+    """Incremental state machine behind `StreamViewer._consume_events`.
+
+    Events are fed one at a time so the same framing and aggregation logic
+    can drive both the sync and the async consumer paths.
+    """
+
+    def __init__(
+        self,
+        show_thinking: bool,
+        print_output: bool,
+        stream: Optional[TextIO] = None,
+        frame_interval: float = FRAME_INTERVAL,
+    ):
+        self.show_thinking = show_thinking
+        self.print_output = print_output
+        # Only allocated when printing, so silent consumers pay nothing.
+        self.out = _BufferedWriter(stream, frame_interval) if print_output else None
+
+        self.thinking_open = False
+        self.thinking_closed = False
+        self.saw_text = False
+        self.any_final = False
+
+        self.thinking_buf: List[str] = []
+        self.text_buf: List[str] = []
+
+    def feed(self, event: StreamEvent) -> None:
+        """Process a single event, writing fragments if requested."""
+        print_output = self.print_output
+
+        for c in event.chunks:
+            # Stream thinking tokens incrementally.
+            if c.thinking and not self.thinking_closed and self.show_thinking:
+                if not self.thinking_open:
+                    if print_output:
+                        self.out.write("----------\nBegin thinking\n----------------\n")
+                    self.thinking_open = True
+
+                if print_output:
+                    self.out.write(c.thinking)
+                self.thinking_buf.append(c.thinking)
+
+            # When visible text arrives, close thinking block (if open)
+            # and stream text tokens.
+            if c.text:
+                if self.thinking_open and not self.thinking_closed:
+                    if print_output:
+                        # End the current thinking line, then the block.
+                        self.out.write("\n----------\nEnd thinking\n--------------\n")
+                    self.thinking_closed = True
+
+                if print_output:
+                    self.out.write(c.text)
+                self.text_buf.append(c.text)
+                self.saw_text = True
+
+        if event.is_final:
+            self.any_final = True
+
+    def finish(self) -> Tuple[str, str, bool]:
+        """Close any open framing and return `(thinking, text, any_final)`."""
+        print_output = self.print_output
+
+        # If thinking was opened but never closed (no visible text arrived),
+        # close it now so framing is complete.
+        if self.thinking_open and not self.thinking_closed:
+            if print_output:
+                self.out.write("\n----------\nEnd thinking\n--------------\n")
+
+        # If we printed any visible text, ensure we end the line before final
+        # marker; otherwise final marker will appear after the thinking block.
+        if self.saw_text and print_output:
+            self.out.write("\n")
+
+        if self.any_final and print_output:
+            self.out.write("-- end of stream --\n")
+
+        if print_output:
+            self.out.close()
+
+        return ("".join(self.thinking_buf), "".join(self.text_buf), self.any_final)
+
 
 class StreamViewer(StreamViewerClass):
     """Simple console viewer for streaming events.
 
     This is intentionally minimal: it prints event chunks in order. It
     distinguishes `thinking` fragments (internal reasoning) from visible
-    `text` fragments. Later we can add a more advanced renderer (async,
-    GUI, or rich/text styling).
+    `text` fragments. Output goes through a small buffer that is flushed
+    on newlines and at most every `frame_interval` seconds, so a fast
+    stream costs a few writes per second rather than one per token.
+    `aggregate` skips rendering entirely for headless callers.
     """
     
     @staticmethod
-    def render(events, show_thinking: bool = True) -> None:
-        """Render streaming events to stdout.
+    def render(
+        events,
+        show_thinking: bool = True,
+        stream: Optional[TextIO] = None,
+        frame_interval: float = FRAME_INTERVAL,
+    ) -> None:
+        """Render streaming events to `stream` (stdout by default).
 
         This consumes the events in order and prints any `thinking` and
         `text` fields found on chunks. Events flagged `is_final` cause a
-        newline and an end marker.
+        newline and an end marker. `frame_interval=0` flushes every
+        fragment as it arrives.
         """
         # Streamed rendering behavior:
         # - Print a thinking header the first time we see a thinking token
@@ -30,98 +178,129 @@ class StreamViewer(StreamViewerClass):
         # Delegate to the central consumer which performs identical
         # processing. We pass `print_output=True` since `render` prints but
         # doesn't return the aggregated strings.
-        _, _, _ = StreamViewer._consume_events(events, show_thinking, print_output=True)
+        _, _, _ = StreamViewer._consume_events(
+            events, show_thinking, print_output=True, stream=stream, frame_interval=frame_interval
+        )
 
     @staticmethod
     def render_and_aggregate(
-        events: Iterable[StreamEvent], show_thinking: bool = True
+        events: Iterable[StreamEvent],
+        show_thinking: bool = True,
+        stream: Optional[TextIO] = None,
+        frame_interval: float = FRAME_INTERVAL,
     ) -> Dict[str, str]:
-        """Render streaming events to stdout and return aggregated strings.
+        """Render streaming events to `stream` and return aggregated strings.
 
         Returns a dict with keys `thinking` and `text` containing the
         concatenated thinking tokens and visible text respectively.
         """
         # Use central consumer, capturing aggregated fragments.
         thinking_joined, text_joined, _ = StreamViewer._consume_events(
-            events, show_thinking, print_output=True
+            events, show_thinking, print_output=True, stream=stream, frame_interval=frame_interval
+        )
+
+        return {"thinking": thinking_joined, "text": text_joined}
+
+    @staticmethod
+    def aggregate(events: Iterable[StreamEvent], show_thinking: bool = True) -> Dict[str, str]:
+        """Consume streaming events silently and return aggregated strings.
+
+        Same result as `render_and_aggregate`, without any output.
+        """
+        thinking_joined, text_joined, _ = StreamViewer._consume_events(
+            events, show_thinking, print_output=False
+        )
+
+        return {"thinking": thinking_joined, "text": text_joined}
+
+    @staticmethod
+    async def render_async(
+        events: AsyncIterable[StreamEvent],
+        show_thinking: bool = True,
+        stream: Optional[TextIO] = None,
+        frame_interval: float = FRAME_INTERVAL,
+    ) -> None:
+        """Async counterpart of `render` for async event iterators."""
+        await StreamViewer._consume_events_async(
+            events, show_thinking, print_output=True, stream=stream, frame_interval=frame_interval
+        )
+
+    @staticmethod
+    async def render_and_aggregate_async(
+        events: AsyncIterable[StreamEvent],
+        show_thinking: bool = True,
+        stream: Optional[TextIO] = None,
+        frame_interval: float = FRAME_INTERVAL,
+    ) -> Dict[str, str]:
+        """Async counterpart of `render_and_aggregate`.
+
+        Consumes an async iterator (e.g. `AsyncStreamer.stream_response`)
+        and returns the same `thinking`/`text` mapping.
+        """
+        thinking_joined, text_joined, _ = await StreamViewer._consume_events_async(
+            events, show_thinking, print_output=True, stream=stream, frame_interval=frame_interval
+        )
+
+        return {"thinking": thinking_joined, "text": text_joined}
+
+    @staticmethod
+    async def aggregate_async(
+        events: AsyncIterable[StreamEvent], show_thinking: bool = True
+    ) -> Dict[str, str]:
+        """Async counterpart of `aggregate`."""
+        thinking_joined, text_joined, _ = await StreamViewer._consume_events_async(
+            events, show_thinking, print_output=False
         )
 
         return {"thinking": thinking_joined, "text": text_joined}
 
     @staticmethod
     def _consume_events(
-        events: Iterable[StreamEvent], show_thinking: bool, print_output: bool
+        events: Iterable[StreamEvent],
+        show_thinking: bool,
+        print_output: bool,
+        stream: Optional[TextIO] = None,
+        frame_interval: float = FRAME_INTERVAL,
     ) -> Tuple[str, str, bool]:
-        """Core event consumer used by both render and render_and_aggregate.
+        """Core event consumer used by render, render_and_aggregate and aggregate.
 
         Args:
             events: Iterable of StreamEvent objects.
             show_thinking: Whether to include internal thinking tokens.
-            print_output: If True, perform the same prints as the original
-                implementations; otherwise operate silently and only aggregate.
+            print_output: If True, write the rendered stream to `stream`;
+                otherwise operate silently and only aggregate.
+            stream: Text stream to write to; defaults to `sys.stdout`.
+            frame_interval: Maximum seconds output stays buffered; 0
+                flushes every fragment.
 
         Returns:
             A tuple `(thinking, text, any_final)` where `thinking` and `text`
             are the concatenated fragments and `any_final` indicates if any
             event was final.
         """
-        thinking_open = False
-        thinking_closed = False
-        saw_text = False
-        any_final = False
-
-        thinking_buf = []
-        text_buf = []
-
-        for event in events:
-            for c in event.chunks:
-                # Stream thinking tokens incrementally.
-                if c.thinking and not thinking_closed and show_thinking:
-                    if not thinking_open:
-                        if print_output:
-                            print("----------")
-                            print("Begin thinking")
-                            print("----------------")
-                        thinking_open = True
-
-                    if print_output:
-                        print(c.thinking, end="", flush=True)
-                    thinking_buf.append(c.thinking)
-
-                # When visible text arrives, close thinking block (if open)
-                # and stream text tokens.
-                if c.text:
-                    if thinking_open and not thinking_closed:
-                        if print_output:
-                            print()  # end current thinking line
-                            print("----------")
-                            print("End thinking")
-                            print("--------------")
-                        thinking_closed = True
-
-                    if print_output:
-                        print(c.text, end="", flush=True)
-                    text_buf.append(c.text)
-                    saw_text = True
+        consumer = _EventConsumer(show_thinking, print_output, stream, frame_interval)
+        try:
+            for event in events:
+                consumer.feed(event)
+        finally:
+            # Also when the iterator raises: write what is buffered and
+            # close the framing.
+            result = consumer.finish()
+        return result
 
-            if event.is_final:
-                any_final = True
-
-        # If thinking was opened but never closed (no visible text arrived),
-        # close it now so framing is complete.
-        if thinking_open and not thinking_closed:
-            if print_output:
-                print()  # finish thinking line
-                print("----------")
-                print("End thinking")
-                print("--------------")
-
-        # If we printed any visible text, ensure we end the line before final
-        # marker; otherwise final marker will appear after the thinking block.
-        if saw_text and print_output:
-            print()
-
-        if any_final and print_output:
-            print("-- end of stream --")
-
-        return ("".join(thinking_buf), "".join(text_buf), any_final)
+    @staticmethod
+    async def _consume_events_async(
+        events: AsyncIterable[StreamEvent],
+        show_thinking: bool,
+        print_output: bool,
+        stream: Optional[TextIO] = None,
+        frame_interval: float = FRAME_INTERVAL,
+    ) -> Tuple[str, str, bool]:
+        """Async version of `_consume_events`; same arguments and result."""
+        consumer = _EventConsumer(show_thinking, print_output, stream, frame_interval)
+        try:
+            async for event in events:
+                consumer.feed(event)
+        finally:
+            result = consumer.finish()
+        return result
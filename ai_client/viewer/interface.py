@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Iterable, Dict
+from typing import AsyncIterable, Iterable, Dict
 from schemas import StreamEvent
 
 
@@ -42,3 +42,68 @@ class StreamViewerClass(ABC):
             Dict[str, str]: mapping with keys 'thinking' and 'text'.
         """
         raise NotImplementedError
+
+    @staticmethod
+    @abstractmethod
+    def aggregate(events: Iterable[StreamEvent], show_thinking: bool = True) -> Dict[str, str]:
+        """Consume events without rendering and return aggregated output.
+
+        For headless callers: returns the same mapping as
+        `render_and_aggregate` but produces no output.
+
+        Args:
+            events: Iterable of StreamEvent objects (may be a generator).
+            show_thinking: Whether to include internal thinking tokens in the
+                aggregation.
+
+        Returns:
+            Dict[str, str]: mapping with keys 'thinking' and 'text'.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    @abstractmethod
+    async def render_async(
+        events: AsyncIterable[StreamEvent], show_thinking: bool = True
+    ) -> None:
+        """Render events from an async iterator (e.g. an `AsyncStreamer`).
+
+        Args:
+            events: Async iterable of StreamEvent objects.
+            show_thinking: Whether to display internal thinking tokens.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    @abstractmethod
+    async def render_and_aggregate_async(
+        events: AsyncIterable[StreamEvent], show_thinking: bool = True
+    ) -> Dict[str, str]:
+        """Async counterpart of `render_and_aggregate`.
+
+        Args:
+            events: Async iterable of StreamEvent objects.
+            show_thinking: Whether to include internal thinking tokens in the
+                aggregation.
+
+        Returns:
+            Dict[str, str]: mapping with keys 'thinking' and 'text'.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    @abstractmethod
+    async def aggregate_async(
+        events: AsyncIterable[StreamEvent], show_thinking: bool = True
+    ) -> Dict[str, str]:
+        """Async counterpart of `aggregate`.
+
+        Args:
+            events: Async iterable of StreamEvent objects.
+            show_thinking: Whether to include internal thinking tokens in the
+                aggregation.
+
+        Returns:
+            Dict[str, str]: mapping with keys 'thinking' and 'text'.
+        """
+        raise NotImplementedError
@@ -0,0 +1,160 @@
+"""Local OpenAI-compatible streaming server for benchmarks and load tests.
+
+Answers every `POST .../chat/completions` with a Server-Sent Events stream
+of `chat.completion.chunk` objects: `thinking_tokens` deltas carrying
+`reasoning_content`, then `text_tokens` deltas carrying `content`, then
+`data: [DONE]`. Point `StreamerConfig.base_url` at `FakeUpstream.base_url`
+to drive the real `Streamer` (SDK, HTTP pool and all) without a network.
+
+Usage:
+  python benchmarks/fake_upstream.py [--port 8001] [--thinking 64] [--text 256] [--delay 0.01]
+
+Then e.g. `StreamerConfig(base_url="http://127.0.0.1:8001/v1", api_key="x")`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, format, *args):  # noqa: A002 - signature is fixed
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        up = self.server.upstream
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            time.sleep(up.first_token_delay)
+            start = time.monotonic()
+            for i, payload in enumerate(up.frames):
+                # Absolute schedule: a slow reader does not lower the rate.
+                delay = start + i * up.token_delay - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                self._write(payload)
+            self._write(b"data: [DONE]\n\n")
+            self._write(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled the stream.
+            pass
+
+    def _write(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    upstream: "FakeUpstream"
+
+
+class FakeUpstream:
+    """A threaded fake Chat Completions endpoint on localhost."""
+
+    def __init__(
+        self,
+        thinking_tokens: int = 64,
+        text_tokens: int = 256,
+        token_delay: float = 0.0,
+        first_token_delay: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """Configure the stream every request receives.
+
+        Args:
+            thinking_tokens: Deltas with `reasoning_content` per reply.
+            text_tokens: Deltas with `content` per reply.
+            token_delay: Seconds between deltas.
+            first_token_delay: Seconds before the first delta.
+            host: Interface to bind.
+            port: Port to bind; 0 picks a free one.
+        """
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+        self.frames = [
+            self._frame({"reasoning_content": "think%d " % i}) for i in range(thinking_tokens)
+        ] + [self._frame({"content": "word%d " % i}) for i in range(text_tokens)]
+        self._server = _Server((host, port), _Handler)
+        self._server.upstream = self
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _frame(delta: dict) -> bytes:
+        chunk = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "fake",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+        return ("data: " + json.dumps(chunk) + "\n\n").encode("utf-8")
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to pass as `StreamerConfig.base_url`."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeUpstream":
+        """Serve requests on a daemon thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve requests on the calling thread until interrupted."""
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        """Stop serving and release the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeUpstream":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--thinking", type=int, default=64, help="thinking deltas per reply")
+    parser.add_argument("--text", type=int, default=256, help="text deltas per reply")
+    parser.add_argument("--delay", type=float, default=0.01, help="seconds between deltas")
+    parser.add_argument("--ttft", type=float, default=0.2, help="seconds before the first delta")
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(args.thinking, args.text, args.delay, args.ttft, args.host, args.port)
+    print(f"Fake upstream listening on {upstream.base_url}")
+    try:
+        upstream.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
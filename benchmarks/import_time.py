@@ -0,0 +1,128 @@
+"""Measure start-up (import) cost of the project's entry modules.
+
+For each module this runs a fresh interpreter with `python -X importtime`
+and reports:
+- wall-clock time of `python -c "import <module>"` (median of N runs)
+- cumulative import time of the module itself, from the importtime report
+- the slowest imports pulled in along the way
+- whether heavy dependencies (openai, httpx, dotenv) were imported eagerly
+
+Usage:
+  python benchmarks/import_time.py [--module ai_client ...] [--runs 5] [--top 10] [--json]
+
+Run from the project root. `ai_client` is expected to import neither the
+OpenAI SDK nor httpx nor python-dotenv; those are loaded on the first
+`stream_response` call.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULES = ["ai_client", "ui"]
+
+# Modules that should only be imported lazily
+HEAVY_MODULES = ["openai", "httpx", "dotenv"]
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Parse `-X importtime` output into (module, self_us, cumulative_us) tuples."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cum_us = int(parts[1].strip())
+        except ValueError:
+            # header line
+            continue
+        rows.append((parts[2].strip(), self_us, cum_us))
+    return rows
+
+
+def measure(module: str, runs: int, top: int) -> Dict[str, object]:
+    """Benchmark importing `module` in fresh interpreters."""
+    env = _env()
+    code = f"import {module}"
+
+    # Warm the bytecode cache so the first measured run isn't an outlier.
+    subprocess.run([sys.executable, "-c", code], env=env, cwd=ROOT, check=True)
+
+    walls = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], env=env, cwd=ROOT, check=True)
+        walls.append(time.perf_counter() - start)
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    rows = parse_importtime(proc.stderr)
+    imported = {name for name, _, _ in rows}
+    own = next((cum for name, _, cum in rows if name == module), 0)
+    slowest = sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+
+    return {
+        "module": module,
+        "wall_ms_median": round(statistics.median(walls) * 1000, 2),
+        "wall_ms_min": round(min(walls) * 1000, 2),
+        "import_ms": round(own / 1000, 2),
+        "eager_heavy_imports": [m for m in HEAVY_MODULES if m in imported],
+        "slowest_self_ms": [[name, round(self_us / 1000, 2)] for name, self_us, _ in slowest],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", nargs="+", default=DEFAULT_MODULES, help="modules to import")
+    parser.add_argument("--runs", type=int, default=5, help="wall-clock runs per module")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    args = parser.parse_args()
+
+    results = [measure(m, args.runs, args.top) for m in args.module]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    for r in results:
+        print(f"== import {r['module']}")
+        print(f"   wall (median/min): {r['wall_ms_median']} / {r['wall_ms_min']} ms")
+        print(f"   cumulative import: {r['import_ms']} ms")
+        heavy = ", ".join(r["eager_heavy_imports"]) or "none"
+        print(f"   eager heavy imports: {heavy}")
+        print("   slowest imports (self time):")
+        for name, ms in r["slowest_self_ms"]:
+            print(f"     {ms:8.2f} ms  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+"""Run FlaskWebUI for load tests, in a chosen Flask-SocketIO async mode.
+
+Started by `load_test.py` in a subprocess per async mode: eventlet and
+gevent monkey-patch the standard library, which has to happen before
+anything else is imported and cannot be undone within a process.
+
+Usage:
+  python benchmarks/load_server.py --async-mode eventlet --port 5050 --upstream http://127.0.0.1:8001/v1
+  python benchmarks/load_server.py --async-mode threading --port 5050 --mock
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--async-mode", default="threading", choices=["threading", "eventlet", "gevent"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5050)
+    parser.add_argument("--upstream", help="base URL of a fake upstream (see fake_upstream.py)")
+    parser.add_argument("--mock", action="store_true", help="use MockStreamer instead of an upstream")
+    parser.add_argument("--mock-delay", type=float, default=0.005, help="MockStreamer seconds per token")
+    parser.add_argument("--window-ms", type=float, default=30.0, help="coalescing window")
+    parser.add_argument("--max-connections", type=int, default=1000, help="upstream pool size")
+    args = parser.parse_args()
+    if not args.mock and not args.upstream:
+        parser.error("one of --upstream or --mock is required")
+
+    if args.async_mode == "eventlet":
+        import eventlet
+
+        eventlet.monkey_patch()
+    elif args.async_mode == "gevent":
+        from gevent import monkey
+
+        monkey.patch_all()
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from ai_client import MockStreamer, Streamer, StreamerConfig
+    from ui import FlaskWebUI
+
+    if args.mock:
+        streamer = MockStreamer(token_delay=args.mock_delay)
+    else:
+        streamer = Streamer(
+            StreamerConfig(
+                base_url=args.upstream,
+                api_key="load-test",
+                max_connections=args.max_connections,
+                max_keepalive_connections=args.max_connections,
+                max_retries=0,
+            )
+        )
+
+    ui = FlaskWebUI(streamer=streamer, coalesce_window_ms=args.window_ms, async_mode=args.async_mode)
+    ui.socketio.run(
+        ui.get_app(),
+        host=args.host,
+        port=args.port,
+        debug=False,
+        use_reloader=False,
+        log_output=False,
+        allow_unsafe_werkzeug=True,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,345 @@
+"""Concurrent multi-client load test for FlaskWebUI.
+
+For every Flask-SocketIO async mode requested, starts the UI in a fresh
+subprocess (`load_server.py`) backed by a local fake model server, then
+ramps through the given client counts. At each level, N Socket.IO clients
+stream replies via `start_stream` while M HTTP clients call `/reply`,
+each sending `--requests` prompts back to back. Per level it reports:
+
+- completed streams/requests per second and errors
+- TTFT (first frame, first visible text) and completion percentiles
+- Socket.IO frames/sec
+- dropped frames: streams whose `stream_chunk` text does not add up to
+  the text in their `stream_complete`
+- server memory (RSS) and its growth since the server started
+
+The level where TTFT p95 starts to climb is the concurrency one process
+sustains. Modes whose package is not installed are reported as skipped.
+Flask-SocketIO has no asyncio mode; "threading", "eventlet" and "gevent"
+are the options.
+
+Usage:
+  python benchmarks/load_test.py [--modes threading eventlet gevent] [--clients 1 8 32 64]
+      [--http-clients 0] [--requests 3] [--delay 0.005] [--mock] [--json] [--output load.json]
+
+Run from the project root.
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+from ai_client import decode_event  # noqa: E402
+from fake_upstream import FakeUpstream  # noqa: E402
+from socketio_client import PollingClient  # noqa: E402
+
+MODES = ["threading", "eventlet", "gevent"]
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    k = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def _ms(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value * 1000, 1)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_kb(pid: int) -> Optional[int]:
+    """Resident set size of a process in KiB (psutil, else /proc)."""
+    try:
+        import psutil
+
+        return psutil.Process(pid).memory_info().rss // 1024
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class ServerProcess:
+    """`load_server.py` running in a subprocess."""
+
+    def __init__(self, mode: str, upstream: Optional[str], mock_delay: Optional[float], window_ms: float):
+        self.port = _free_port()
+        cmd = [
+            sys.executable,
+            str(HERE / "load_server.py"),
+            "--async-mode", mode,
+            "--port", str(self.port),
+            "--window-ms", str(window_ms),
+        ]
+        if upstream:
+            cmd += ["--upstream", upstream]
+        else:
+            cmd += ["--mock", "--mock-delay", str(mock_delay)]
+        # The UI prints every prompt it sends upstream; discard stdout. Keep
+        # stderr in a file: a pipe nobody drains fills up under load (every
+        # request is logged there) and blocks the server.
+        self.stderr = tempfile.TemporaryFile("w+", encoding="utf-8", errors="replace")
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=self.stderr, text=True)
+        self.url = f"http://127.0.0.1:{self.port}"
+
+    def wait_ready(self, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                self.stderr.seek(0)
+                raise RuntimeError("server exited: " + self.stderr.read().strip()[-2000:])
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=2)
+                conn.request("GET", "/metrics")
+                conn.getresponse().read()
+                conn.close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError("server did not start within %.0fs" % timeout)
+
+    def rss_kb(self) -> Optional[int]:
+        return _rss_kb(self.proc.pid)
+
+    def stop(self) -> None:
+        self.proc.terminate()
+        try:
+            self.proc.wait(10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        self.stderr.close()
+
+
+def socketio_client(url: str, requests: int, results: List[Dict[str, Any]], timeout: float) -> None:
+    """Stream `requests` replies over one Socket.IO connection."""
+    client = PollingClient(url, timeout=timeout)
+    try:
+        client.connect()
+        events = client.receive()
+        for i in range(requests):
+            sent = time.perf_counter()
+            client.emit("start_stream", {"prompt": f"load test prompt {i}"})
+            first = first_visible = None
+            frames = 0
+            text: List[str] = []
+            error = None
+            for arrived, event, data in events:
+                if event == "stream_chunk":
+                    frames += 1
+                    if first is None:
+                        first = arrived - sent
+                    ev = decode_event(data)
+                    if ev.is_final and ev.error:
+                        error = ev.error
+                    for c in ev.chunks:
+                        if c.text:
+                            text.append(c.text)
+                            if first_visible is None:
+                                first_visible = arrived - sent
+                elif event == "stream_complete":
+                    # A failed stream still completes; its final chunk
+                    # carries the error.
+                    results.append({
+                        "kind": "socketio",
+                        "ok": error is None,
+                        "error": error,
+                        "ttft": first,
+                        "ttft_visible": first_visible,
+                        "total": arrived - sent,
+                        "frames": frames,
+                        "dropped": "".join(text) != data.get("text", ""),
+                    })
+                    break
+                elif event == "stream_error":
+                    results.append({"kind": "socketio", "ok": False, "error": str(data)})
+                    break
+    except Exception as e:
+        results.append({"kind": "socketio", "ok": False, "error": f"{type(e).__name__}: {e}"})
+    finally:
+        client.close()
+
+
+def http_client(url: str, requests: int, results: List[Dict[str, Any]], timeout: float) -> None:
+    """Send `requests` prompts to /reply, keeping one session cookie."""
+    host, port = url.rsplit("//", 1)[1].split(":")
+    conn = http.client.HTTPConnection(host, int(port), timeout=timeout)
+    cookie = None
+    try:
+        for i in range(requests):
+            headers = {"Content-Type": "application/json"}
+            if cookie:
+                headers["Cookie"] = cookie
+            sent = time.perf_counter()
+            conn.request("POST", "/reply", body=json.dumps({"prompt": f"load test prompt {i}"}), headers=headers)
+            resp = conn.getresponse()
+            body = resp.read()
+            elapsed = time.perf_counter() - sent
+            cookie = (resp.getheader("Set-Cookie") or cookie or "").split(";", 1)[0] or None
+            if resp.status != 200:
+                results.append({"kind": "http", "ok": False, "error": f"HTTP {resp.status}"})
+                continue
+            error = json.loads(body).get("error")
+            results.append({"kind": "http", "ok": not error, "error": error, "total": elapsed})
+    except Exception as e:
+        results.append({"kind": "http", "ok": False, "error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def run_level(url: str, clients: int, http_clients: int, requests: int, timeout: float) -> Dict[str, Any]:
+    """Run one load level and summarize it."""
+    results: List[Dict[str, Any]] = []
+    threads = [
+        threading.Thread(target=socketio_client, args=(url, requests, results, timeout))
+        for _ in range(clients)
+    ] + [
+        threading.Thread(target=http_client, args=(url, requests, results, timeout))
+        for _ in range(http_clients)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    sio = [r for r in results if r["kind"] == "socketio" and r["ok"]]
+    web = [r for r in results if r["kind"] == "http" and r["ok"]]
+    errors = [r["error"] for r in results if not r["ok"]]
+    ttft = [r["ttft"] for r in sio if r["ttft"] is not None]
+    visible = [r["ttft_visible"] for r in sio if r["ttft_visible"] is not None]
+    return {
+        "clients": clients,
+        "http_clients": http_clients,
+        "wall_s": round(wall, 2),
+        "streams_ok": len(sio),
+        "streams_per_s": round(len(sio) / wall, 2),
+        "frames_per_s": round(sum(r["frames"] for r in sio) / wall, 1),
+        "dropped_streams": sum(1 for r in sio if r["dropped"]),
+        "ttft_ms": {q: _ms(_percentile(ttft, p)) for q, p in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+        "ttft_visible_ms_p95": _ms(_percentile(visible, 0.95)),
+        "stream_complete_ms_p95": _ms(_percentile([r["total"] for r in sio], 0.95)),
+        "replies_ok": len(web),
+        "replies_per_s": round(len(web) / wall, 2),
+        "reply_ms": {q: _ms(_percentile([r["total"] for r in web], p)) for q, p in (("p50", 0.5), ("p95", 0.95))},
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:3],
+    }
+
+
+def run_mode(mode: str, args: argparse.Namespace, upstream: Optional[str]) -> Dict[str, Any]:
+    if mode != "threading" and importlib.util.find_spec(mode) is None:
+        return {"mode": mode, "skipped": f"{mode} is not installed"}
+
+    server = ServerProcess(mode, upstream, None if upstream else args.delay, args.window_ms)
+    try:
+        server.wait_ready()
+        # One request to import the SDK and open the first connection.
+        socketio_client(server.url, 1, [], args.timeout)
+        rss_start = server.rss_kb()
+        levels = []
+        for n in args.clients:
+            level = run_level(server.url, n, args.http_clients, args.requests, args.timeout)
+            rss = server.rss_kb()
+            level["rss_kb"] = rss
+            level["rss_growth_kb"] = None if rss is None or rss_start is None else rss - rss_start
+            levels.append(level)
+            if not args.json:
+                print(_format_level(mode, level), flush=True)
+        return {"mode": mode, "rss_start_kb": rss_start, "levels": levels}
+    except RuntimeError as e:
+        return {"mode": mode, "skipped": str(e)}
+    finally:
+        server.stop()
+
+
+def _format_level(mode: str, level: Dict[str, Any]) -> str:
+    return (
+        f"{mode:>9} clients={level['clients']:<4} streams/s={level['streams_per_s']:<8} "
+        f"frames/s={level['frames_per_s']:<9} ttft p50/p95/p99={level['ttft_ms']['p50']}/"
+        f"{level['ttft_ms']['p95']}/{level['ttft_ms']['p99']} ms "
+        f"replies/s={level['replies_per_s']} dropped={level['dropped_streams']} "
+        f"errors={level['errors']} rss+={level['rss_growth_kb']} KiB"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES, help="async modes to compare")
+    parser.add_argument("--clients", nargs="+", type=int, default=[1, 8, 32, 64], help="Socket.IO clients per level")
+    parser.add_argument("--http-clients", type=int, default=0, help="concurrent /reply clients per level")
+    parser.add_argument("--requests", type=int, default=3, help="prompts per client per level")
+    parser.add_argument("--thinking", type=int, default=64, help="thinking deltas per fake reply")
+    parser.add_argument("--text", type=int, default=256, help="text deltas per fake reply")
+    parser.add_argument("--delay", type=float, default=0.005, help="seconds per fake delta")
+    parser.add_argument("--ttft", type=float, default=0.05, help="fake upstream time to first delta")
+    parser.add_argument("--upstream", help="use an already running fake upstream at this base URL")
+    parser.add_argument("--mock", action="store_true", help="use MockStreamer in the server instead of an upstream")
+    parser.add_argument("--window-ms", type=float, default=30.0, help="FlaskWebUI coalescing window")
+    parser.add_argument("--timeout", type=float, default=120.0, help="client socket timeout")
+    parser.add_argument("--json", action="store_true", help="print machine-readable JSON only")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    upstream_server = None
+    upstream = args.upstream
+    if not upstream and not args.mock:
+        upstream_server = FakeUpstream(args.thinking, args.text, args.delay, args.ttft).start()
+        upstream = upstream_server.base_url
+
+    try:
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "cpus": os.cpu_count(),
+            "config": vars(args),
+            "modes": [run_mode(mode, args, upstream) for mode in args.modes],
+        }
+    finally:
+        if upstream_server is not None:
+            upstream_server.stop()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    if args.json:
+        print(text)
+    else:
+        for mode in report["modes"]:
+            if "skipped" in mode:
+                print(f"{mode['mode']:>9} skipped: {mode['skipped']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
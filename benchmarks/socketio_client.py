@@ -0,0 +1,107 @@
+"""Minimal Socket.IO client over Engine.IO long-polling, for benchmarks.
+
+Uses only `http.client`, so the benchmarks need no client library (the
+python-socketio client requires `requests` or `websocket-client`). Every
+received packet is timestamped on arrival, which is what latency
+measurements need. Only what the chat UI uses is implemented: connecting
+to the default namespace, emitting events and receiving events.
+"""
+from __future__ import annotations
+
+import http.client
+import json
+import time
+from typing import Any, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Engine.IO v4 packet types
+_EIO_OPEN, _EIO_CLOSE, _EIO_PING, _EIO_PONG, _EIO_MESSAGE = "0", "1", "2", "3", "4"
+# Socket.IO v5 packet types (inside an Engine.IO message)
+_SIO_CONNECT, _SIO_EVENT = "0", "2"
+_SEPARATOR = "\x1e"
+
+
+class PollingClient:
+    """One Socket.IO connection using the polling transport."""
+
+    def __init__(self, url: str, path: str = "/socket.io/", timeout: float = 60.0):
+        """Prepare a client for the server at `url` (e.g. http://127.0.0.1:5000)."""
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.path = path
+        self.timeout = timeout
+        self.sid: Optional[str] = None
+        self.cookie: Optional[str] = None
+        self.bytes_received = 0
+        self._conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+        self._backlog: List[Tuple[float, str, Any]] = []
+
+    def _url(self) -> str:
+        url = f"{self.path}?EIO=4&transport=polling&t={time.monotonic_ns()}"
+        if self.sid:
+            url += f"&sid={self.sid}"
+        return url
+
+    def _request(self, method: str, body: Optional[str] = None) -> str:
+        headers = {"Content-Type": "text/plain;charset=UTF-8"}
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        self._conn.request(method, self._url(), body=body, headers=headers)
+        resp = self._conn.getresponse()
+        data = resp.read()
+        if resp.status != 200:
+            raise ConnectionError(f"{method} polling request failed: HTTP {resp.status}")
+        cookie = resp.getheader("Set-Cookie")
+        if cookie:
+            self.cookie = cookie.split(";", 1)[0]
+        self.bytes_received += len(data)
+        return data.decode("utf-8")
+
+    def connect(self) -> None:
+        """Open the Engine.IO session and join the default namespace."""
+        packets = self._request("GET").split(_SEPARATOR)
+        handshake = json.loads(packets[0][1:])
+        self.sid = handshake["sid"]
+        self._request("POST", _EIO_MESSAGE + _SIO_CONNECT)
+        # Wait for the namespace CONNECT acknowledgement.
+        for _ in self._poll():
+            pass
+
+    def emit(self, event: str, data: Any = None) -> None:
+        """Send a Socket.IO event to the server."""
+        payload = json.dumps([event] if data is None else [event, data], separators=(",", ":"))
+        self._request("POST", _EIO_MESSAGE + _SIO_EVENT + payload)
+
+    def _poll(self) -> Iterator[Tuple[float, str, Any]]:
+        """Long-poll once and yield `(arrival_time, event, data)` tuples."""
+        body = self._request("GET")
+        arrived = time.perf_counter()
+        for packet in body.split(_SEPARATOR):
+            if not packet:
+                continue
+            kind = packet[0]
+            if kind == _EIO_PING:
+                self._request("POST", _EIO_PONG)
+            elif kind == _EIO_CLOSE:
+                raise ConnectionError("server closed the session")
+            elif kind == _EIO_MESSAGE and packet[1:2] == _SIO_EVENT:
+                args = json.loads(packet[2:])
+                yield arrived, args[0], args[1] if len(args) > 1 else None
+
+    def receive(self) -> Iterator[Tuple[float, str, Any]]:
+        """Yield received events as `(perf_counter_time, event, data)`, forever."""
+        while True:
+            while self._backlog:
+                yield self._backlog.pop(0)
+            self._backlog.extend(self._poll())
+
+    def close(self) -> None:
+        """Close the Engine.IO session."""
+        try:
+            if self.sid:
+                self._request("POST", _EIO_CLOSE)
+        except (OSError, ConnectionError, http.client.HTTPException):
+            pass
+        finally:
+            self._conn.close()
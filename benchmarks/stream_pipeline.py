@@ -0,0 +1,431 @@
+"""Benchmark the streaming pipeline: streamer -> viewer -> Socket.IO.
+
+Measures, without any network access:
+- models:    per-event cost of building StreamChunk/StreamEvent, validated
+             and via `schemas.construct` (the hot-path form)
+- serialize: per-event cost of `ev.dict()`, `ev.json()` and `encode_event`
+- consume:   `StreamViewer._consume_events` throughput: silent, printing
+             to /dev/null through the frame buffer, and unbuffered
+             (flush per fragment)
+- streamer:  the real `Streamer` (SDK + HTTP pool) against the fake
+             upstream in `fake_upstream.py`: TTFT and events/sec
+- socketio:  end-to-end `FlaskWebUI` with N concurrent Socket.IO clients:
+             frames/sec, TTFT percentiles and time to completion
+- compression: bytes on the wire and CPU cost for a thinking-model reply
+             (`MockStreamer`, --compress-thinking/--compress-text tokens):
+             the `/reply` JSON body with gzip and brotli (if installed),
+             and the per-delta `stream_chunk` frames with WebSocket
+             permessage-deflate (one deflate stream per connection)
+
+Results are written as JSON: a flat `metrics` object mapping names to
+`{"value", "unit", "better"}`. Comparing against a saved run flags every
+metric that got worse by more than `--tolerance` and exits non-zero, so a
+release check can be as simple as:
+
+  python benchmarks/stream_pipeline.py --output bench.json
+  python benchmarks/stream_pipeline.py --compare bench.json
+
+Usage:
+  python benchmarks/stream_pipeline.py [--only models consume ...] [--events 20000]
+      [--clients 8] [--output results.json] [--compare baseline.json] [--tolerance 0.2]
+      [--compress-thinking 2000] [--compress-text 600]
+
+Run from the project root.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from ai_client import (  # noqa: E402
+    MockStreamer,
+    Streamer,
+    StreamerConfig,
+    StreamViewer,
+    encode_event,
+    decode_event,
+)
+from fake_upstream import FakeUpstream  # noqa: E402
+from schemas import Message, StreamChunk, StreamEvent, construct  # noqa: E402
+from socketio_client import PollingClient  # noqa: E402
+
+SECTIONS = ["models", "serialize", "consume", "streamer", "socketio", "compression"]
+
+Metrics = Dict[str, Dict[str, Any]]
+
+
+def _metric(value: float, unit: str, better: str) -> Dict[str, Any]:
+    return {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def _per_op_ns(fn: Callable[[], None], n: int, repeat: int = 5) -> float:
+    """Best-of-`repeat` cost of one call, `fn` being called `n` times per run."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / n * 1e9
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def _sample_events(n: int) -> List[StreamEvent]:
+    """A stream of `n` single-token events, a quarter of them thinking."""
+    events = []
+    for i in range(n):
+        thinking = i < n // 4
+        chunk = construct(
+            StreamChunk,
+            text=None if thinking else "word%d " % i,
+            index=i,
+            delta=None,
+            role="assistant",
+            thinking="think%d " % i if thinking else None,
+        )
+        events.append(construct(StreamEvent, chunks=[chunk], event_id=None, is_final=False, error=None))
+    events.append(StreamEvent(chunks=[], is_final=True))
+    return events
+
+
+def bench_models(n: int) -> Metrics:
+    def validated() -> None:
+        StreamEvent(
+            chunks=[StreamChunk(text="word ", index=1, role="assistant")],
+            event_id=None,
+            is_final=False,
+        )
+
+    def constructed() -> None:
+        sc = construct(StreamChunk, text="word ", index=1, delta=None, role="assistant", thinking=None)
+        construct(StreamEvent, chunks=[sc], event_id=None, is_final=False, error=None)
+
+    return {
+        "models.validated_ns": _metric(_per_op_ns(validated, n), "ns/event", "lower"),
+        "models.construct_ns": _metric(_per_op_ns(constructed, n), "ns/event", "lower"),
+    }
+
+
+def bench_serialize(n: int) -> Metrics:
+    ev = _sample_events(2)[1]
+    compact = encode_event(ev)
+    return {
+        "serialize.dict_ns": _metric(_per_op_ns(ev.dict, n), "ns/event", "lower"),
+        "serialize.json_ns": _metric(_per_op_ns(ev.json, n), "ns/event", "lower"),
+        "serialize.encode_event_ns": _metric(
+            _per_op_ns(lambda: encode_event(ev), n), "ns/event", "lower"
+        ),
+        "serialize.decode_event_ns": _metric(
+            _per_op_ns(lambda: decode_event(compact), n), "ns/event", "lower"
+        ),
+    }
+
+
+def bench_consume(n: int) -> Metrics:
+    events = _sample_events(n)
+    results = {}
+    for label, printing, interval in (
+        ("silent", False, 0.0),
+        ("print", True, 0.05),
+        ("print_unbuffered", True, 0.0),
+    ):
+        best = float("inf")
+        for _ in range(3):
+            with open(os.devnull, "w") as sink:
+                start = time.perf_counter()
+                StreamViewer._consume_events(
+                    events, True, printing, stream=sink, frame_interval=interval
+                )
+                best = min(best, time.perf_counter() - start)
+        results[f"consume.{label}_events_per_s"] = _metric(len(events) / best, "events/s", "higher")
+    return results
+
+
+def _streamer(upstream: FakeUpstream, max_connections: int = 100) -> Streamer:
+    config = StreamerConfig(
+        base_url=upstream.base_url,
+        api_key="benchmark",
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+        max_retries=0,
+    )
+    return Streamer(config, metrics=None)
+
+
+def bench_streamer(upstream: FakeUpstream, runs: int) -> Metrics:
+    streamer = _streamer(upstream)
+    messages = [Message(role="user", text="benchmark")]
+    # Warm up: SDK import and connection setup are not what we measure here.
+    list(streamer.stream_response(messages))
+
+    ttfts, rates = [], []
+    for _ in range(runs):
+        final = list(streamer.stream_response(messages))[-1]
+        if final.error:
+            raise RuntimeError(f"streamer failed: {final.error}")
+        ttfts.append(min(t for t in (final.metrics.ttft_thinking, final.metrics.ttft_visible) if t is not None))
+        rates.append(final.metrics.tokens / final.metrics.duration)
+    return {
+        "streamer.ttft_ms_p50": _metric(statistics.median(ttfts) * 1000, "ms", "lower"),
+        "streamer.events_per_s": _metric(statistics.median(rates), "events/s", "higher"),
+    }
+
+
+def _run_client(url: str, prompt: str, out: List[Dict[str, Any]]) -> None:
+    """Send one prompt and record frame arrival times until stream_complete."""
+    client = PollingClient(url)
+    try:
+        client.connect()
+        sent = time.perf_counter()
+        client.emit("start_stream", {"prompt": prompt})
+        first = first_visible = None
+        frames = 0
+        error = None
+        for arrived, event, data in client.receive():
+            if event == "stream_chunk":
+                frames += 1
+                if first is None:
+                    first = arrived - sent
+                ev = decode_event(data)
+                if ev.is_final and ev.error:
+                    # A failed stream still ends with stream_complete.
+                    error = ev.error
+                if first_visible is None and any(c.text for c in ev.chunks):
+                    first_visible = arrived - sent
+            elif event in ("stream_complete", "stream_error"):
+                if event == "stream_error":
+                    error = str(data)
+                out.append({
+                    "ttft": first,
+                    "ttft_visible": first_visible,
+                    "total": arrived - sent,
+                    "frames": frames,
+                    "bytes": client.bytes_received,
+                    "ok": error is None,
+                    "error": error,
+                })
+                return
+    finally:
+        client.close()
+
+
+def bench_socketio(upstream: FakeUpstream, clients: int, window_ms: float) -> Metrics:
+    from werkzeug.serving import make_server
+
+    from ui import FlaskWebUI
+
+    ui = FlaskWebUI(streamer=_streamer(upstream, clients * 2), coalesce_window_ms=window_ms)
+    server = make_server("127.0.0.1", 0, ui.get_app(), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    results: List[Dict[str, Any]] = []
+    # The UI prints every prompt it sends upstream; keep that off the report.
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        _run_client(url, "warm up", [])
+        threads = [
+            threading.Thread(target=_run_client, args=(url, f"client {i}", results))
+            for i in range(clients)
+        ]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - start
+    server.shutdown()
+
+    ok = [r for r in results if r["ok"] and r["ttft"] is not None]
+    if not ok:
+        errors = sorted({r["error"] for r in results if r["error"]})
+        raise RuntimeError("no Socket.IO client completed a stream: " + "; ".join(errors[:3]))
+    ttfts = [r["ttft"] for r in ok]
+    visible = [r["ttft_visible"] for r in ok if r["ttft_visible"] is not None]
+    frames = sum(r["frames"] for r in ok)
+    return {
+        "socketio.clients_ok": _metric(len(ok), "clients", "higher"),
+        "socketio.errors": _metric(clients - len(ok), "clients", "lower"),
+        "socketio.frames_per_s": _metric(frames / wall, "frames/s", "higher"),
+        "socketio.frames_per_stream": _metric(frames / len(ok), "frames", "lower"),
+        "socketio.bytes_per_stream": _metric(
+            sum(r["bytes"] for r in ok) / len(ok), "bytes", "lower"
+        ),
+        "socketio.ttft_ms_p50": _metric(_percentile(ttfts, 0.5) * 1000, "ms", "lower"),
+        "socketio.ttft_ms_p95": _metric(_percentile(ttfts, 0.95) * 1000, "ms", "lower"),
+        "socketio.ttft_visible_ms_p95": _metric(
+            _percentile(visible, 0.95) * 1000 if visible else 0.0, "ms", "lower"
+        ),
+        "socketio.complete_ms_p95": _metric(
+            _percentile([r["total"] for r in ok], 0.95) * 1000, "ms", "lower"
+        ),
+    }
+
+
+def _best_seconds(fn: Callable[[], Any], repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _permessage_deflate(frames: List[bytes]) -> int:
+    """Bytes of `frames` compressed like WebSocket permessage-deflate.
+
+    One raw deflate stream per connection (context takeover), each message
+    flushed with Z_SYNC_FLUSH and its 4-byte trailer dropped (RFC 7692).
+    """
+    deflate = zlib.compressobj(6, zlib.DEFLATED, -15)
+    total = 0
+    for frame in frames:
+        total += len(deflate.compress(frame) + deflate.flush(zlib.Z_SYNC_FLUSH)) - 4
+    return total
+
+
+def bench_compression(thinking: int, text: int) -> Metrics:
+    from ui.compression import ResponseCompressor
+
+    events = list(
+        MockStreamer(thinking_tokens=thinking, text_tokens=text, token_delay=0, metrics=None)
+        .stream_response([])
+    )
+    agg = StreamViewer.aggregate(iter(events), show_thinking=True)
+    reply = json.dumps({
+        "thinking": agg["thinking"],
+        "text": agg["text"],
+        "assistant_text": agg["text"],
+        "messages": [
+            Message(role="user", text="benchmark", rev=1).dict(),
+            Message(role="assistant", text=agg["text"], rev=2).dict(),
+        ],
+        "rev": 2,
+    }).encode("utf-8")
+    # Socket.IO text frame as sent per delta: 42["stream_chunk",{...}]
+    frames = [
+        ('42["stream_chunk",' + json.dumps(encode_event(ev), separators=(",", ":")) + "]").encode("utf-8")
+        for ev in events
+    ]
+
+    compressor = ResponseCompressor()
+    results: Metrics = {
+        "compression.reply_raw_bytes": _metric(len(reply), "bytes", "lower"),
+        "compression.frames_raw_bytes": _metric(sum(map(len, frames)), "bytes", "lower"),
+    }
+    for encoding in compressor.encodings:
+        size = len(compressor.compress(reply, encoding))
+        seconds = _best_seconds(lambda: compressor.compress(reply, encoding))
+        results[f"compression.reply_{encoding}_bytes"] = _metric(size, "bytes", "lower")
+        results[f"compression.reply_{encoding}_ratio"] = _metric(len(reply) / size, "x", "higher")
+        results[f"compression.reply_{encoding}_ms"] = _metric(seconds * 1000, "ms", "lower")
+
+    deflated = _permessage_deflate(frames)
+    seconds = _best_seconds(lambda: _permessage_deflate(frames))
+    results["compression.frames_deflate_bytes"] = _metric(deflated, "bytes", "lower")
+    results["compression.frames_deflate_ratio"] = _metric(
+        sum(map(len, frames)) / deflated, "x", "higher"
+    )
+    results["compression.frames_deflate_us_per_frame"] = _metric(
+        seconds / len(frames) * 1e6, "us/frame", "lower"
+    )
+    return results
+
+
+def compare(current: Metrics, baseline: Metrics, tolerance: float) -> List[str]:
+    """Return a description of every metric that regressed beyond `tolerance`."""
+    regressions = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if not base or not base["value"]:
+            continue
+        change = (cur["value"] - base["value"]) / base["value"]
+        worse = change > tolerance if cur["better"] == "lower" else change < -tolerance
+        if worse:
+            regressions.append(
+                f"{name}: {base['value']} -> {cur['value']} {cur['unit']} ({change:+.0%})"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=SECTIONS, default=SECTIONS, help="sections to run")
+    parser.add_argument("--events", type=int, default=20000, help="events per micro-benchmark")
+    parser.add_argument("--runs", type=int, default=10, help="streams for the streamer section")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent Socket.IO clients")
+    parser.add_argument("--thinking", type=int, default=64, help="thinking deltas per fake reply")
+    parser.add_argument("--text", type=int, default=256, help="text deltas per fake reply")
+    parser.add_argument("--delay", type=float, default=0.0, help="fake upstream seconds per delta")
+    parser.add_argument("--window-ms", type=float, default=30.0, help="FlaskWebUI coalescing window")
+    parser.add_argument(
+        "--compress-thinking", type=int, default=2000, help="thinking tokens in the compression reply"
+    )
+    parser.add_argument(
+        "--compress-text", type=int, default=600, help="text tokens in the compression reply"
+    )
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    metrics: Metrics = {}
+    if "models" in args.only:
+        metrics.update(bench_models(args.events))
+    if "serialize" in args.only:
+        metrics.update(bench_serialize(args.events))
+    if "consume" in args.only:
+        metrics.update(bench_consume(args.events))
+    if "streamer" in args.only or "socketio" in args.only:
+        with FakeUpstream(args.thinking, args.text, args.delay) as upstream:
+            if "streamer" in args.only:
+                metrics.update(bench_streamer(upstream, args.runs))
+            if "socketio" in args.only:
+                metrics.update(bench_socketio(upstream, args.clients, args.window_ms))
+    if "compression" in args.only:
+        metrics.update(bench_compression(args.compress_thinking, args.compress_text))
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "metrics": metrics,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))["metrics"]
+        regressions = compare(metrics, baseline, args.tolerance)
+        for line in regressions:
+            print("REGRESSION " + line, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -9,15 +9,34 @@ Place this file in your project root and run it. By default it:
 
 Usage:
   python collect_code.py [--root PATH] [--output code.txt] [--exclude NAME ...] [--ext .py .pyi]
+                         [--incremental] [--jobs N] [--max-bytes N | --max-tokens N]
+                         [--max-file-bytes N]
 
 The output will contain simple separators with the relative path for each file.
+
+Files are read in parallel and the output is streamed to disk, so memory
+use does not grow with the tree. With --incremental a manifest
+(`<output>.manifest.json`) records each file's mtime, size and content
+hash and where its section sits in the output; the next run only reads
+files whose mtime or size changed, copies the other sections from the
+previous output, and does not rewrite the output at all when nothing
+changed.
+
+--max-bytes / --max-tokens cap the whole output (files that no longer fit
+are omitted and counted at the end); --max-file-bytes truncates single
+large files.
 """
 from __future__ import annotations
 
 import argparse
+import hashlib
+import itertools
+import json
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable, List, Set
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, TypeVar
 
 
 DEFAULT_EXCLUDES: Set[str] = {
@@ -32,6 +51,15 @@ DEFAULT_EXCLUDES: Set[str] = {
     ".mypy_cache",
 }
 
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIX = ".manifest.json"
+
+# Rough size of a token in characters, used to turn --max-tokens into bytes.
+CHARS_PER_TOKEN = 4
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
 
 def find_files(root: Path, extensions: Iterable[str], excludes: Set[str], output_path: Path) -> List[Path]:
     """Walk root and return a list of file Paths matching extensions while skipping excluded dirs.
@@ -44,6 +72,7 @@ def find_files(root: Path, extensions: Iterable[str], excludes: Set[str], output
     matches: List[Path] = []
     root = root.resolve()
     out_name = output_path.resolve()
+    manifest_name = manifest_path_for(output_path).resolve()
 
     script_path = Path(__file__).resolve()
 
@@ -56,10 +85,10 @@ def find_files(root: Path, extensions: Iterable[str], excludes: Set[str], output
 
         for fn in filenames:
             p = Path(dirpath) / fn
-            # Skip the output file itself and this script file
+            # Skip the output file, its manifest and this script file
             try:
                 resolved = p.resolve()
-                if resolved == out_name or resolved == script_path:
+                if resolved in (out_name, manifest_name, script_path):
                     continue
             except Exception:
                 # resolution problems -> skip the comparison
@@ -72,46 +101,265 @@ def find_files(root: Path, extensions: Iterable[str], excludes: Set[str], output
     return matches
 
 
-def write_aggregated(files: List[Path], root: Path, out: Path) -> None:
-    """Write all files to out, with simple headers separating them."""
+def manifest_path_for(out: Path) -> Path:
+    """Return the manifest path used for output file `out`."""
+    return out.with_name(out.name + MANIFEST_SUFFIX)
+
+
+def _relative(p: Path, root: Path) -> str:
+    try:
+        return str(p.resolve().relative_to(root))
+    except Exception:
+        return str(p.resolve())
+
+
+def _encode(text: str) -> bytes:
+    """Encode output text like a text-mode write (platform line endings)."""
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)
+    return text.encode("utf-8", errors="replace")
+
+
+def _render_section(rel: str, content: str) -> bytes:
+    """Return one file's section of the output, header included."""
+    header = f"### FILE: {rel}\n" + "### " + "-" * 70 + "\n"
+    return _encode(header + content + "\n\n")
+
+
+def _decode(raw: bytes, max_file_bytes: Optional[int]) -> str:
+    """Decode file bytes like a text-mode read, truncating past `max_file_bytes`."""
+    omitted = 0
+    if max_file_bytes is not None and len(raw) > max_file_bytes:
+        omitted = len(raw) - max_file_bytes
+        raw = raw[:max_file_bytes]
+    text = raw.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+    if omitted:
+        text += f"\n# ... TRUNCATED: {omitted} more bytes\n"
+    return text
+
+
+def _scan_file(
+    p: Path, rel: str, previous: Optional[Dict[str, Any]], max_file_bytes: Optional[int]
+) -> Tuple[Dict[str, Any], Optional[bytes]]:
+    """Return a file's manifest entry and, unless its section can be reused, the new section.
+
+    A file whose mtime and size match `previous` is not read. A changed
+    file is read and hashed; if only its timestamp changed, the previous
+    section is still reused.
+    """
+    try:
+        st = p.stat()
+        if previous and previous["mtime_ns"] == st.st_mtime_ns and previous["size"] == st.st_size:
+            return previous, None
+        raw = p.read_bytes()
+    except OSError as e:
+        entry = {"mtime_ns": None, "size": None, "sha256": None}
+        return entry, _render_section(rel, f"# FAILED TO READ: {e}\n")
+
+    digest = hashlib.sha256(raw).hexdigest()
+    entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest}
+    if previous and previous["sha256"] == digest:
+        entry.update(offset=previous["offset"], length=previous["length"])
+        return entry, None
+    return entry, _render_section(rel, _decode(raw, max_file_bytes))
+
+
+def _parallel_ordered(fn: Callable[[_T], _R], items: Iterable[_T], workers: int) -> Iterator[_R]:
+    """Yield `fn(item)` in input order, computing up to a few results per worker ahead.
+
+    Unlike `Executor.map`, work is submitted through a bounded window, so
+    results waiting to be consumed do not accumulate for the whole tree.
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(fn, item) for item in itertools.islice(items, workers * 4))
+        while pending:
+            result = pending.popleft().result()
+            for item in itertools.islice(items, 1):
+                pending.append(pool.submit(fn, item))
+            yield result
+
+
+def _load_manifest(path: Path, out: Path, options: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Return the file entries of a manifest that still describes `out`, else {}."""
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        st = out.stat()
+    except (OSError, ValueError):
+        return {}
+    if (
+        manifest.get("version") != MANIFEST_VERSION
+        or manifest.get("options") != options
+        or manifest.get("output") != {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+    ):
+        # Written with other settings, or the output was edited since.
+        return {}
+    return manifest.get("files", {})
+
+
+def _up_to_date(files: List[Path], rels: List[str], previous: Dict[str, Dict[str, Any]]) -> bool:
+    """True if the manifest matches `files` exactly, judged by stat alone."""
+    if rels != list(previous):
+        return False
+    for p, rel in zip(files, rels):
+        entry = previous[rel]
+        try:
+            st = p.stat()
+        except OSError:
+            return False
+        if entry["mtime_ns"] != st.st_mtime_ns or entry["size"] != st.st_size:
+            return False
+    return True
+
+
+def write_aggregated(
+    files: List[Path],
+    root: Path,
+    out: Path,
+    jobs: Optional[int] = None,
+    incremental: bool = False,
+    max_bytes: Optional[int] = None,
+    max_file_bytes: Optional[int] = None,
+) -> Dict[str, int]:
+    """Write all files to out, with simple headers separating them.
+
+    - jobs: reader threads (default: a few per CPU, files are I/O bound)
+    - incremental: reuse unchanged sections through the manifest
+    - max_bytes: output size cap; files that do not fit are omitted
+    - max_file_bytes: per-file cap; longer files are truncated
+
+    Returns counts: files `written` to the output, split into `read` and
+    `reused` (unchanged sections copied from the previous output), files
+    `omitted` by the output cap, and output `bytes`.
+    """
     root = root.resolve()
-    with out.open("w", encoding="utf-8", errors="replace") as fh:
-        for p in files:
-            try:
-                rel = p.resolve().relative_to(root)
-            except Exception:
-                rel = p.resolve()
+    jobs = jobs or min(32, (os.cpu_count() or 1) * 4)
+    manifest_path = manifest_path_for(out)
+    options = {"max_file_bytes": max_file_bytes}
+    previous = _load_manifest(manifest_path, out, options) if incremental else {}
+    rels = [_relative(p, root) for p in files]
+    stats = {"written": 0, "read": 0, "reused": 0, "omitted": 0, "bytes": 0}
 
-            fh.write(f"### FILE: {rel}\n")
-            fh.write("### " + "-" * 70 + "\n")
-            try:
-                with p.open("r", encoding="utf-8", errors="replace") as src:
-                    fh.write(src.read())
-            except OSError as e:
-                fh.write(f"# FAILED TO READ: {e}\n")
-            fh.write("\n\n")
+    if previous and max_bytes is None and _up_to_date(files, rels, previous):
+        stats.update(written=len(files), reused=len(files), bytes=out.stat().st_size)
+        return stats
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    old = out.open("rb") if previous else None
+    # Built next to the output and swapped in at the end, so readers never
+    # see a half-written file.
+    tmp_name = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_name, "wb") as fh:
+            scans = _parallel_ordered(
+                lambda item: _scan_file(item[0], item[1], previous.get(item[1]), max_file_bytes),
+                zip(files, rels),
+                jobs,
+            )
+            for rel, (entry, section) in zip(rels, scans):
+                reused = section is None
+                if reused:
+                    old.seek(entry["offset"])
+                    section = old.read(entry["length"])
+                if max_bytes is not None and stats["bytes"] + len(section) > max_bytes:
+                    break
+                entry = dict(entry, offset=stats["bytes"], length=len(section))
+                fh.write(section)
+                stats["bytes"] += len(section)
+                stats["written"] += 1
+                stats["reused" if reused else "read"] += 1
+                if entry["sha256"] is not None:
+                    entries[rel] = entry
+            stats["omitted"] = len(files) - stats["written"]
+            if stats["omitted"]:
+                fh.write(
+                    _encode(
+                        f"### OMITTED: {stats['omitted']} more files "
+                        f"(output budget of {max_bytes} bytes reached)\n"
+                    )
+                )
+        if old is not None:
+            old.close()
+            old = None
+        os.replace(tmp_name, out)
+    except BaseException:
+        if old is not None:
+            old.close()
+        try:
+            os.remove(tmp_name)
+        except OSError:
+            pass
+        raise
+
+    if incremental:
+        st = out.stat()
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "options": options,
+            "output": {"mtime_ns": st.st_mtime_ns, "size": st.st_size},
+            "files": entries,
+        }
+        manifest_path.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    return stats
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Collect source files into a single text file.")
+    parser.add_argument("--root", default=os.getcwd(), help="directory to search (default: cwd)")
+    parser.add_argument("--output", default="code.txt", help="output file (default: code.txt)")
+    parser.add_argument(
+        "--exclude", nargs="*", default=[], metavar="NAME", help="extra directory names to skip"
+    )
+    parser.add_argument("--ext", nargs="*", default=[".py"], help="extensions to collect (default: .py)")
+    parser.add_argument(
+        "--incremental", action="store_true", help="only re-read files changed since the last run"
+    )
+    parser.add_argument("--jobs", type=int, help="reader threads")
+    budget = parser.add_mutually_exclusive_group()
+    budget.add_argument("--max-bytes", type=int, help="cap the output size")
+    budget.add_argument(
+        "--max-tokens", type=int, help=f"cap the output at about N tokens ({CHARS_PER_TOKEN} bytes each)"
+    )
+    parser.add_argument("--max-file-bytes", type=int, help="truncate files longer than this")
+    return parser.parse_args()
 
 
 def main() -> int:
-    """Run the collector with zero args:
+    """Run the collector; with no arguments:
 
     - root: current working directory
     - output: code.txt in cwd (overwritten)
     - extensions: .py only
     - excludes: DEFAULT_EXCLUDES plus output filename
     """
-    root = Path(os.getcwd())
-    out = Path("code.txt")
+    args = _parse_args()
+    root = Path(args.root)
+    out = Path(args.output)
 
-    excludes = set(DEFAULT_EXCLUDES)
+    excludes = set(DEFAULT_EXCLUDES) | set(args.exclude)
     excludes.add(out.name)
 
-    exts = {".py"}
+    exts = {e.lower() if e.startswith(".") else "." + e.lower() for e in args.ext}
+
+    max_bytes = args.max_bytes
+    if args.max_tokens is not None:
+        max_bytes = args.max_tokens * CHARS_PER_TOKEN
 
     files = find_files(root, exts, excludes, out)
-    write_aggregated(files, root, out)
+    stats = write_aggregated(
+        files,
+        root,
+        out,
+        jobs=args.jobs,
+        incremental=args.incremental,
+        max_bytes=max_bytes,
+        max_file_bytes=args.max_file_bytes,
+    )
 
-    print(f"Wrote {len(files)} files to {out}")
+    summary = f"Wrote {stats['written']} files to {out} ({stats['read']} read, {stats['reused']} unchanged)"
+    if stats["omitted"]:
+        summary += f"; omitted {stats['omitted']} files over the output budget"
+    print(summary)
     return 0
 
 
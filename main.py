@@ -1,10 +1,14 @@
-from ai_client import Streamer, StreamViewer
+from ai_client import Streamer, StreamViewer, ContextWindow
 from schemas import Message
 
 
 def main() -> None:
     # Start conversation with a system instruction
     messages = [Message(role="system", text="You are Kimi.")]
+    # Keep the prompt within a fixed token budget as the chat grows
+    context_window = ContextWindow()
+    # One streamer (and connection pool) for the whole session
+    streamer = Streamer()
 
     print("Interactive prompt. Type 'q' to quit.")
     while True:
@@ -19,15 +23,16 @@ def main() -> None:
         messages.append(Message(role="user", text=prompt))
 
         # Show the messages that will be sent to the streaming API
+        prompt_messages = context_window.fit(messages)
         print("\nMessages sent to streamer:")
-        for m in messages:
+        for m in prompt_messages:
             try:
                 print(m.dict())
             except Exception:
                 print(str(m))
 
         # Stream the response and render + aggregate
-        stream_response = Streamer.stream_response(messages)
+        stream_response = streamer.stream_response(prompt_messages)
         agg = StreamViewer.render_and_aggregate(stream_response, show_thinking=True)
 
         # Extract aggregated visible text and add as assistant message
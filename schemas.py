@@ -1,9 +1,23 @@
-from typing import Optional, List, Union
+from typing import Any, Dict, Optional, List, Type, TypeVar, Union
 from pydantic import BaseModel, Field
 from datetime import datetime
 import uuid
 
 
+_ModelT = TypeVar("_ModelT", bound=BaseModel)
+
+
+def construct(model: Type[_ModelT], **values: Any) -> _ModelT:
+    """Build a model instance without running validation.
+
+    Used on the per-token streaming hot path, where field values are already
+    known to be well-typed and validating every delta would dominate the
+    cost. Works with pydantic 2 (`model_construct`) and 1 (`construct`).
+    """
+    build = getattr(model, "model_construct", None) or model.construct
+    return build(**values)
+
+
 class StreamChunk(BaseModel):
     """A single chunk (token or text fragment) emitted by the streaming API.
 
@@ -34,6 +48,35 @@ class StreamChunk(BaseModel):
     )
 
 
+class StreamMetrics(BaseModel):
+    """Latency and throughput measurements for one completed stream.
+
+    Times are in seconds, measured from the moment the request was issued.
+    Token counts assume one upstream delta per token, which holds for the
+    OpenAI-compatible streaming APIs used here.
+    """
+
+    started_at: float = Field(..., description="Request start as a UNIX timestamp")
+    duration: float = Field(..., description="Total stream duration")
+    ttft_thinking: Optional[float] = Field(
+        None, description="Time to the first thinking token (None if the model did not think)"
+    )
+    ttft_visible: Optional[float] = Field(
+        None, description="Time to the first visible text token"
+    )
+    tokens: int = Field(0, description="Number of streamed tokens (deltas with text or thinking)")
+    tokens_per_second: Optional[float] = Field(
+        None, description="Tokens per second from the first token to the end of the stream"
+    )
+    gap_p50: Optional[float] = Field(None, description="Median gap between consecutive tokens")
+    gap_p95: Optional[float] = Field(None, description="95th percentile gap between tokens")
+    gap_max: Optional[float] = Field(None, description="Largest gap between tokens")
+    gap_histogram: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Inter-token gap counts per bucket, keyed by the bucket's upper bound",
+    )
+
+
 class StreamEvent(BaseModel):
     """A richer event wrapper for stream messages.
 
@@ -44,6 +87,19 @@ class StreamEvent(BaseModel):
     event_id: Optional[str] = Field(None, description="An optional event identifier")
     is_final: bool = Field(False, description="True if this event completes the stream")
     error: Optional[str] = Field(None, description="Error message if the event represents an error")
+    cancelled: bool = Field(
+        False, description="True on the final event of a stream that was cancelled by the consumer"
+    )
+    metrics: Optional[StreamMetrics] = Field(
+        None, description="Timing measurements, attached to the final event of a stream"
+    )
+    retryable: bool = Field(
+        False,
+        description=(
+            "True on a final error event caused by a transient failure (connection "
+            "reset, timeout, 429 or 5xx) that may succeed if the request is repeated"
+        ),
+    )
 
 
 class Message(BaseModel):
@@ -54,4 +110,31 @@ class Message(BaseModel):
     """
     role: str = Field(..., description="Role such as 'user' or 'assistant'")
     text: str = Field(..., description="Decoded text content of the message")
+    id: str = Field(
+        default_factory=lambda: uuid.uuid4().hex,
+        description="Stable unique identifier for this message",
+    )
+    rev: Optional[int] = Field(
+        None,
+        description=(
+            "Monotonically increasing revision assigned by the conversation store "
+            "when the message is appended. Clients pass the highest revision they "
+            "have seen to fetch only newer messages."
+        ),
+    )
+    tokens: Optional[int] = Field(
+        None,
+        description=(
+            "Cached prompt token count of this message, filled in lazily by the "
+            "context window so long histories are not re-tokenized every turn."
+        ),
+    )
+    partial: bool = Field(
+        False,
+        description=(
+            "Marks a trailing assistant message as a prefix the model should "
+            "continue rather than a finished turn (the API's partial mode). "
+            "Used to resume an interrupted reply; never stored."
+        ),
+    )
 
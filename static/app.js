@@ -2,9 +2,13 @@ document.addEventListener("DOMContentLoaded", function () {
   const form = document.getElementById("promptForm");
   const input = document.getElementById("promptInput");
   const historyDiv = document.getElementById("history");
-  let activeThinkingEl = null;
-  let activeResponseEl = null;
-  let initialMessagesRendered = false;
+  const stopButton = document.getElementById("stopButton");
+  // Assistant blocks awaiting stream_complete, oldest first. The server
+  // finishes (or cancels) a socket's previous stream before starting the
+  // next, so incoming frames always belong to the head of this queue.
+  const pending = [];
+  // Highest message revision rendered so far (server-rendered history included)
+  let lastRev = parseInt(historyDiv.dataset.rev || "0", 10);
 
   // Create WinBox windows for the two panels, if WinBox is available
   if (window.WinBox) {
@@ -64,29 +68,75 @@ document.addEventListener("DOMContentLoaded", function () {
     msgWrapper.appendChild(responseDiv);
     historyDiv.appendChild(msgWrapper);
 
-    activeResponseEl = responseDiv;
-    activeThinkingEl = thinkingDiv;
+    // streamId and lastIndex let the reply be resumed after a reconnect
+    pending.push({
+      wrapper: msgWrapper,
+      thinking: thinkingDiv,
+      response: responseDiv,
+      streamId: null,
+      lastIndex: -1,
+    });
 
-    // Emit event to start streaming over Socket.IO
+    // Emit event to start streaming over Socket.IO. If a reply is still
+    // streaming, the server cancels it and keeps its partial text.
     socket.emit("start_stream", { prompt });
   });
 
+  if (stopButton) {
+    stopButton.addEventListener("click", () => {
+      if (pending.length) socket.emit("stop_stream");
+    });
+  }
+
+  // After a reconnect, ask for the rest of the reply that was streaming.
+  // The server keeps it running for a grace period and sends only the
+  // chunks after the last index we received.
+  let connectedBefore = false;
+  socket.on("connect", () => {
+    const active = pending[0];
+    if (connectedBefore && active && active.streamId) {
+      socket.emit("resume_stream", { stream_id: active.streamId, last_index: active.lastIndex });
+    }
+    connectedBefore = true;
+  });
+
+  socket.on("stream_started", (data) => {
+    const active = pending[0];
+    if (active) active.streamId = data.stream_id;
+  });
+
   // Handle incremental stream chunks
+  // Frames use either the compact wire format ({c: [{i, t, k}], f, e}) or
+  // the full StreamEvent shape ({chunks: [{text, thinking}], is_final, error}).
   socket.on("stream_chunk", (data) => {
     try {
-      if (data.chunks) {
-        data.chunks.forEach((c) => {
-          if (c.thinking) {
-            if (activeThinkingEl) {
-              activeThinkingEl.textContent = (activeThinkingEl.textContent || "") + c.thinking;
-            }
+      const active = pending[0];
+      const activeThinkingEl = active ? active.thinking : null;
+      const activeResponseEl = active ? active.response : null;
+      const chunks = data.c || data.chunks || [];
+      chunks.forEach((c) => {
+        const index = c.i !== undefined ? c.i : c.index;
+        if (active && typeof index === "number" && index > active.lastIndex) {
+          active.lastIndex = index;
+        }
+        const thinking = c.k !== undefined ? c.k : c.thinking;
+        const text = c.t !== undefined ? c.t : c.text;
+        if (thinking) {
+          if (activeThinkingEl) {
+            activeThinkingEl.textContent = (activeThinkingEl.textContent || "") + thinking;
           }
-          if (c.text) {
-            if (activeResponseEl) {
-              activeResponseEl.textContent = activeResponseEl.textContent + c.text;
-            }
+        }
+        if (text) {
+          if (activeResponseEl) {
+            activeResponseEl.textContent = activeResponseEl.textContent + text;
           }
-        });
+        }
+      });
+
+      const error = data.e || data.error;
+      if (error && activeThinkingEl) {
+        activeThinkingEl.style.display = "block";
+        activeThinkingEl.textContent = error;
       }
     } catch (err) {
       console.error("Failed to handle stream_chunk", err, data);
@@ -96,33 +146,117 @@ document.addEventListener("DOMContentLoaded", function () {
   // Handle stream completion
   socket.on("stream_complete", (full) => {
     try {
+      const active = pending.shift();
+      const activeWrapperEl = active ? active.wrapper : null;
+
+      // The server only sends the messages appended by this turn. The
+      // assistant reply is already on screen from the streamed chunks, so
+      // only the other new messages (the user prompt) need rendering, just
+      // above the streamed reply.
       const messages = full.messages || [];
+      messages.forEach((m) => {
+        if ((m.rev || 0) <= lastRev) return;
+        if (m.role !== "assistant") {
+          renderMessage(m, activeWrapperEl);
+        } else if (activeWrapperEl) {
+          activeWrapperEl.dataset.id = m.id;
+        }
+      });
+      if (full.rev) lastRev = Math.max(lastRev, full.rev);
 
-      // On the very first completion, render any system/user messages
-      // that the server sent (initial context) once at the top.
-      if (!initialMessagesRendered) {
-        messages.forEach((m) => {
-          if (m.role === "assistant") return;
-          const el = document.createElement("div");
-          el.className = "msg-" + m.role;
-          el.innerHTML = `<strong>${m.role}:</strong> ${m.text}`;
-          historyDiv.appendChild(el);
-        });
-        initialMessagesRendered = true;
+      if (full.cancelled && activeWrapperEl) {
+        activeWrapperEl.classList.add("cancelled");
       }
 
       input.value = "";
-      activeThinkingEl = null;
-      activeResponseEl = null;
     } catch (err) {
       console.error("Failed to handle stream_complete", err, full);
     }
   });
 
+  function renderMessage(m, before) {
+    const el = document.createElement("div");
+    el.className = "msg-" + m.role;
+    el.dataset.id = m.id;
+    el.innerHTML = `<strong>${m.role}:</strong> `;
+    el.appendChild(document.createTextNode(m.text));
+    historyDiv.insertBefore(el, before || null);
+  }
+
+  // Only the most recent page of history is server-rendered. Older pages
+  // are fetched when the top of the history scrolls into view.
+  const pageSize = parseInt(historyDiv.dataset.pageSize || "50", 10);
+  let hasOlder = historyDiv.dataset.hasMore === "true";
+  let loadingOlder = false;
+  const topSentinel = document.createElement("div");
+  historyDiv.insertBefore(topSentinel, historyDiv.firstChild);
+
+  // Nearest ancestor that scrolls (the WinBox body, or the page)
+  function scrollParent(el) {
+    for (let node = el.parentElement; node; node = node.parentElement) {
+      const overflowY = getComputedStyle(node).overflowY;
+      if ((overflowY === "auto" || overflowY === "scroll") && node.scrollHeight > node.clientHeight) {
+        return node;
+      }
+    }
+    return document.scrollingElement;
+  }
+
+  async function loadOlder() {
+    const oldest = historyDiv.querySelector("[data-id]");
+    if (!hasOlder || loadingOlder || !oldest) return;
+    loadingOlder = true;
+    try {
+      const resp = await fetch(
+        `/messages?before=${encodeURIComponent(oldest.dataset.id)}&limit=${pageSize}`
+      );
+      const body = await resp.json();
+      // Keep the visible messages in place while the page is prepended
+      const scroller = scrollParent(historyDiv);
+      const fromBottom = scroller ? scroller.scrollHeight - scroller.scrollTop : 0;
+      (body.messages || []).forEach((m) => renderMessage(m, oldest));
+      if (scroller) scroller.scrollTop = scroller.scrollHeight - fromBottom;
+      hasOlder = !!body.has_more;
+      olderObserver.unobserve(topSentinel);
+      if (hasOlder) {
+        // Observing again reports the sentinel at once if it is still
+        // visible, e.g. when a short page did not fill the view.
+        olderObserver.observe(topSentinel);
+      }
+    } catch (err) {
+      console.error("Failed to load older messages", err);
+    } finally {
+      loadingOlder = false;
+    }
+  }
+
+  const olderObserver = new IntersectionObserver((entries) => {
+    if (entries.some((e) => e.isIntersecting)) loadOlder();
+  });
+  if (hasOlder) olderObserver.observe(topSentinel);
+
+  // A reply that could not be resumed is replaced by the stored messages
+  async function reloadReply(active) {
+    try {
+      const resp = await fetch(`/messages?since=${lastRev}`);
+      const body = await resp.json();
+      (body.messages || []).forEach((m) => renderMessage(m, active.wrapper));
+      if (body.rev) lastRev = Math.max(lastRev, body.rev);
+      active.wrapper.remove();
+    } catch (err) {
+      console.error("Failed to reload messages", err);
+    }
+  }
+
+  // Errors reported before a stream starts (e.g. empty prompt) end it
   socket.on("stream_error", (err) => {
-    if (activeThinkingEl) {
-      activeThinkingEl.style.display = "block";
-      activeThinkingEl.textContent = err && err.error ? err.error : "Stream error";
+    const active = pending.shift();
+    if (!active) return;
+    if (err && err.stream_id) {
+      reloadReply(active);
+      return;
     }
+    active.thinking.style.display = "block";
+    active.thinking.textContent = err && err.error ? err.error : "Stream error";
   });
 });
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from ai_client import CancelToken, StreamBroadcast
+from schemas import StreamChunk, StreamEvent
+
+
+def _events(n, cancel=None, delay=0.0, gate=None):
+    """`n` one-chunk events with indices 0..n-1, then a final event."""
+    for i in range(n):
+        if gate is not None and i == gate[0]:
+            gate[1].wait(5)
+        if cancel is not None and cancel.wait(delay):
+            yield StreamEvent(chunks=[], is_final=True, cancelled=True)
+            return
+        yield StreamEvent(chunks=[StreamChunk(index=i, text=str(i))], is_final=False)
+    yield StreamEvent(chunks=[], is_final=True)
+
+
+def _indices(items):
+    return [c.index for _, ev in items for c in ev.chunks]
+
+
+def _wait_done(broadcast, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not broadcast.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert broadcast.done
+
+
+def test_resume_after_index_has_no_gaps_or_duplicates():
+    # The producer stops after 5 events until released, so the first
+    # subscriber leaves while the stream is still live.
+    release = threading.Event()
+    broadcast = StreamBroadcast(_events(10, gate=(5, release)), idle_timeout=None)
+
+    first = []
+    for item in broadcast.subscribe():
+        first.append(item)
+        if len(first) == 5:
+            break
+    last_index = first[-1][0]
+    release.set()
+    rest = list(broadcast.subscribe(after_index=last_index))
+
+    assert _indices(first) + _indices(rest) == list(range(10))
+    assert rest[-1][1].is_final and not rest[-1][1].error
+
+
+def test_resume_of_a_finished_stream_replays_only_missed_events():
+    broadcast = StreamBroadcast(_events(10), idle_timeout=None)
+    _wait_done(broadcast)
+
+    assert _indices(broadcast.subscribe(after_index=6)) == [7, 8, 9]
+    assert _indices(broadcast.subscribe()) == list(range(10))
+
+
+def test_resume_from_events_evicted_from_the_buffer():
+    broadcast = StreamBroadcast(_events(10), buffer_size=4, idle_timeout=None)
+    _wait_done(broadcast)
+
+    # Events 0..6 fell out of the buffer: replaying from the oldest
+    # buffered event would leave a gap, so the subscriber is told instead.
+    lost = list(broadcast.subscribe(after_index=2))
+    assert len(lost) == 1
+    assert lost[0][1].is_final and lost[0][1].error
+    assert not broadcast.replayable
+    # Resuming from the oldest buffered event still works.
+    assert _indices(broadcast.subscribe(after_index=6)) == [7, 8, 9]
+
+
+def test_stream_is_cancelled_once_the_grace_period_passes():
+    cancel = CancelToken()
+    broadcast = StreamBroadcast(_events(1000, cancel, delay=0.01), cancel=cancel, idle_timeout=0.1)
+    for _ in broadcast.subscribe():
+        break
+
+    _wait_done(broadcast)
+    assert cancel.cancelled
+    assert list(broadcast.subscribe())[-1][1].cancelled
+
+
+def test_resubscribing_within_the_grace_period_keeps_the_stream():
+    cancel = CancelToken()
+    broadcast = StreamBroadcast(_events(30, cancel, delay=0.01), cancel=cancel, idle_timeout=0.2)
+    for _ in broadcast.subscribe():
+        break
+    time.sleep(0.05)
+
+    items = list(broadcast.subscribe())
+
+    assert not cancel.cancelled
+    assert _indices(items) == list(range(30))
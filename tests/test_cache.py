@@ -0,0 +1,29 @@
+import os
+
+from ai_client import CachingStreamer, MockStreamer
+from schemas import Message
+
+
+def _consume_until_final(streamer, messages):
+    """Read a stream the way StreamBroadcast and coalesce_events do."""
+    events = []
+    for ev in streamer.stream_response(messages):
+        events.append(ev)
+        if ev.is_final:
+            break
+    return events
+
+
+def test_entry_committed_when_consumer_stops_at_final_event(tmp_path):
+    inner = MockStreamer(thinking_tokens=2, text_tokens=4, token_delay=0, metrics=None)
+    cache = CachingStreamer(inner, cache_dir=str(tmp_path))
+    messages = [Message(role="user", text="hi")]
+
+    first = _consume_until_final(cache, messages)
+    entries = [n for n in os.listdir(tmp_path) if n.endswith(".jsonl")]
+    assert len(entries) == 1
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+
+    second = _consume_until_final(cache, messages)
+    text = lambda evs: "".join(c.text or "" for ev in evs for c in ev.chunks)
+    assert text(second) == text(first)
@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+from ai_client import coalesce_events, coalesce_events_async
+from schemas import StreamChunk, StreamEvent
+
+WINDOW_MS = 50
+PAUSE = 0.5
+
+
+def _text(index, text):
+    return StreamEvent(chunks=[StreamChunk(index=index, text=text)], is_final=False)
+
+
+def _paused_events():
+    """The first token, two more at once, a pause, one more and the end."""
+    yield _text(0, "a")
+    yield _text(1, "b")
+    yield _text(2, "c")
+    time.sleep(PAUSE)
+    yield _text(3, "d")
+    yield StreamEvent(chunks=[], is_final=True)
+
+
+async def _paused_events_async():
+    yield _text(0, "a")
+    yield _text(1, "b")
+    yield _text(2, "c")
+    await asyncio.sleep(PAUSE)
+    yield _text(3, "d")
+    yield StreamEvent(chunks=[], is_final=True)
+
+
+def _assert_batch_released_at_window(timed):
+    start = timed[0][0]
+    batches = [("".join(c.text or "" for c in ev.chunks), t - start) for t, ev in timed]
+    assert [text for text, _ in batches] == ["a", "bc", "d", ""]
+    # "bc" goes out when its window closes, not when "d" ends the pause.
+    assert batches[1][1] < PAUSE / 2
+
+
+def test_batch_is_released_when_its_window_closes_during_a_pause():
+    timed = [(time.monotonic(), ev) for ev in coalesce_events(_paused_events(), window_ms=WINDOW_MS)]
+
+    _assert_batch_released_at_window(timed)
+
+
+def test_async_batch_is_released_when_its_window_closes_during_a_pause():
+    async def collect():
+        return [
+            (time.monotonic(), ev)
+            async for ev in coalesce_events_async(_paused_events_async(), window_ms=WINDOW_MS)
+        ]
+
+    _assert_batch_released_at_window(asyncio.run(collect()))
+
+
+def test_reader_stays_at_most_max_queued_events_ahead():
+    produced = []
+
+    def events():
+        for i in range(1000):
+            produced.append(i)
+            yield _text(i, "x")
+        yield StreamEvent(chunks=[], is_final=True)
+
+    stream = coalesce_events(events(), window_ms=WINDOW_MS, max_bytes=1, max_queued=4)
+    next(stream)
+    time.sleep(0.2)
+
+    # The consumed event, the queued ones and the one blocked on the queue.
+    assert len(produced) <= 1 + 4 + 1
+    stream.close()
@@ -0,0 +1,38 @@
+import os
+
+from collect_code import write_aggregated
+
+
+def _tree(tmp_path, **files):
+    root = tmp_path / "src"
+    root.mkdir()
+    for name, content in files.items():
+        root.joinpath(name).write_bytes(content)
+    return root, sorted(root.iterdir())
+
+
+def test_summary_separates_read_written_and_omitted(tmp_path):
+    root, files = _tree(tmp_path, **{f"m{i}.py": b"x = 1\n" * 10 for i in range(3)})
+    out = tmp_path / "code.txt"
+    section = write_aggregated(files[:1], root, out)["bytes"]
+
+    stats = write_aggregated(files, root, out, max_bytes=2 * section)
+    assert stats == {"written": 2, "read": 2, "reused": 0, "omitted": 1, "bytes": 2 * section}
+
+    write_aggregated(files, root, out, incremental=True)
+    stats = write_aggregated(files, root, out, incremental=True, max_bytes=2 * section)
+    assert stats == {"written": 2, "read": 0, "reused": 2, "omitted": 1, "bytes": 2 * section}
+
+
+def test_output_uses_platform_line_endings(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "linesep", "\r\n")
+    root, files = _tree(tmp_path, **{"a.py": b"a = 1\r\nb = 2\n"})
+    out = tmp_path / "code.txt"
+
+    write_aggregated(files, root, out)
+    data = out.read_bytes()
+    assert b"a = 1\r\nb = 2\r\n" in data
+    assert data.count(b"\n") == data.count(b"\r\n")
+
+    write_aggregated(files, root, out, max_bytes=1)
+    assert out.read_bytes().endswith(b"bytes reached)\r\n")
@@ -0,0 +1,29 @@
+from ai_client import ContextWindow, KeepSystemLastNPolicy, SlidingWindowPolicy
+from schemas import Message
+
+
+def _history(turns):
+    return [Message(role="system", text="be brief")] + [
+        Message(role="user" if i % 2 == 0 else "assistant", text=f"turn {i}") for i in range(turns)
+    ]
+
+
+def test_keep_last_n_applies_within_the_budget():
+    messages = _history(10)
+    window = ContextWindow(max_prompt_tokens=10_000, policy=KeepSystemLastNPolicy(n=4))
+
+    assert window.fit(messages) == [messages[0]] + messages[-4:]
+
+
+def test_keep_last_n_then_drops_the_oldest_over_the_budget():
+    messages = _history(10)
+    window = ContextWindow(policy=KeepSystemLastNPolicy(n=4))
+    window.max_prompt_tokens = window.total([messages[0]] + messages[-2:])
+
+    assert window.fit(messages) == [messages[0]] + messages[-2:]
+
+
+def test_sliding_window_keeps_everything_within_the_budget():
+    messages = _history(10)
+
+    assert ContextWindow(policy=SlidingWindowPolicy()).fit(messages) == messages
@@ -0,0 +1,37 @@
+import time
+
+from ai_client import HedgedStreamer, MetricsRegistry
+from ai_client.stream.interface import StreamerClass
+from schemas import StreamChunk, StreamEvent
+
+
+class _Backend(StreamerClass):
+    """Sends a role-only delta at once, then `text` after `stall` seconds."""
+
+    def __init__(self, text, stall):
+        self.text = text
+        self.stall = stall
+
+    def stream_response(self, messages, cancel=None):
+        yield StreamEvent(chunks=[StreamChunk(index=0, role="assistant")], is_final=False)
+        if cancel is not None and cancel.wait(self.stall):
+            yield StreamEvent(chunks=[], is_final=True, cancelled=True)
+            return
+        yield StreamEvent(chunks=[StreamChunk(index=1, text=self.text)], is_final=False)
+        yield StreamEvent(chunks=[], is_final=True)
+
+
+def test_race_is_decided_by_the_first_token_not_a_role_only_delta():
+    registry = MetricsRegistry()
+    streamer = HedgedStreamer(
+        _Backend("slow", stall=5.0), hedge=_Backend("fast", stall=0.0), hedge_delay=0.05, metrics=registry
+    )
+
+    start = time.monotonic()
+    events = list(streamer.stream_response([]))
+    elapsed = time.monotonic() - start
+
+    assert "".join(c.text or "" for ev in events for c in ev.chunks) == "fast"
+    assert [c.role for c in events[0].chunks] == ["assistant"]
+    assert elapsed < 1.0
+    assert "chat_stream_hedge_wins_total 1" in registry.render_prometheus()
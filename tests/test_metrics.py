@@ -0,0 +1,26 @@
+import time
+
+from ai_client import MetricsRegistry, instrument
+from schemas import StreamChunk, StreamEvent
+
+
+def _event(**chunk):
+    return StreamEvent(chunks=[StreamChunk(**chunk)], is_final=False)
+
+
+def test_role_only_and_empty_deltas_are_not_tokens():
+    def events():
+        yield _event(index=0, role="assistant")
+        time.sleep(0.05)
+        yield _event(index=1, thinking="hm")
+        yield _event(index=2, text="")
+        yield _event(index=3, text="hi")
+        yield StreamEvent(chunks=[], is_final=True)
+
+    registry = MetricsRegistry()
+    metrics = list(instrument(events(), registry))[-1].metrics
+
+    assert metrics.tokens == 2
+    assert metrics.ttft_thinking >= 0.05
+    assert metrics.tokens_per_second is not None
+    assert 'chat_stream_tokens_total 2' in registry.render_prometheus()
@@ -0,0 +1,34 @@
+from ai_client import ResilientStreamer
+from ai_client.stream.interface import StreamerClass
+from schemas import StreamChunk, StreamEvent
+
+
+def _event(index, text):
+    return StreamEvent(chunks=[StreamChunk(index=index, text=text)], is_final=False)
+
+
+class _SharedEvents(StreamerClass):
+    """Replays the same event objects every time, failing the first attempt."""
+
+    def __init__(self):
+        self.events = [_event(0, "a"), _event(1, "b")]
+        self.calls = 0
+
+    def stream_response(self, messages, cancel=None):
+        self.calls += 1
+        yield from self.events
+        if self.calls == 1:
+            yield StreamEvent(chunks=[], is_final=True, error="reset", retryable=True)
+        else:
+            yield StreamEvent(chunks=[], is_final=True)
+
+
+def test_renumbering_does_not_modify_upstream_events():
+    upstream = _SharedEvents()
+    streamer = ResilientStreamer(upstream, backoff_base=0, metrics=None)
+
+    events = list(streamer.stream_response([]))
+
+    assert [c.index for ev in events for c in ev.chunks] == [0, 1, 2, 3]
+    assert [c.index for ev in upstream.events for c in ev.chunks] == [0, 1]
+    assert events[-1].is_final and not events[-1].error
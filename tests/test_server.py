@@ -0,0 +1,58 @@
+import pytest
+
+from ui import FlaskWebUI
+from ui.server import _parse_args, create_app, main
+
+
+def _only_in_dotenv(monkeypatch, tmp_path, **values):
+    """Write `values` to a .env in the working directory, unset in os.environ."""
+    tmp_path.joinpath(".env").write_text(
+        "".join(f"{k}={v}\n" for k, v in values.items()), encoding="utf-8"
+    )
+    monkeypatch.chdir(tmp_path)
+    for key in values:
+        # setenv first so the variable loaded from .env is removed again
+        # when the test ends.
+        monkeypatch.setenv(key, "")
+        monkeypatch.delenv(key)
+
+
+def test_create_app_uses_secret_key_from_dotenv(monkeypatch, tmp_path):
+    _only_in_dotenv(monkeypatch, tmp_path, FLASK_SECRET_KEY="from-dotenv")
+
+    assert create_app().secret_key == "from-dotenv"
+
+
+def test_cli_config_reads_dotenv(monkeypatch, tmp_path):
+    _only_in_dotenv(monkeypatch, tmp_path, CHAT_PORT="8123")
+
+    assert _parse_args([]).port == 8123
+
+
+@pytest.fixture
+def runs(monkeypatch, tmp_path):
+    """Record `FlaskWebUI.run` calls instead of serving."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("CHAT_ALLOW_WERKZEUG", raising=False)
+    calls = []
+    monkeypatch.setattr(FlaskWebUI, "run", lambda self, **options: calls.append(options))
+    return calls
+
+
+def test_threading_mode_refuses_werkzeug_without_dev(runs, capsys):
+    assert main(["--async-mode", "threading"]) == 2
+    assert runs == []
+    assert "install eventlet or gevent" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("argv", [["--dev"], ["--debug"]])
+def test_threading_mode_allows_werkzeug_when_asked(runs, argv):
+    assert main(["--async-mode", "threading", *argv]) == 0
+    assert runs[0]["allow_unsafe_werkzeug"] is True
+
+
+def test_allow_werkzeug_from_environment(runs, monkeypatch):
+    monkeypatch.setenv("CHAT_ALLOW_WERKZEUG", "1")
+
+    assert main(["--async-mode", "threading"]) == 0
+    assert runs[0]["allow_unsafe_werkzeug"] is True
@@ -0,0 +1,68 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+from ai_client import AsyncStreamer, Streamer, StreamerConfig
+from schemas import Message
+
+DEADLINE = 0.5
+
+
+@pytest.fixture
+def stalled_upstream():
+    """Base URL of a server that accepts connections and never answers."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(8)
+    accepted = []
+    stop = threading.Event()
+
+    def accept():
+        server.settimeout(0.1)
+        while not stop.is_set():
+            try:
+                accepted.append(server.accept()[0])
+            except OSError:
+                pass
+
+    thread = threading.Thread(target=accept, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.getsockname()[1]}/v1"
+    stop.set()
+    thread.join()
+    for conn in accepted:
+        conn.close()
+    server.close()
+
+
+def _config(base_url):
+    return StreamerConfig(base_url=base_url, api_key="test", request_deadline=DEADLINE)
+
+
+def test_deadline_bounds_a_stalled_request(stalled_upstream):
+    streamer = Streamer(_config(stalled_upstream), metrics=None)
+    start = time.monotonic()
+    events = list(streamer.stream_response([Message(role="user", text="hi")]))
+    elapsed = time.monotonic() - start
+
+    assert [ev.is_final for ev in events] == [True]
+    assert "deadline" in events[0].error
+    assert elapsed < DEADLINE + 0.5
+
+
+def test_deadline_bounds_a_stalled_async_request(stalled_upstream):
+    streamer = AsyncStreamer(_config(stalled_upstream), metrics=None)
+
+    async def consume():
+        return [ev async for ev in streamer.stream_response([Message(role="user", text="hi")])]
+
+    start = time.monotonic()
+    events = asyncio.run(consume())
+    elapsed = time.monotonic() - start
+
+    assert [ev.is_final for ev in events] == [True]
+    assert "deadline" in events[0].error
+    assert elapsed < DEADLINE + 0.5
@@ -0,0 +1,186 @@
+import threading
+import time
+
+import pytest
+
+from ai_client import MockStreamer, decode_event
+from ui import FlaskWebUI
+
+
+@pytest.fixture
+def web_ui(monkeypatch):
+    monkeypatch.setenv("FLASK_SECRET_KEY", "test")
+    streamer = MockStreamer(thinking_tokens=2, text_tokens=8, token_delay=0, metrics=None)
+    return FlaskWebUI(streamer=streamer, async_mode="threading")
+
+
+@pytest.fixture
+def paced_ui(monkeypatch):
+    """A UI whose replies take about a second, without coalescing."""
+    monkeypatch.setenv("FLASK_SECRET_KEY", "test")
+    streamer = MockStreamer(thinking_tokens=0, text_tokens=100, token_delay=0.01, metrics=None)
+    return FlaskWebUI(streamer=streamer, async_mode="threading", coalesce_window_ms=0)
+
+
+def _browser(web_ui):
+    """An HTTP client that loaded the page, and a Socket.IO client sharing its session."""
+    http = web_ui.app.test_client()
+    http.get("/")
+    return http, web_ui.socketio.test_client(web_ui.app, flask_test_client=http)
+
+
+def _emit_in_background(sio, event, data):
+    """Emit on a thread; the handler runs until its stream is delivered."""
+    thread = threading.Thread(target=sio.emit, args=(event, data), daemon=True)
+    thread.start()
+    time.sleep(0.15)
+    return thread
+
+
+def _chunks(received):
+    return [decode_event(r["args"][0]) for r in received if r["name"] == "stream_chunk"]
+
+
+def _indices(events):
+    return [c.index for ev in events for c in ev.chunks]
+
+
+def _sse_stream_id(response):
+    """Return the stream id from the first `id:` line of an SSE body."""
+    for line in response.get_data(as_text=True).splitlines():
+        if line.startswith("id: "):
+            return line[len("id: "):].rpartition(":")[0]
+    raise AssertionError("no event id in response")
+
+
+def test_streams_resume_only_in_their_own_session(web_ui):
+    owner = web_ui.app.test_client()
+    other = web_ui.app.test_client()
+    stream_id = _sse_stream_id(owner.post("/stream", json={"prompt": "hi"}))
+
+    assert owner.get(f"/stream/{stream_id}").status_code == 200
+    assert other.get(f"/stream/{stream_id}").status_code == 404
+    assert other.post("/stream", json={"stream_id": stream_id}).status_code == 404
+
+    sio = web_ui.socketio.test_client(web_ui.app, flask_test_client=other)
+    sio.emit("resume_stream", {"stream_id": stream_id})
+    received = sio.get_received()
+    assert [r["name"] for r in received] == ["stream_error"]
+    sio.disconnect()
+
+
+def test_jobs_are_visible_only_to_their_session(web_ui):
+    owner = web_ui.app.test_client()
+    other = web_ui.app.test_client()
+    job_id = owner.post("/reply?async=1", json={"prompt": "hi"}).get_json()["job_id"]
+
+    assert other.get(f"/jobs/{job_id}").status_code == 404
+    assert other.delete(f"/jobs/{job_id}").status_code == 404
+    deadline = time.monotonic() + 5
+    while True:
+        response = owner.get(f"/jobs/{job_id}")
+        assert response.status_code == 200
+        job = response.get_json()
+        if job["status"] not in ("queued", "running") or time.monotonic() > deadline:
+            break
+        time.sleep(0.01)
+    assert job["status"] == "done"
+    assert job["assistant_text"]
+
+
+def test_detached_socket_resumes_without_gaps(paced_ui):
+    http, first = _browser(paced_ui)
+    thread = _emit_in_background(first, "start_stream", {"prompt": "hi"})
+    # What the disconnect handler does: stop delivering, keep the stream.
+    [socket_id] = list(paced_ui._active_streams)
+    paced_ui._detach_stream(socket_id)
+    thread.join(5)
+    received = first.get_received()
+    stream_id = received[0]["args"][0]["stream_id"]
+    before = _chunks(received)
+
+    second = paced_ui.socketio.test_client(paced_ui.app, flask_test_client=http)
+    second.emit("resume_stream", {"stream_id": stream_id, "last_index": _indices(before)[-1]})
+    resumed = second.get_received()
+    after = _chunks(resumed)
+
+    assert before and after
+    assert _indices(before) + _indices(after) == list(range(100))
+    complete = resumed[-1]
+    assert complete["name"] == "stream_complete"
+    assert complete["args"][0]["text"] == "".join(c.text for ev in before + after for c in ev.chunks)
+
+
+def test_detached_stream_is_cancelled_after_the_grace_period(paced_ui):
+    paced_ui.RESUME_GRACE = 0.1
+    http, sio = _browser(paced_ui)
+    thread = _emit_in_background(sio, "start_stream", {"prompt": "hi"})
+    [socket_id] = list(paced_ui._active_streams)
+    paced_ui._detach_stream(socket_id)
+    thread.join(5)
+    stream_id = sio.get_received()[0]["args"][0]["stream_id"]
+    time.sleep(0.5)
+
+    broadcast = paced_ui._broadcasts.get(stream_id)
+    assert broadcast.done and broadcast.cancel_token.cancelled
+    assert broadcast.metadata["complete"]["cancelled"]
+
+
+class _CountingStreamer(MockStreamer):
+    """MockStreamer that records how many events the upstream produced."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.produced = []
+
+    def stream_response(self, messages, cancel=None):
+        produced = 0
+        self.produced.append(0)
+        for ev in super().stream_response(messages, cancel):
+            produced += 1
+            self.produced[-1] = produced
+            yield ev
+
+
+@pytest.fixture
+def counting_ui(monkeypatch):
+    monkeypatch.setenv("FLASK_SECRET_KEY", "test")
+    streamer = _CountingStreamer(thinking_tokens=0, text_tokens=100, token_delay=0.01, metrics=None)
+    return FlaskWebUI(streamer=streamer, async_mode="threading", coalesce_window_ms=0)
+
+
+def _history(http):
+    return [(m["role"], m["text"]) for m in http.get("/messages").get_json()["messages"]]
+
+
+def test_stop_stream_cancels_upstream_and_records_the_partial_reply(counting_ui):
+    http, sio = _browser(counting_ui)
+    thread = _emit_in_background(sio, "start_stream", {"prompt": "hi"})
+    sio.emit("stop_stream")
+    thread.join(5)
+
+    complete = sio.get_received()[-1]
+    assert complete["name"] == "stream_complete"
+    assert complete["args"][0]["cancelled"]
+    partial = complete["args"][0]["assistant_text"]
+    produced = counting_ui.streamer.produced[0]
+    time.sleep(0.2)
+    assert counting_ui.streamer.produced[0] == produced < 100
+    assert _history(http)[-2:] == [("user", "hi"), ("assistant", partial)]
+
+
+def test_new_prompt_comes_after_the_replaced_partial_reply(counting_ui):
+    http, sio = _browser(counting_ui)
+    thread = _emit_in_background(sio, "start_stream", {"prompt": "first"})
+    sio.emit("start_stream", {"prompt": "second"})
+    thread.join(5)
+
+    completes = [r["args"][0] for r in sio.get_received() if r["name"] == "stream_complete"]
+    assert [c["cancelled"] for c in completes] == [True, False]
+    assert counting_ui.streamer.produced[0] < 100
+    assert _history(http)[-4:] == [
+        ("user", "first"),
+        ("assistant", completes[0]["assistant_text"]),
+        ("user", "second"),
+        ("assistant", completes[1]["assistant_text"]),
+    ]
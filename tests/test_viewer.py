@@ -0,0 +1,41 @@
+import io
+import time
+
+import pytest
+
+from ai_client import StreamViewer
+from schemas import StreamChunk, StreamEvent
+
+
+def _event(**chunk):
+    return StreamEvent(chunks=[StreamChunk(**chunk)], is_final=False)
+
+
+def test_buffered_fragment_is_flushed_while_the_stream_pauses():
+    out = io.StringIO()
+    seen = []
+
+    def events():
+        yield _event(index=0, text="first")
+        yield _event(index=1, text=" second")
+        time.sleep(0.3)
+        seen.append(out.getvalue())
+        yield StreamEvent(chunks=[], is_final=True)
+
+    StreamViewer.render(events(), stream=out, frame_interval=0.05)
+
+    assert seen[0].endswith("first second")
+
+
+def test_output_and_framing_are_written_when_the_stream_raises():
+    out = io.StringIO()
+
+    def events():
+        yield _event(index=0, thinking="pondering")
+        raise RuntimeError("connection reset")
+
+    with pytest.raises(RuntimeError):
+        StreamViewer.render(events(), stream=out, frame_interval=10)
+
+    assert "pondering" in out.getvalue()
+    assert out.getvalue().endswith("End thinking\n--------------\n")
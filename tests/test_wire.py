@@ -0,0 +1,63 @@
+import pytest
+
+from ai_client import decode_event, encode_event, pack_event, unpack_event
+from ai_client.stream.wire import event_from_array, event_to_array
+from schemas import StreamChunk, StreamEvent, StreamMetrics
+
+
+def _events():
+    metrics = StreamMetrics(
+        started_at=1.0,
+        duration=2.0,
+        ttft_thinking=0.1,
+        ttft_visible=0.2,
+        tokens=3,
+        tokens_per_second=1.5,
+        gap_p50=0.01,
+        gap_p95=0.02,
+        gap_max=0.03,
+        gap_histogram={"0.05": 2},
+    )
+    return [
+        StreamEvent(
+            chunks=[
+                StreamChunk(index=0, text="Hi", role="assistant", delta={"content": "Hi"}),
+                StreamChunk(index=1, thinking="hmm", role="user", delta={"reasoning": "hmm"}),
+            ],
+            event_id="ev-1",
+        ),
+        StreamEvent(chunks=[], is_final=True, cancelled=True, metrics=metrics),
+        StreamEvent(chunks=[], is_final=True, error="upstream reset", retryable=True),
+    ]
+
+
+def _json_round_trip(ev):
+    return decode_event(encode_event(ev, include_delta=True))
+
+
+def _array_round_trip(ev):
+    return event_from_array(event_to_array(ev, include_delta=True))
+
+
+def _msgpack_round_trip(ev):
+    pytest.importorskip("msgpack")
+    return unpack_event(pack_event(ev, include_delta=True))
+
+
+@pytest.mark.parametrize("round_trip", [_json_round_trip, _array_round_trip, _msgpack_round_trip])
+@pytest.mark.parametrize("event", _events(), ids=["chunks", "cancelled", "retryable-error"])
+def test_encodings_round_trip_every_field(round_trip, event):
+    assert round_trip(event).dict() == event.dict()
+
+
+def test_every_field_is_covered():
+    # Fail when a field is added to the schemas without a value above, so
+    # the encodings are extended with it.
+    events = _events()
+    for model, instances in (
+        (StreamEvent, events),
+        (StreamChunk, [c for ev in events for c in ev.chunks]),
+        (StreamMetrics, [ev.metrics for ev in events if ev.metrics]),
+    ):
+        for name, field in model.__fields__.items():
+            assert any(getattr(i, name) != field.default for i in instances), f"{model.__name__}.{name}"
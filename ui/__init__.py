@@ -1,10 +1,20 @@
 # Export abstract base class for typing and extension
 from .interface import WebUIClass
-
-# Export concrete implementation
-from .impl import FlaskWebUI
+from .config import ServerConfig
 
 __all__ = [
     "WebUIClass",
+    "ServerConfig",
     "FlaskWebUI",
 ]
+
+
+def __getattr__(name):
+    # The concrete implementation pulls in Flask, Flask-SocketIO and the AI
+    # client. It is imported on first access so `python -m ui.server` can
+    # monkey-patch for eventlet/gevent before any of them is loaded.
+    if name == "FlaskWebUI":
+        from .impl import FlaskWebUI
+
+        return FlaskWebUI
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,112 @@
+"""Negotiated gzip/brotli compression of HTTP responses.
+
+`/reply`, `/messages` and the job endpoints return whole replies, thinking
+included, as JSON; such bodies shrink several times when compressed.
+`ResponseCompressor` runs as a Flask `after_request` hook. It picks the
+best encoding the client accepts (brotli when the optional `brotli`
+package is installed, else gzip) and leaves small bodies alone, where the
+CPU time and framing overhead outweigh the saving. Streamed responses,
+such as the Server-Sent Events endpoints, are never buffered for
+compression: they must reach the client event by event.
+"""
+import gzip
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import Response, request
+
+
+def _brotli() -> Any:
+    """Return the `brotli` module, or None if it is not installed."""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Map each content coding in an Accept-Encoding header to its q-value."""
+    codings: Dict[str, float] = {}
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[name] = q
+    return codings
+
+
+class ResponseCompressor:
+    """`after_request` hook compressing large non-streamed responses."""
+
+    def __init__(
+        self,
+        threshold: int = 1024,
+        mimetypes: Iterable[str] = ("application/json", "text/html"),
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        """Configure which responses are compressed and how hard.
+
+        Args:
+            threshold: Smallest body, in bytes, that is compressed.
+            mimetypes: Response types to compress.
+            gzip_level: zlib level 1-9; 6 is the usual size/CPU balance.
+            brotli_quality: Brotli quality 0-11. The default 4 compresses
+                better than gzip -6 at similar speed; the top levels are
+                too slow for per-request use.
+        """
+        self.threshold = threshold
+        self.mimetypes = frozenset(mimetypes)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._brotli = _brotli()
+        # Server preference, best ratio first.
+        self.encodings: List[str] = (["br"] if self._brotli is not None else []) + ["gzip"]
+
+    def choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        """Return the preferred encoding acceptable to the client, or None."""
+        codings = parse_accept_encoding(accept_encoding)
+        best, best_q = None, 0.0
+        for encoding in self.encodings:
+            q = codings.get(encoding, codings.get("*", 0.0))
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        """Compress `data` with `encoding` ("br" or "gzip")."""
+        if encoding == "br":
+            return self._brotli.compress(data, quality=self.brotli_quality)
+        # A fixed mtime keeps the output, and so any ETag, deterministic.
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def __call__(self, response: Response) -> Response:
+        """Compress `response` in place if worthwhile and acceptable."""
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in self.mimetypes
+        ):
+            return response
+        # Caches must not serve a compressed body to other clients.
+        response.vary.add("Accept-Encoding")
+        encoding = self.choose_encoding(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < self.threshold:
+            return response
+        response.set_data(self.compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,86 @@
+import os
+from typing import Any, Dict, Literal, Optional
+from pydantic import BaseModel, Field
+
+
+class ServerConfig(BaseModel):
+    """Deployment settings for serving `FlaskWebUI`.
+
+    Every field can be set from the environment as `CHAT_<FIELD>` (e.g.
+    `CHAT_ASYNC_MODE=eventlet`) via `from_env`; `ui.server` command-line
+    options override those.
+    """
+
+    host: str = Field("127.0.0.1", description="Interface to bind")
+    port: int = Field(5000, description="Port to bind (the first worker's port with several workers)")
+    debug: bool = Field(
+        False,
+        description=(
+            "Run with the Flask debugger and reloader. Development only: it is "
+            "slow and executes arbitrary code from the browser on errors."
+        ),
+    )
+    async_mode: Optional[Literal["threading", "eventlet", "gevent"]] = Field(
+        None,
+        description=(
+            "Flask-SocketIO async mode. eventlet and gevent serve many concurrent "
+            "streams from green threads with a production WSGI server; threading "
+            "falls back to Werkzeug. None picks the first one installed."
+        ),
+    )
+    allow_werkzeug: bool = Field(
+        False,
+        description=(
+            "Serve the threading async mode with Werkzeug's development server "
+            "outside debug mode. Otherwise the server refuses to start in "
+            "threading mode and asks for eventlet or gevent."
+        ),
+    )
+    workers: int = Field(
+        1,
+        description=(
+            "Server processes to start, listening on consecutive ports from `port`. "
+            "More than one requires `message_queue` and a load balancer with "
+            "sticky sessions."
+        ),
+    )
+    message_queue: Optional[str] = Field(
+        None,
+        description=(
+            "Message queue URL (e.g. redis://localhost:6379/0) through which "
+            "several processes share Socket.IO rooms and emits"
+        ),
+    )
+    store: Literal["memory", "sqlite"] = Field(
+        "memory",
+        description="Conversation store; use sqlite to share history between workers",
+    )
+    db_path: str = Field("conversations.db", description="SQLite database for the sqlite store")
+    max_concurrent_replies: int = Field(
+        8, description="`/reply` requests calling upstream at the same time, per worker"
+    )
+    max_queued_replies: int = Field(
+        32,
+        description="`/reply` requests waiting for a free slot before new ones get HTTP 429",
+    )
+    compression: bool = Field(
+        True, description="Compress JSON/HTML responses and Socket.IO polling payloads"
+    )
+    compression_threshold: int = Field(1024, description="Smallest response body, in bytes, to compress")
+
+    @classmethod
+    def from_env(cls, prefix: str = "CHAT_", **overrides: Any) -> "ServerConfig":
+        """Build a config from `<prefix><FIELD>` environment variables.
+
+        Args:
+            prefix: Environment variable prefix.
+            **overrides: Values that take precedence over the environment;
+                None values are ignored.
+        """
+        values: Dict[str, Any] = {}
+        for name in cls.__fields__:
+            raw = os.getenv(prefix + name.upper())
+            if raw is not None and raw != "":
+                values[name] = raw
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        return cls.parse_obj(values)
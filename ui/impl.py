@@ -1,179 +1,743 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, session, has_request_context, url_for
 from flask_socketio import SocketIO, emit
-from typing import List, Optional, Any, Dict
+from typing import Callable, Iterator, List, Optional, Any, Dict, Tuple
 import json
-
-from ai_client import Streamer, StreamViewer
-from schemas import Message
+import logging
+import os
+import secrets
+import threading
+import uuid
+
+from ai_client import (
+    StreamerClass,
+    Streamer,
+    CancelToken,
+    ContextWindow,
+    StreamBroadcast,
+    BroadcastRegistry,
+    coalesce_events,
+    encode_event,
+    MetricsRegistry,
+    default_registry,
+)
+from schemas import Message, StreamEvent
 from .interface import WebUIClass
+from .store import ConversationStoreClass, MemoryConversationStore
+from .jobs import QueueFull, ReplyJob, ReplyJobQueue
+from .compression import ResponseCompressor
+
+logger = logging.getLogger(__name__)
+
+# Server-side Message fields that clients have no use for.
+_SERVER_ONLY_FIELDS = {"tokens", "partial"}
+
+
+def _client_message(message: Message) -> Dict[str, Any]:
+    """Serialize a message for clients, without server-side fields."""
+    return message.dict(exclude=_SERVER_ONLY_FIELDS)
+
+
+class _Delivery:
+    """A stream being delivered to one Socket.IO connection."""
+
+    def __init__(self):
+        self.broadcast: Optional[StreamBroadcast] = None
+        # Set to stop delivering (the client went away); the stream itself
+        # keeps running so the client can resume it.
+        self.stop = threading.Event()
+        # Set once delivery has ended.
+        self.done = threading.Event()
 
 
 class FlaskWebUI(WebUIClass):
     """Flask-based web UI implementation.
 
     Provides HTTP endpoints for chat interaction including both
-    aggregated responses and server-sent event streaming. Maintains
-    in-memory conversation state.
+    aggregated responses and server-sent event streaming. Conversation
+    state is kept per browser session in a pluggable `ConversationStore`.
     """
 
-    def __init__(self, initial_messages: Optional[List[Message]] = None):
+    # Session id used when no request (and thus no browser session) is active,
+    # e.g. when the UI object is driven directly from Python.
+    DEFAULT_SESSION_ID = "default"
+
+    # Seconds a new stream waits for the cancelled previous stream of the
+    # same socket to finish, so their frames are not interleaved.
+    STOP_TIMEOUT = 10.0
+
+    # Resumable streams (Socket.IO and Server-Sent Events): seconds a stream
+    # keeps running after its client disconnected, waiting to be resumed;
+    # events kept for resuming; seconds between keep-alive comments on an
+    # idle SSE connection; and how often an idle Socket.IO delivery checks
+    # whether its client is gone.
+    RESUME_GRACE = 30.0
+    RESUME_BUFFER_EVENTS = 1024
+    SSE_HEARTBEAT = 15.0
+    SOCKET_POLL_INTERVAL = 1.0
+
+    # Seconds a client rejected with 429 is asked to wait before retrying.
+    RETRY_AFTER = 5
+
+    # Messages per history page (rendered by the index, fetched on scroll)
+    # and the largest page a client may request.
+    HISTORY_PAGE_SIZE = 50
+    MAX_HISTORY_PAGE_SIZE = 200
+
+    def __init__(
+        self,
+        initial_messages: Optional[List[Message]] = None,
+        coalesce_window_ms: float = 30.0,
+        coalesce_max_bytes: int = 4096,
+        store: Optional[ConversationStoreClass] = None,
+        context_window: Optional[ContextWindow] = None,
+        streamer: Optional[StreamerClass] = None,
+        wire_format: str = "compact",
+        metrics: Optional[MetricsRegistry] = None,
+        async_mode: Optional[str] = None,
+        message_queue: Optional[str] = None,
+        max_concurrent_replies: int = 8,
+        max_queued_replies: int = 32,
+        compression: bool = True,
+        compression_threshold: int = 1024,
+    ):
         """Initialize Flask web UI with conversation state.
 
         Args:
-            initial_messages: Optional starting messages. If None, defaults
-                to a system message defining the assistant persona.
+            initial_messages: Optional starting messages for every new
+                session. If None, defaults to a system message defining the
+                assistant persona.
+            coalesce_window_ms: Time window for batching streamed fragments
+                into a single `stream_chunk` frame. 0 emits one frame per
+                upstream delta.
+            coalesce_max_bytes: Flush a batch early once its text/thinking
+                reaches this many bytes.
+            store: Conversation store keyed by session id. Defaults to an
+                in-memory LRU store.
+            context_window: Prompt token budget applied to the history sent
+                upstream. Defaults to `ContextWindow()`.
+            streamer: Streamer used for replies, e.g. a `CachingStreamer`
+                wrapping `Streamer`. Defaults to `Streamer()`.
+            wire_format: Encoding of `stream_chunk` frames: "compact" for
+                the short-key form of `ai_client.encode_event`, or "full"
+                for `StreamEvent.dict()`.
+            metrics: Registry served at `/metrics`. Defaults to the
+                process-wide `ai_client.default_registry`, which the default
+                streamer records into.
+            async_mode: Flask-SocketIO async mode ("threading", "eventlet"
+                or "gevent"). None lets Flask-SocketIO pick the first one
+                installed. eventlet and gevent need the standard library
+                monkey-patched before anything else is imported.
+            message_queue: Message queue URL (e.g. redis://host:6379/0)
+                connecting several server processes, so emits and rooms
+                work across them behind a load balancer.
+            max_concurrent_replies: `/reply` requests that may call
+                upstream at the same time.
+            max_queued_replies: `/reply` requests that may wait for one of
+                those slots; further requests get HTTP 429.
+            compression: Compress JSON and HTML responses (gzip, or brotli
+                when installed, as the client accepts) and Socket.IO
+                long-polling payloads. WebSocket frames are compressed with
+                permessage-deflate, which browsers and the threading and
+                eventlet WebSocket servers negotiate by themselves.
+            compression_threshold: Smallest body in bytes worth
+                compressing; per-token frames stay below it.
         """
+        self.coalesce_window_ms = coalesce_window_ms
+        self.coalesce_max_bytes = coalesce_max_bytes
+        if wire_format not in ("compact", "full"):
+            raise ValueError(f"unknown wire_format: {wire_format!r}")
+        self.wire_format = wire_format
+
         self.app = Flask(__name__, static_folder="../static", template_folder="../templates")
-        self.socketio = SocketIO(self.app, cors_allowed_origins="*")
+        # Sessions are cookie-based; set FLASK_SECRET_KEY so they survive
+        # restarts (required for persistent stores to be useful).
+        secret_key = os.getenv("FLASK_SECRET_KEY")
+        if not secret_key:
+            logger.warning(
+                "FLASK_SECRET_KEY is not set; using a random key. Sessions will "
+                "not survive a restart and are not shared between processes."
+            )
+            secret_key = secrets.token_hex(32)
+        self.app.secret_key = secret_key
+        self.socketio = SocketIO(
+            self.app,
+            cors_allowed_origins="*",
+            async_mode=async_mode,
+            message_queue=message_queue,
+            http_compression=compression,
+            compression_threshold=compression_threshold,
+        )
+        if compression:
+            self.app.after_request(ResponseCompressor(threshold=compression_threshold))
         
-        # Initialize conversation history
+        # Messages every new session starts with
         if initial_messages is None:
-            self.messages: List[Message] = [Message(role="system", text="You are Kimi.")]
+            self.initial_messages: List[Message] = [Message(role="system", text="You are Kimi.")]
         else:
-            self.messages = list(initial_messages)
+            self.initial_messages = list(initial_messages)
+
+        self.store = store if store is not None else MemoryConversationStore()
+        self.context_window = context_window if context_window is not None else ContextWindow()
+        self.metrics = metrics if metrics is not None else default_registry
+        self.streamer = streamer if streamer is not None else Streamer(metrics=self.metrics)
+        self._frames = self.metrics.counter(
+            "chat_socketio_frames_total", "Socket.IO frames emitted, by event name."
+        )
+
+        # Streams being delivered to Socket.IO connections, by socket id
+        self._active_streams: Dict[str, _Delivery] = {}
+        self._streams_lock = threading.Lock()
+        # Worker pool and admission control for /reply
+        self.jobs = ReplyJobQueue(max_workers=max_concurrent_replies, max_queued=max_queued_replies)
+        # Resumable streams by stream id
+        self._broadcasts = BroadcastRegistry(retain_seconds=self.RESUME_GRACE)
 
         # Register routes
         self._register_routes()
 
     def get_messages(self) -> List[Message]:
-        """Return current conversation history."""
-        return self.messages
+        """Return conversation history of the current session."""
+        return self.store.get_messages(self._session_id())
 
     def add_message(self, message: Message) -> None:
-        """Add a message to conversation history."""
-        self.messages.append(message)
+        """Add a message to the current session's conversation history."""
+        self._append(self._session_id(), message)
 
     def clear_messages(self) -> None:
-        """Clear all messages from conversation."""
-        self.messages.clear()
+        """Clear all messages from the current session's conversation."""
+        self.store.clear(self._session_id())
+
+    def run(
+        self, host: str = "127.0.0.1", port: int = 5000, debug: bool = True, **options: Any
+    ) -> None:
+        """Start the server for the configured async mode.
 
-    def run(self, host: str = "127.0.0.1", port: int = 5000, debug: bool = True) -> None:
-        """Start the Flask development server."""
+        Extra `options` go to `SocketIO.run` (e.g. `log_output`,
+        `allow_unsafe_werkzeug`). For production use `ui.server`, which
+        turns debug off and picks a production WSGI server.
+        """
         # Use SocketIO's run method to support WebSocket transport
-        self.socketio.run(self.app, host=host, port=port, debug=debug)
+        self.socketio.run(self.app, host=host, port=port, debug=debug, **options)
 
     def get_app(self) -> Flask:
         """Return the Flask application instance."""
         return self.app
 
+    def _session_id(self) -> str:
+        """Return the session id for the active request, creating one if needed.
+
+        The id lives in the signed Flask session cookie, which Flask-SocketIO
+        also exposes to Socket.IO handlers. New sessions are seeded with the
+        initial messages.
+        """
+        if not has_request_context():
+            sid = self.DEFAULT_SESSION_ID
+        else:
+            sid = session.get("sid")
+            if not sid:
+                sid = uuid.uuid4().hex
+                session["sid"] = sid
+        self.store.ensure_session(sid, self.initial_messages)
+        return sid
+
+    def _append(self, sid: str, message: Message) -> Message:
+        """Append to the store with the message's token count cached on it."""
+        self.context_window.count(message)
+        return self.store.append(sid, message)
+
+    def _begin_stream(self, socket_id: str) -> _Delivery:
+        """Register a new delivery for a socket, cancelling its previous stream.
+
+        Waits (up to STOP_TIMEOUT) for the previous stream to emit its final
+        frames so a client always sees one stream's frames at a time.
+        """
+        delivery = _Delivery()
+        with self._streams_lock:
+            previous = self._active_streams.get(socket_id)
+            self._active_streams[socket_id] = delivery
+        if previous is not None:
+            if previous.broadcast is not None:
+                previous.broadcast.cancel()
+            previous.done.wait(self.STOP_TIMEOUT)
+        return delivery
+
+    def _end_stream(self, socket_id: str, delivery: _Delivery) -> None:
+        """Unregister a finished delivery and wake anyone waiting on it."""
+        with self._streams_lock:
+            if self._active_streams.get(socket_id) is delivery:
+                del self._active_streams[socket_id]
+        delivery.done.set()
+
+    def _cancel_stream(self, socket_id: str) -> None:
+        """Cancel the in-flight stream of a socket, if any."""
+        with self._streams_lock:
+            delivery = self._active_streams.get(socket_id)
+        if delivery is not None and delivery.broadcast is not None:
+            delivery.broadcast.cancel()
+
+    def _detach_stream(self, socket_id: str) -> None:
+        """Stop delivering to a socket, leaving its stream resumable.
+
+        The stream is cancelled once nobody resumes it within RESUME_GRACE.
+        """
+        with self._streams_lock:
+            delivery = self._active_streams.get(socket_id)
+        if delivery is not None:
+            delivery.stop.set()
+
+    def _recorded(
+        self,
+        sid: str,
+        events: Iterator[StreamEvent],
+        new_messages: List[Message],
+        complete: Dict[str, Any],
+    ) -> Iterator[StreamEvent]:
+        """Pass `events` through, recording the reply in the session.
+
+        At the final event the assistant text received so far (partial if
+        the stream was cancelled) is appended to the session, and `complete`
+        is filled with the completion payload: aggregated thinking and text
+        plus the messages appended by this turn and the new revision.
+        """
+        text_buf = []
+        thinking_buf = []
+
+        for ev in events:
+            for c in ev.chunks:
+                if c.thinking:
+                    thinking_buf.append(c.thinking)
+                if c.text:
+                    text_buf.append(c.text)
+
+            if ev.is_final:
+                assistant_text = "".join(text_buf).strip()
+                if assistant_text:
+                    new_messages.append(
+                        self._append(sid, Message(role="assistant", text=assistant_text))
+                    )
+                complete.update({
+                    "thinking": "".join(thinking_buf),
+                    "text": "".join(text_buf),
+                    "assistant_text": assistant_text,
+                    "messages": [_client_message(m) for m in new_messages],
+                    "rev": new_messages[-1].rev,
+                    "cancelled": ev.cancelled,
+                })
+            yield ev
+
+    def _deliver(self, delivery: _Delivery, after_index: Optional[int]) -> None:
+        """Emit a broadcast to the calling socket from after `after_index`.
+
+        Sends "stream_chunk" frames and then "stream_complete" with the
+        stream id, until the stream ends or the socket goes away. Must run
+        inside a Socket.IO handler (uses `emit`).
+        """
+        broadcast = delivery.broadcast
+        events = broadcast.subscribe(after_index, heartbeat=self.SOCKET_POLL_INTERVAL)
+        try:
+            for item in events:
+                if delivery.stop.is_set():
+                    return
+                if item is None:
+                    continue
+                ev = item[1]
+                emit("stream_chunk", self._encode_event(ev))
+                self._frames.inc(event="stream_chunk")
+
+                if ev.is_final:
+                    # On cancellation this carries the partial reply.
+                    complete = broadcast.metadata.get("complete") or {}
+                    emit("stream_complete", dict(complete, stream_id=broadcast.stream_id))
+                    self._frames.inc(event="stream_complete")
+                    return
+        finally:
+            # Leave the broadcast now, so its grace period starts.
+            events.close()
+
+    def _start_broadcast(
+        self,
+        sid: str,
+        messages: List[Message],
+        new_messages: List[Message],
+        on_finish: Optional[Callable[[], None]] = None,
+    ) -> StreamBroadcast:
+        """Start a resumable reply stream that runs independently of its client.
+
+        `on_finish` is called once the stream has ended and its reply is
+        recorded in the session.
+        """
+        cancel = CancelToken()
+        complete: Dict[str, Any] = {}
+        events = coalesce_events(
+            self._recorded(sid, self.streamer.stream_response(messages, cancel), new_messages, complete),
+            window_ms=self.coalesce_window_ms,
+            max_bytes=self.coalesce_max_bytes,
+            spawn=self.socketio.start_background_task,
+        )
+        if on_finish is not None:
+            events = _finally(events, on_finish)
+        broadcast = StreamBroadcast(
+            events,
+            cancel=cancel,
+            buffer_size=self.RESUME_BUFFER_EVENTS,
+            idle_timeout=self.RESUME_GRACE,
+            spawn=self.socketio.start_background_task,
+        )
+        broadcast.metadata["complete"] = complete
+        # Only the session that started a stream may resume it.
+        broadcast.metadata["sid"] = sid
+        return self._broadcasts.add(broadcast)
+
+    def _session_broadcast(self, stream_id: Optional[str]) -> Optional[StreamBroadcast]:
+        """Return the stream `stream_id` if it belongs to the current session.
+
+        Streams of other sessions are treated as unknown, so a leaked or
+        guessed id does not expose someone else's reply.
+        """
+        broadcast = self._broadcasts.get(stream_id) if stream_id else None
+        if broadcast is None or broadcast.metadata.get("sid") != self._session_id():
+            return None
+        return broadcast
+
+    def _sse_response(self, broadcast: StreamBroadcast, after_index: Optional[int]) -> Response:
+        """Serve a broadcast as `text/event-stream`, from after `after_index`.
+
+        Each StreamEvent is one unnamed SSE event whose id is
+        `<stream_id>:<chunk index>`, so a client can resume by sending it
+        back as `Last-Event-ID`. The stream ends with a `complete` event
+        carrying the same payload as Socket.IO's `stream_complete`.
+        """
+        stream_id = broadcast.stream_id
+
+        def generate() -> Iterator[str]:
+            for item in broadcast.subscribe(after_index, heartbeat=self.SSE_HEARTBEAT):
+                if item is None:
+                    # Keeps proxies from timing out the connection, and
+                    # surfaces a disconnected client as a failed write.
+                    yield ": keep-alive\n\n"
+                    continue
+                index, ev = item
+                data = json.dumps(self._encode_event(ev), separators=(",", ":"))
+                yield f"id: {stream_id}:{index}\ndata: {data}\n\n"
+                self._frames.inc(event="sse")
+                if ev.is_final:
+                    complete = broadcast.metadata.get("complete") or {}
+                    yield f"event: complete\ndata: {json.dumps(complete, separators=(',', ':'))}\n\n"
+
+        return Response(
+            generate(),
+            mimetype="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                # Disable response buffering in nginx-style proxies.
+                "X-Accel-Buffering": "no",
+                "X-Stream-Id": stream_id,
+            },
+        )
+
+    def _reply_job(self, job: ReplyJob, sid: str, prompt: str) -> None:
+        """Worker body of `/reply`: record the prompt and stream the reply into `job`."""
+        new_messages = [self._append(sid, Message(role="user", text=prompt))]
+        messages = self.context_window.fit(self.store.get_messages(sid))
+
+        # Build and print the API payload for verification
+        api_messages = self._build_api_messages(messages)
+        print("\nMessages sent to streamer:")
+        for m in api_messages:
+            print(m)
+
+        complete: Dict[str, Any] = {}
+        stream = self.streamer.stream_response(messages, job.cancel)
+        for ev in self._recorded(sid, stream, new_messages, complete):
+            job.feed(ev)
+
+        if complete.get("cancelled"):
+            status = "cancelled"
+        elif job.error:
+            status = "error"
+        else:
+            status = "done"
+        job.finish(status, complete)
+
+    def _encode_event(self, ev: StreamEvent) -> Dict[str, Any]:
+        """Serialize a stream event in the configured wire format."""
+        if self.wire_format == "compact":
+            return encode_event(ev)
+        return ev.dict()
+
     def _register_routes(self) -> None:
         """Register all Flask routes. Internal implementation detail."""
         
         @self.app.route("/")
         def index():
-            """Render the main chat interface."""
-            return render_template("index.html", messages=[m.dict() for m in self.messages])
+            """Render the main chat interface with the most recent history page.
+
+            Older messages are fetched by the page script from `/messages`
+            as the user scrolls up, so the page size does not grow with the
+            conversation.
+            """
+            sid = self._session_id()
+            messages, has_more = self.store.get_page(sid, limit=self.HISTORY_PAGE_SIZE)
+            return render_template(
+                "index.html",
+                messages=[_client_message(m) for m in messages],
+                rev=self.store.revision(sid),
+                has_more=has_more,
+                page_size=self.HISTORY_PAGE_SIZE,
+            )
 
         @self.app.route("/reply", methods=["POST"])
         def reply():
             """Accept a JSON payload with `prompt` and return aggregated response.
 
-            This endpoint calls the Streamer to obtain streaming events and uses
-            StreamViewer.render_and_aggregate to get the final text and thinking
-            tokens. The aggregated result is returned as JSON.
+            The reply runs on the bounded `/reply` worker pool. By default
+            the request waits for it and returns the aggregated thinking and
+            text, together with only the messages appended by this call and
+            the new revision. With `?async=1` it returns 202 and a job id at
+            once; poll `GET /jobs/<id>` for the partial or final reply.
+
+            When all workers are busy and the wait queue is full, responds
+            429 with a Retry-After header.
             """
             data = request.get_json(force=True)
             prompt = data.get("prompt", "")
             if not prompt:
                 return jsonify({"error": "empty prompt"}), 400
 
-            # Add user message
-            self.messages.append(Message(role="user", text=prompt))
+            sid = self._session_id()
+            try:
+                job = self.jobs.submit(lambda job: self._reply_job(job, sid, prompt), owner=sid)
+            except QueueFull:
+                resp = jsonify({"error": "too many replies in progress, retry later"})
+                resp.headers["Retry-After"] = str(self.RETRY_AFTER)
+                return resp, 429
+
+            if request.args.get("async") in ("1", "true"):
+                url = url_for("get_job", job_id=job.id)
+                resp = jsonify({"job_id": job.id, "status": job.status, "status_url": url})
+                resp.headers["Location"] = url
+                return resp, 202
+
+            job.wait()
+            result = job.snapshot()
+            if not job.result:
+                # The worker failed before the stream finished.
+                return jsonify({"error": result["error"]}), 500
+            return jsonify({
+                key: result.get(key)
+                for key in ("thinking", "text", "assistant_text", "messages", "rev")
+            })
 
-            # Build and print the API payload for verification
-            api_messages = self._build_api_messages()
-            print("\nMessages sent to streamer:")
-            for m in api_messages:
-                print(m)
+        @self.app.route("/jobs/<job_id>", methods=["GET"])
+        def get_job(job_id):
+            """Return a `/reply?async=1` job: status, partial or final reply.
 
-            # Call the streamer and aggregate the response
-            stream = Streamer.stream_response(self.messages)
-            agg = StreamViewer.render_and_aggregate(stream, show_thinking=True)
+            `status` is "queued", "running", "done", "error" or
+            "cancelled". Once finished, the payload also has
+            `assistant_text`, `messages` and `rev` like a blocking `/reply`.
+            Finished jobs are kept for a limited time. Jobs of other
+            sessions are reported as unknown.
+            """
+            job = self.jobs.get(job_id, owner=self._session_id())
+            if job is None:
+                return jsonify({"error": "unknown or expired job"}), 404
+            return jsonify(job.snapshot())
+
+        @self.app.route("/jobs/<job_id>", methods=["DELETE"])
+        def cancel_job(job_id):
+            """Cancel a job; a reply already streaming keeps its partial text."""
+            job = self.jobs.get(job_id, owner=self._session_id())
+            if job is None:
+                return jsonify({"error": "unknown or expired job"}), 404
+            job.cancel.cancel()
+            return jsonify(job.snapshot()), 202
+
+        @self.app.route("/stream", methods=["POST"])
+        def stream():
+            """Stream a reply as Server-Sent Events.
+
+            Expects `{"prompt": "..."}` and returns `text/event-stream`: one
+            event per (coalesced) StreamEvent, written as it arrives, then a
+            `complete` event. The reply keeps streaming for RESUME_GRACE
+            seconds after the client goes away; to resume, POST again with
+            the `Last-Event-ID` header (or `last_event_id` in the body) set
+            to the id of the last event received, and no prompt.
+            """
+            data = request.get_json(silent=True) or {}
+            last_event_id = request.headers.get("Last-Event-ID") or data.get("last_event_id")
+            stream_id, after_index = _parse_event_id(last_event_id)
+            stream_id = data.get("stream_id") or stream_id
 
-            # Extract thinking and visible text
-            thinking = agg.get("thinking", "") if isinstance(agg, dict) else ""
-            text = agg.get("text", "") if isinstance(agg, dict) else ""
-            assistant_text = text.strip()
+            if stream_id:
+                broadcast = self._session_broadcast(stream_id)
+                if broadcast is None:
+                    return jsonify({"error": "unknown or expired stream"}), 404
+                return self._sse_response(broadcast, after_index)
 
-            # Append assistant message only if visible text exists
-            if assistant_text:
-                self.messages.append(Message(role="assistant", text=assistant_text))
+            prompt = data.get("prompt", "")
+            if not prompt:
+                return jsonify({"error": "empty prompt"}), 400
 
-            return jsonify({
-                "thinking": thinking,
-                "text": text,
-                "assistant_text": assistant_text,
-                "messages": [m.dict() for m in self.messages],
-            })
+            sid = self._session_id()
+            # A new prompt replaces the session's running SSE stream. Stop
+            # it first, so its partial reply is recorded before this prompt.
+            key = f"sse:{sid}"
+            delivery = self._begin_stream(key)
+            try:
+                new_messages = [self._append(sid, Message(role="user", text=prompt))]
+                messages = self.context_window.fit(self.store.get_messages(sid))
+                delivery.broadcast = self._start_broadcast(
+                    sid, messages, new_messages, on_finish=lambda: self._end_stream(key, delivery)
+                )
+            except Exception:
+                self._end_stream(key, delivery)
+                raise
+            return self._sse_response(delivery.broadcast, None)
+
+        @self.app.route("/stream/<stream_id>", methods=["GET"])
+        def resume_stream(stream_id):
+            """Resume (or join) a stream; compatible with `EventSource`.
+
+            A browser `EventSource` reconnects here by itself and sends
+            `Last-Event-ID`; without one the stream is replayed from the
+            start, as far as it is still buffered.
+            """
+            broadcast = self._session_broadcast(stream_id)
+            if broadcast is None:
+                return jsonify({"error": "unknown or expired stream"}), 404
+            _, after_index = _parse_event_id(request.headers.get("Last-Event-ID"))
+            return self._sse_response(broadcast, after_index)
 
         # Socket.IO event handler for streaming replies
         @self.socketio.on("start_stream")
         def handle_start_stream(data):
             """Handle a new streaming request over Socket.IO.
 
-            Expects payload: {"prompt": "..."}. Emits incremental
-            "stream_chunk" events and a final "stream_complete" event
-            with aggregated content.
+            Expects payload: {"prompt": "..."}. Emits "stream_started" with
+            the stream id, incremental "stream_chunk" events and a final
+            "stream_complete" event with aggregated content and the
+            messages appended by this turn.
+
+            A new prompt on the same socket or a "stop_stream" event
+            cancels the stream: the upstream request is closed and whatever
+            text arrived so far is recorded as the assistant reply
+            (`stream_complete` then has `cancelled: true`). A disconnect
+            only detaches the socket; see "resume_stream".
             """
             prompt = (data or {}).get("prompt", "")
             if not prompt:
                 emit("stream_error", {"error": "empty prompt"})
                 return
 
-            # Add user message
-            self.messages.append(Message(role="user", text=prompt))
-
-            # Build and print API payload for verification
-            api_messages = self._build_api_messages()
-            print("\nMessages sent to streamer (Socket.IO):")
-            for m in api_messages:
-                print(m)
-
-            stream = Streamer.stream_response(self.messages)
-            text_buf = []
-            thinking_buf = []
-
-            for ev in stream:
-                try:
-                    payload = ev.dict()
-                except Exception:
-                    payload = {"chunks": [], "is_final": getattr(ev, "is_final", False)}
-
-                # Emit incremental chunk event
-                emit("stream_chunk", payload)
-
-                for c in payload.get("chunks", []):
-                    if c.get("thinking"):
-                        thinking_buf.append(c.get("thinking"))
-                    if c.get("text"):
-                        text_buf.append(c.get("text"))
-
-                if payload.get("is_final"):
-                    assistant_text = "".join(text_buf).strip()
-                    if assistant_text:
-                        self.messages.append(Message(role="assistant", text=assistant_text))
-
-                    emit("stream_complete", {
-                        "thinking": "".join(thinking_buf),
-                        "text": "".join(text_buf),
-                        "assistant_text": assistant_text,
-                        "messages": [m.dict() for m in self.messages],
-                    })
-                    break
+            sid = self._session_id()
+
+            # Stop this socket's previous stream first: its partial reply
+            # must be recorded before the new prompt is appended.
+            socket_id = request.sid
+            delivery = self._begin_stream(socket_id)
+            try:
+                # Add user message
+                new_messages = [self._append(sid, Message(role="user", text=prompt))]
+                messages = self.context_window.fit(self.store.get_messages(sid))
+
+                # Build and print API payload for verification
+                api_messages = self._build_api_messages(messages)
+                print("\nMessages sent to streamer (Socket.IO):")
+                for m in api_messages:
+                    print(m)
+
+                delivery.broadcast = self._start_broadcast(sid, messages, new_messages)
+                emit("stream_started", {"stream_id": delivery.broadcast.stream_id})
+                self._deliver(delivery, None)
+            finally:
+                self._end_stream(socket_id, delivery)
+
+        @self.socketio.on("resume_stream")
+        def handle_resume_stream(data):
+            """Continue a stream after a reconnect, without a new model request.
+
+            Expects payload: {"stream_id": "...", "last_index": N}, where N
+            is the highest chunk index the client received (-1 or omitted
+            for none). Emits only the missed events, then continues live
+            like "start_stream". If the stream is unknown, expired or no
+            longer buffered, "stream_error" carries the stream id and the
+            client should reload the conversation via /messages.
+            """
+            data = data or {}
+            stream_id = data.get("stream_id")
+            broadcast = self._session_broadcast(stream_id)
+            if broadcast is None:
+                emit("stream_error", {"error": "stream can no longer be resumed", "stream_id": stream_id})
+                return
+
+            last_index = data.get("last_index")
+            socket_id = request.sid
+            delivery = self._begin_stream(socket_id)
+            try:
+                delivery.broadcast = broadcast
+                self._deliver(delivery, last_index if isinstance(last_index, int) else None)
+            finally:
+                self._end_stream(socket_id, delivery)
+
+        @self.socketio.on("stop_stream")
+        def handle_stop_stream(data=None):
+            """Cancel the caller's in-flight stream, keeping the partial reply."""
+            self._cancel_stream(request.sid)
+
+        @self.socketio.on("disconnect")
+        def handle_disconnect(*args):
+            """Stop delivering to a client that went away.
+
+            The stream keeps running for RESUME_GRACE seconds so a
+            reconnecting client can resume it; then it is cancelled.
+            """
+            self._detach_stream(request.sid)
+
+        @self.app.route("/metrics", methods=["GET"])
+        def metrics():
+            """Expose stream latency metrics in Prometheus text format."""
+            return Response(
+                self.metrics.render_prometheus(),
+                mimetype="text/plain; version=0.0.4; charset=utf-8",
+            )
 
         @self.app.route("/messages", methods=["GET"])
         def get_messages():
             """Return current conversation messages without modifying state.
 
             Read-only endpoint for the UI to refresh conversation history
-            after streaming completes.
+            after streaming completes. With `?since=<rev>` only messages
+            appended after that revision are returned.
+
+            With `?before=<message id>` and/or `?limit=N` one page of
+            history is returned instead: up to N messages (default
+            `HISTORY_PAGE_SIZE`) preceding that message, or the most recent
+            ones, oldest first, plus `has_more` telling whether older
+            messages exist.
             """
-            return jsonify({"messages": [m.dict() for m in self.messages]})
+            sid = self._session_id()
+            before = request.args.get("before")
+            limit = request.args.get("limit", type=int)
+            if before is not None or limit is not None:
+                limit = min(max(limit or self.HISTORY_PAGE_SIZE, 1), self.MAX_HISTORY_PAGE_SIZE)
+                messages, has_more = self.store.get_page(sid, before=before, limit=limit)
+                return jsonify({
+                    "messages": [_client_message(m) for m in messages],
+                    "rev": self.store.revision(sid),
+                    "has_more": has_more,
+                })
+
+            since = request.args.get("since", type=int)
+            messages = self.store.get_messages(sid, since=since)
+            return jsonify({
+                "messages": [_client_message(m) for m in messages],
+                "rev": self.store.revision(sid),
+            })
 
-    def _build_api_messages(self) -> List[Dict[str, str]]:
+    def _build_api_messages(self, messages: List[Message]) -> List[Dict[str, str]]:
         """Build API-compatible message list. Internal helper method."""
         api_messages = []
-        for m in self.messages:
+        for m in messages:
             try:
                 r = getattr(m, "role")
                 t = getattr(m, "text")
@@ -185,3 +749,22 @@ class FlaskWebUI(WebUIClass):
                 else:
                     continue
         return api_messages
+
+
+def _finally(events: Iterator[StreamEvent], callback: Callable[[], None]) -> Iterator[StreamEvent]:
+    """Pass `events` through, calling `callback` once they end."""
+    try:
+        yield from events
+    finally:
+        callback()
+
+
+def _parse_event_id(value: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+    """Split an SSE event id `<stream_id>:<index>` (or a bare index)."""
+    if not value:
+        return None, None
+    stream_id, _, index = value.rpartition(":")
+    try:
+        return stream_id or None, int(index)
+    except ValueError:
+        return None, None
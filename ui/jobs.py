@@ -0,0 +1,181 @@
+"""Bounded background job queue for aggregated replies.
+
+`/reply` runs a whole upstream completion; doing that inside the request
+handler ties up a server worker for minutes. `ReplyJobQueue` runs replies
+on a fixed-size worker pool instead, admits at most `max_queued` more
+waiting behind them and rejects the rest, so a burst gets fast 429s
+rather than exhausting server threads.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from ai_client import CancelToken
+from schemas import StreamEvent
+
+
+class QueueFull(Exception):
+    """Raised by `ReplyJobQueue.submit` when no capacity is left."""
+
+
+class ReplyJob:
+    """State of one queued reply, updated as its stream arrives.
+
+    Status moves from "queued" to "running" to one of "done", "error" or
+    "cancelled". Thinking and text grow while running, so pollers see the
+    partial reply.
+    """
+
+    def __init__(self, owner: Optional[str] = None):
+        """Create a queued job.
+
+        Args:
+            owner: Session that submitted the job; only it may look the
+                job up.
+        """
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.status = "queued"
+        self.cancel = CancelToken()
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.result: Dict[str, Any] = {}
+        self._thinking: List[str] = []
+        self._text: List[str] = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def feed(self, event: StreamEvent) -> None:
+        """Record one stream event's fragments."""
+        with self._lock:
+            for c in event.chunks:
+                if c.thinking:
+                    self._thinking.append(c.thinking)
+                if c.text:
+                    self._text.append(c.text)
+            if event.error:
+                self.error = event.error
+
+    def start(self) -> None:
+        """Mark the job as running."""
+        with self._lock:
+            self.status = "running"
+
+    def finish(
+        self, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None
+    ) -> None:
+        """Mark the job finished with `status`, its final payload and any error."""
+        with self._lock:
+            self.status = status
+            if error is not None:
+                self.error = error
+            self.result = result or {}
+            self.finished_at = time.time()
+        self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job has finished; return whether it has."""
+        return self._done.wait(timeout)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-ready view of the job, partial while running."""
+        with self._lock:
+            view = {
+                "thinking": "".join(self._thinking),
+                "text": "".join(self._text),
+            }
+            view.update(self.result)
+            view.update({"id": self.id, "status": self.status, "error": self.error})
+            return view
+
+
+class ReplyJobQueue:
+    """Fixed-size worker pool with admission control and job lookup.
+
+    At most `max_workers` jobs run (i.e. call upstream) at once and at
+    most `max_queued` wait for a worker; `submit` raises `QueueFull`
+    beyond that. Finished jobs can be polled for `retain_seconds`.
+    """
+
+    def __init__(self, max_workers: int = 8, max_queued: int = 32, retain_seconds: float = 600.0):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.retain_seconds = retain_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="reply")
+        self._jobs: Dict[str, ReplyJob] = {}
+        self._active = 0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> int:
+        """Jobs admitted and not finished (running plus queued)."""
+        return self._active
+
+    def submit(self, work: Callable[[ReplyJob], None], owner: Optional[str] = None) -> ReplyJob:
+        """Admit a job that runs `work(job)` on a worker.
+
+        `work` feeds the job and calls `finish`; a job it leaves unfinished
+        is finished with status "done", and an exception fails it.
+
+        Args:
+            work: The job body.
+            owner: Session submitting the job (see `get`).
+
+        Raises:
+            QueueFull: If `max_workers + max_queued` jobs are already active.
+        """
+        job = ReplyJob(owner)
+        with self._lock:
+            self._prune()
+            if self._active >= self.max_workers + self.max_queued:
+                raise QueueFull(f"{self._active} replies in progress")
+            self._active += 1
+            self._jobs[job.id] = job
+        try:
+            self._executor.submit(self._run, job, work)
+        except Exception:
+            self._release()
+            raise
+        return job
+
+    def _run(self, job: ReplyJob, work: Callable[[ReplyJob], None]) -> None:
+        try:
+            if job.cancel.cancelled:
+                job.finish("cancelled")
+                return
+            job.start()
+            work(job)
+            if job.finished_at is None:
+                job.finish("done")
+        except Exception as e:
+            job.finish("error", error=str(e))
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._active -= 1
+
+    def get(self, job_id: str, owner: Optional[str] = None) -> Optional[ReplyJob]:
+        """Return a job by id, or None if unknown, expired or not `owner`'s.
+
+        Jobs of another owner are reported as unknown, so a leaked or
+        guessed id does not expose someone else's reply.
+        """
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+        if job is None or job.owner != owner:
+            return None
+        return job
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retain_seconds
+        expired = [
+            jid for jid, j in self._jobs.items() if j.finished_at is not None and j.finished_at < cutoff
+        ]
+        for jid in expired:
+            del self._jobs[jid]
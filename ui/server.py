@@ -1,18 +1,207 @@
-"""Thin entry point for running the web UI server.
+"""Entry point for running the web UI server.
 
-This script instantiates the FlaskWebUI implementation and runs it.
-It serves as a simple executable entry point that delegates all logic
-to the implementation.
+Development (debugger and reloader on):
+  python -m ui.server --debug
+
+Development without the debugger, on Werkzeug's server when neither
+eventlet nor gevent is installed:
+  python -m ui.server --dev
+
+Production (debug off, eventlet's WSGI server):
+  python -m ui.server --host 0.0.0.0 --port 8000 --async-mode eventlet --store sqlite
+
+Several processes sharing Socket.IO rooms through a message queue, on
+ports 8000-8003 behind a load balancer with sticky sessions:
+  python -m ui.server --port 8000 --workers 4 --async-mode eventlet \\
+      --message-queue redis://localhost:6379/0 --store sqlite
+
+Under an external WSGI server, use the application factory (one worker
+per process; scale with more processes and a message queue):
+  gunicorn -k eventlet -w 1 --bind 0.0.0.0:8000 'ui.server:create_app()'
+
+Every option can also be set through `CHAT_<OPTION>` environment
+variables (see `ServerConfig`). Set FLASK_SECRET_KEY so sessions survive
+restarts and are valid on every worker. Variables may also be put in a
+.env file in the working directory (or a parent); the environment takes
+precedence.
 """
 
-from ui import FlaskWebUI
+import argparse
+import os
+import secrets
+import subprocess
+import sys
+from typing import TYPE_CHECKING, List, Optional
+
+from ui.config import ServerConfig
+
+if TYPE_CHECKING:
+    from flask import Flask
+    from ui import FlaskWebUI
+
+
+def _monkey_patch(async_mode: Optional[str]) -> None:
+    """Patch the standard library for green threads, before other imports."""
+    if async_mode == "eventlet":
+        import eventlet
+
+        eventlet.monkey_patch()
+    elif async_mode == "gevent":
+        from gevent import monkey
+
+        monkey.patch_all()
+
+
+def _load_env() -> None:
+    """Load the nearest .env file, searching up from the working directory.
+
+    Done before any configuration is read: the AI client loads .env only
+    on the first request, too late for FLASK_SECRET_KEY and `CHAT_*`.
+    """
+    from dotenv import find_dotenv, load_dotenv
 
+    env_path = find_dotenv(usecwd=True)
+    if env_path:
+        load_dotenv(env_path)
 
-def main() -> None:
+
+def build_ui(config: ServerConfig) -> "FlaskWebUI":
+    """Create the web UI described by `config`."""
+    from ui import FlaskWebUI
+    from ui.store import MemoryConversationStore, SQLiteConversationStore
+
+    if config.store == "sqlite":
+        store = SQLiteConversationStore(config.db_path)
+    else:
+        store = MemoryConversationStore()
+    return FlaskWebUI(
+        store=store,
+        async_mode=config.async_mode,
+        message_queue=config.message_queue,
+        max_concurrent_replies=config.max_concurrent_replies,
+        max_queued_replies=config.max_queued_replies,
+        compression=config.compression,
+        compression_threshold=config.compression_threshold,
+    )
+
+
+def create_app(config: Optional[ServerConfig] = None) -> "Flask":
+    """Application factory for external WSGI servers such as gunicorn.
+
+    Reads .env and `CHAT_*` environment variables when no config is given.
+    The WSGI server's worker class is responsible for monkey-patching.
+    """
+    _load_env()
+    return build_ui(config or ServerConfig.from_env()).get_app()
+
+
+def _parse_args(argv: Optional[List[str]]) -> ServerConfig:
+    parser = argparse.ArgumentParser(description="Run the chat web UI.")
+    parser.add_argument("--host", help="interface to bind (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="port to bind (default 5000)")
+    parser.add_argument(
+        "--debug", action="store_true", default=None, help="enable the debugger and reloader"
+    )
+    parser.add_argument(
+        "--dev",
+        "--allow-werkzeug",
+        dest="allow_werkzeug",
+        action="store_true",
+        default=None,
+        help="allow Werkzeug's development server in the threading async mode",
+    )
+    parser.add_argument("--async-mode", choices=["threading", "eventlet", "gevent"])
+    parser.add_argument("--workers", type=int, help="processes on consecutive ports (default 1)")
+    parser.add_argument("--message-queue", help="e.g. redis://localhost:6379/0")
+    parser.add_argument("--store", choices=["memory", "sqlite"], help="conversation store")
+    parser.add_argument("--db-path", help="SQLite database path")
+    parser.add_argument("--max-concurrent-replies", type=int, help="/reply worker threads (default 8)")
+    parser.add_argument("--max-queued-replies", type=int, help="/reply wait queue size (default 32)")
+    parser.add_argument(
+        "--no-compression",
+        dest="compression",
+        action="store_false",
+        default=None,
+        help="disable response compression",
+    )
+    parser.add_argument("--compression-threshold", type=int, help="bytes (default 1024)")
+    args = parser.parse_args(argv)
+    _load_env()
+    config = ServerConfig.from_env(**vars(args))
+
+    if config.workers > 1:
+        if not config.message_queue:
+            parser.error("--workers > 1 requires --message-queue")
+        if config.debug:
+            parser.error("--debug cannot be combined with several workers")
+    return config
+
+
+def _run_workers(config: ServerConfig) -> int:
+    """Start one single-worker server process per port and wait for them."""
+    if config.store == "memory":
+        print(
+            "warning: with the memory store each worker keeps its own history; "
+            "use --store sqlite to share it",
+            file=sys.stderr,
+        )
+    env = dict(os.environ)
+    # Session cookies must verify on every worker.
+    env.setdefault("FLASK_SECRET_KEY", secrets.token_hex(32))
+
+    procs = []
+    for i in range(config.workers):
+        cmd = [sys.executable, "-m", "ui.server", "--workers", "1", "--port", str(config.port + i)]
+        cmd += ["--host", config.host, "--store", config.store, "--db-path", config.db_path]
+        cmd += ["--message-queue", config.message_queue]
+        cmd += ["--max-concurrent-replies", str(config.max_concurrent_replies)]
+        cmd += ["--max-queued-replies", str(config.max_queued_replies)]
+        cmd += ["--compression-threshold", str(config.compression_threshold)]
+        if not config.compression:
+            cmd.append("--no-compression")
+        if config.allow_werkzeug:
+            cmd.append("--allow-werkzeug")
+        if config.async_mode:
+            cmd += ["--async-mode", config.async_mode]
+        procs.append(subprocess.Popen(cmd, env=env))
+    try:
+        return max(p.wait() for p in procs)
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait()
+        return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
     """Initialize and run the web UI server."""
-    web_ui = FlaskWebUI()
-    web_ui.run(host="127.0.0.1", port=5000, debug=True)
+    config = _parse_args(argv)
+    if config.workers > 1:
+        return _run_workers(config)
+
+    _monkey_patch(config.async_mode)
+    web_ui = build_ui(config)
+    mode = web_ui.socketio.async_mode
+    allow_werkzeug = config.debug or config.allow_werkzeug
+    if mode == "threading" and not allow_werkzeug:
+        print(
+            "error: the threading async mode serves requests with Werkzeug's "
+            "development server; install eventlet or gevent for production "
+            "traffic, or pass --dev (CHAT_ALLOW_WERKZEUG=1) to use it anyway",
+            file=sys.stderr,
+        )
+        return 2
+    print(f"Serving on http://{config.host}:{config.port} (async mode: {mode})", file=sys.stderr)
+    web_ui.run(
+        host=config.host,
+        port=config.port,
+        debug=config.debug,
+        use_reloader=config.debug,
+        allow_unsafe_werkzeug=allow_werkzeug,
+    )
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
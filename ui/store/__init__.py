@@ -0,0 +1,8 @@
+from .interface import ConversationStoreClass
+from .impl import MemoryConversationStore, SQLiteConversationStore
+
+__all__ = [
+    "ConversationStoreClass",
+    "MemoryConversationStore",
+    "SQLiteConversationStore",
+]
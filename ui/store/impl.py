@@ -0,0 +1,273 @@
+import sqlite3
+import threading
+import uuid
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from schemas import Message
+from .interface import ConversationStoreClass
+
+
+class _Session:
+    """Messages and revision counter of one in-memory session."""
+
+    __slots__ = ("messages", "rev")
+
+    def __init__(self):
+        self.messages: List[Message] = []
+        self.rev = 0
+
+
+class MemoryConversationStore(ConversationStoreClass):
+    """In-memory store with least-recently-used eviction.
+
+    Holds at most `max_sessions` conversations; touching a session (read or
+    write) marks it as recently used, and the least recently used session is
+    dropped when the limit is exceeded. History does not survive restarts.
+    """
+
+    def __init__(self, max_sessions: int = 1024):
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _touch(self, session_id: str) -> _Session:
+        """Return the session, creating it and updating LRU order.
+
+        Must be called with the lock held.
+        """
+        s = self._sessions.get(session_id)
+        if s is None:
+            s = _Session()
+            self._sessions[session_id] = s
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        return s
+
+    @staticmethod
+    def _append(s: _Session, message: Message) -> Message:
+        """Stamp and append a copy of `message`. Must hold the lock."""
+        s.rev += 1
+        stored = message.copy(update={"rev": s.rev})
+        s.messages.append(stored)
+        return stored
+
+    def ensure_session(self, session_id: str, seed: List[Message]) -> None:
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions.move_to_end(session_id)
+                return
+            s = self._touch(session_id)
+            for m in seed:
+                self._append(s, m.copy(update={"id": uuid.uuid4().hex}))
+
+    def get_messages(self, session_id: str, since: Optional[int] = None) -> List[Message]:
+        with self._lock:
+            if session_id not in self._sessions:
+                return []
+            messages = self._touch(session_id).messages
+            if since is None:
+                return list(messages)
+            # Revisions grow along the list, so walk back from the end.
+            start = len(messages)
+            while start > 0 and (messages[start - 1].rev or 0) > since:
+                start -= 1
+            return messages[start:]
+
+    def get_page(
+        self, session_id: str, before: Optional[str] = None, limit: int = 50
+    ) -> Tuple[List[Message], bool]:
+        with self._lock:
+            if session_id not in self._sessions:
+                return [], False
+            messages = self._touch(session_id).messages
+            end = len(messages)
+            if before is not None:
+                # Older pages are requested newest first, so the cursor is
+                # usually near the end.
+                end -= 1
+                while end >= 0 and messages[end].id != before:
+                    end -= 1
+                if end < 0:
+                    return [], False
+            start = max(0, end - limit)
+            return messages[start:end], start > 0
+
+    def append(self, session_id: str, message: Message) -> Message:
+        with self._lock:
+            return self._append(self._touch(session_id), message)
+
+    def latest(self, session_id: str) -> Optional[Message]:
+        with self._lock:
+            s = self._sessions.get(session_id)
+            return s.messages[-1] if s and s.messages else None
+
+    def revision(self, session_id: str) -> int:
+        with self._lock:
+            s = self._sessions.get(session_id)
+            return s.rev if s else 0
+
+    def clear(self, session_id: str) -> None:
+        with self._lock:
+            self._touch(session_id).messages.clear()
+
+
+class SQLiteConversationStore(ConversationStoreClass):
+    """SQLite-backed store so history persists across restarts.
+
+    Messages live in a single append-only table whose autoincrement `seq`
+    orders them and doubles as the message revision; an index on
+    `(session_id, seq)` makes full-history reads, `since` queries, history
+    pages and latest-turn lookups index scans. Each message is stored as
+    its JSON serialization so new `Message` fields round-trip unchanged;
+    its id is also kept in an indexed column to resolve page cursors.
+    """
+
+    def __init__(self, path: str = "conversations.db"):
+        self.path = path
+        # One connection shared by request threads, serialized by a lock.
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY,"
+                " rev INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " session_id TEXT NOT NULL,"
+                " body TEXT NOT NULL,"
+                " msg_id TEXT)"
+            )
+            self._migrate()
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS messages_session_seq"
+                " ON messages (session_id, seq)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS messages_session_msg_id"
+                " ON messages (session_id, msg_id)"
+            )
+
+    def _migrate(self) -> None:
+        """Add and fill columns missing from databases created before them.
+
+        `sessions.rev` starts at the session's newest `seq`. For
+        `messages.msg_id` each message is re-serialized, so messages stored
+        before ids existed keep the id they are given here.
+        """
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        if "rev" not in columns:
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN rev INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute(
+                "UPDATE sessions SET rev = COALESCE("
+                " (SELECT MAX(seq) FROM messages WHERE session_id = sessions.id), 0)"
+            )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(messages)")}
+        if "msg_id" in columns:
+            return
+        self._conn.execute("ALTER TABLE messages ADD COLUMN msg_id TEXT")
+        rows = self._conn.execute("SELECT seq, body FROM messages").fetchall()
+        updates = []
+        for seq, body in rows:
+            m = Message.parse_raw(body)
+            updates.append((m.json(exclude={"rev"}), m.id, seq))
+        self._conn.executemany(
+            "UPDATE messages SET body = ?, msg_id = ? WHERE seq = ?", updates
+        )
+
+    def _insert(self, session_id: str, message: Message) -> Message:
+        """Insert one message row. Must be called inside a transaction."""
+        cur = self._conn.execute(
+            "INSERT INTO messages (session_id, body, msg_id) VALUES (?, ?, ?)",
+            (session_id, message.json(exclude={"rev"}), message.id),
+        )
+        self._conn.execute(
+            "UPDATE sessions SET rev = ? WHERE id = ?", (cur.lastrowid, session_id)
+        )
+        return message.copy(update={"rev": cur.lastrowid})
+
+    @staticmethod
+    def _load(seq: int, body: str) -> Message:
+        """Rebuild a stored message, taking its revision from `seq`."""
+        m = Message.parse_raw(body)
+        m.rev = seq
+        return m
+
+    def ensure_session(self, session_id: str, seed: List[Message]) -> None:
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO sessions (id) VALUES (?)", (session_id,)
+            )
+            if cur.rowcount:
+                for m in seed:
+                    self._insert(session_id, m.copy(update={"id": uuid.uuid4().hex}))
+
+    def get_messages(self, session_id: str, since: Optional[int] = None) -> List[Message]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, body FROM messages WHERE session_id = ? AND seq > ?"
+                " ORDER BY seq",
+                (session_id, since or 0),
+            ).fetchall()
+        return [self._load(seq, body) for seq, body in rows]
+
+    def get_page(
+        self, session_id: str, before: Optional[str] = None, limit: int = 50
+    ) -> Tuple[List[Message], bool]:
+        with self._lock:
+            if before is None:
+                rows = self._conn.execute(
+                    "SELECT seq, body FROM messages WHERE session_id = ?"
+                    " ORDER BY seq DESC LIMIT ?",
+                    (session_id, limit + 1),
+                ).fetchall()
+            else:
+                cursor = self._conn.execute(
+                    "SELECT seq FROM messages WHERE session_id = ? AND msg_id = ?",
+                    (session_id, before),
+                ).fetchone()
+                if cursor is None:
+                    return [], False
+                rows = self._conn.execute(
+                    "SELECT seq, body FROM messages WHERE session_id = ? AND seq < ?"
+                    " ORDER BY seq DESC LIMIT ?",
+                    (session_id, cursor[0], limit + 1),
+                ).fetchall()
+        # One row more than requested tells whether older messages exist.
+        has_more = len(rows) > limit
+        return [self._load(seq, body) for seq, body in reversed(rows[:limit])], has_more
+
+    def append(self, session_id: str, message: Message) -> Message:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO sessions (id) VALUES (?)", (session_id,)
+            )
+            return self._insert(session_id, message)
+
+    def latest(self, session_id: str) -> Optional[Message]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT seq, body FROM messages WHERE session_id = ?"
+                " ORDER BY seq DESC LIMIT 1",
+                (session_id,),
+            ).fetchone()
+        return self._load(*row) if row else None
+
+    def revision(self, session_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT rev FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def clear(self, session_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM messages WHERE session_id = ?", (session_id,)
+            )
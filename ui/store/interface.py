@@ -0,0 +1,85 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+from schemas import Message
+
+
+class ConversationStoreClass(ABC):
+    """Abstract base for per-session conversation storage.
+
+    Conversations are keyed by an opaque session id and are append-only:
+    messages are only ever added to the end of a session or the whole
+    session is cleared. This keeps backends simple (a list, a table with an
+    autoincrement key) and makes access to the latest turn cheap.
+
+    Every appended message is stamped with a revision (`Message.rev`) that
+    increases monotonically within a session, even across `clear`, so
+    clients can sync incrementally with `get_messages(since=...)`.
+    """
+
+    @abstractmethod
+    def ensure_session(self, session_id: str, seed: List[Message]) -> None:
+        """Create the session with `seed` messages if it does not exist yet.
+
+        Args:
+            session_id: Session identifier.
+            seed: Messages a brand-new session starts with (e.g. the
+                system prompt). They are stored as copies with fresh ids.
+                Ignored for existing sessions.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_messages(self, session_id: str, since: Optional[int] = None) -> List[Message]:
+        """Return the messages of a session in order (empty if unknown).
+
+        Args:
+            session_id: Session identifier.
+            since: If given, only messages with a revision greater than this
+                are returned.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_page(
+        self, session_id: str, before: Optional[str] = None, limit: int = 50
+    ) -> Tuple[List[Message], bool]:
+        """Return one page of a session's history, oldest message first.
+
+        Pages are addressed by a cursor rather than an offset, so they stay
+        stable while new messages are appended.
+
+        Args:
+            session_id: Session identifier.
+            before: Id of a message; the page ends just before it. None
+                returns the most recent page.
+            limit: Maximum number of messages in the page.
+
+        Returns:
+            Tuple[List[Message], bool]: the page, and whether older
+            messages exist. An unknown `before` id gives an empty page.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def append(self, session_id: str, message: Message) -> Message:
+        """Append a message to the end of a session, creating it if needed.
+
+        Returns:
+            Message: the stored message, with its revision assigned.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def latest(self, session_id: str) -> Optional[Message]:
+        """Return the most recent message of a session, or None."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def revision(self, session_id: str) -> int:
+        """Return the revision of the most recent append (0 if none)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self, session_id: str) -> None:
+        """Remove all messages from a session (the session itself remains)."""
+        raise NotImplementedError